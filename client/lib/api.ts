@@ -199,6 +199,15 @@ export const topicApi = {
     body: JSON.stringify(data),
   }),
 
+  updateStatusBatch: (updates: Array<{
+    topic_id: number;
+    is_completed?: boolean;
+    is_skipped?: boolean;
+  }>) => fetchApi('/topics/status', {
+    method: 'PATCH',
+    body: JSON.stringify(updates),
+  }),
+
   delete: (topicId: number) => fetchApi(`/topics/${topicId}`, {
     method: 'DELETE',
   }),
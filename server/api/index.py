@@ -8,11 +8,18 @@ import os
 # Add the parent directory to the path so we can import app
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Start the cold-start clock before anything else is imported
+from app import cold_start
+
+# Lazy routers, deferred engine and NullPool unless explicitly disabled
+os.environ.setdefault("SERVERLESS", "true")
+
 from app.main import app
 from mangum import Mangum
 
 # Create the handler for Vercel
 handler = Mangum(app, lifespan="off")
+cold_start.mark("handler_ready")
 
 # Also export app for ASGI servers
 __all__ = ["app", "handler"]
@@ -0,0 +1,358 @@
+"""
+Read-through cache for single entities (user, goal, resource, topic responses)
+
+Backends, chosen by CACHE_BACKEND:
+    none    no caching (default)
+    memory  in-process LRU with TTL and a size bound; only safe with a single worker
+            process, since other workers never see its invalidations
+    redis   shared cache at CACHE_URL, for multi-worker deployments (needs `redis`)
+
+Values are the JSON dumps of the response schemas. Writers call invalidate() after
+commit; it leaves a short-lived tombstone (CACHE_INVALIDATION_HOLD seconds) that
+blocks add(), so a reader that loaded the row before the write committed cannot put
+the old version back.
+
+The backends also remember which users wrote in the last few seconds (note_writes), for
+read-replica routing (app/replicas.py). That is not cached data, so the null backend keeps
+it too, in process; only the redis backend shares it between workers.
+
+Every entry also records the user owning the entity and when it was loaded. A delete
+that cascades (a user, goal or resource) calls invalidate_owner() instead of listing
+the cached entities below it: one marker per user, after which that user's entries
+loaded before the delete (plus the hold) count as stale.
+"""
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Optional
+from starlette.concurrency import run_in_threadpool
+from app.config import settings
+import inspect
+import json
+import os
+import threading
+import time
+
+TOMBSTONE = "__invalidated__"
+
+class CacheStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.invalidations = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def count(self, counter: str, amount: int = 1):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + amount)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "stores": self.stores,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+class NullCache:
+    backend = "none"
+    # Whether operations do network I/O (the async path then runs them in the threadpool)
+    blocking = False
+
+    # In-process recent writers are pruned of expired ones beyond this many
+    MAX_WRITERS = 10000
+
+    def __init__(self):
+        self.stats = CacheStats()
+        # user_id -> monotonic time until which the user counts as a recent writer
+        self._writers = {}
+        self._writers_lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        return None
+
+    def add(self, key: str, value: Any):
+        pass
+
+    def invalidate(self, keys: Iterable[str]):
+        pass
+
+    def drop_owner(self, owner: int):
+        pass
+
+    def owner_dropped_at(self, owner: int) -> Optional[float]:
+        """Time (time.time()) before which entries of `owner` are stale, if any"""
+        return None
+
+    def note_writes(self, user_ids: Iterable[int], window: float):
+        now = time.monotonic()
+        with self._writers_lock:
+            if len(self._writers) >= self.MAX_WRITERS:
+                self._writers = {user_id: until for user_id, until in self._writers.items() if until > now}
+            for user_id in user_ids:
+                self._writers[user_id] = now + window
+
+    def wrote_recently(self, user_id: int) -> bool:
+        with self._writers_lock:
+            until = self._writers.get(user_id)
+        return until is not None and until > time.monotonic()
+
+    def status(self) -> dict:
+        return {"backend": self.backend, **self.stats.snapshot()}
+
+class MemoryCache(NullCache):
+    """Thread-safe LRU with per-entry TTL"""
+    backend = "memory"
+
+    def __init__(self, max_entries: int, ttl: float, hold: float):
+        super().__init__()
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hold = hold
+        self._entries = OrderedDict()
+        # owner -> (monotonic expiry, stale-before time)
+        self._owners = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key: str, now: float):
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] <= now:
+            del self._entries[key]
+            if entry[1] != TOMBSTONE:
+                self.stats.count("expirations")
+            return None
+        return entry
+
+    def _trim(self):
+        # Least recently used first; dropping a tombstone early only ends its hold early
+        evicted = 0
+        while len(self._entries) > self.max_entries:
+            _, (_, value) = self._entries.popitem(last=False)
+            if value != TOMBSTONE:
+                evicted += 1
+        if evicted:
+            self.stats.count("evictions", evicted)
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._live(key, time.monotonic())
+            if entry is None or entry[1] == TOMBSTONE:
+                self.stats.count("misses")
+                return None
+            self._entries.move_to_end(key)
+        self.stats.count("hits")
+        return entry[1]
+
+    def add(self, key: str, value: Any):
+        now = time.monotonic()
+        with self._lock:
+            if self._live(key, now) is not None:
+                return
+            self._entries[key] = (now + self.ttl, value)
+            self._trim()
+        self.stats.count("stores")
+
+    def invalidate(self, keys: Iterable[str]):
+        keys = list(keys)
+        expires = time.monotonic() + self.hold
+        with self._lock:
+            for key in keys:
+                self._entries[key] = (expires, TOMBSTONE)
+                self._entries.move_to_end(key)
+            self._trim()
+        self.stats.count("invalidations", len(keys))
+
+    def drop_owner(self, owner: int):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._owners) >= self.max_entries:
+                self._owners = {key: marker for key, marker in self._owners.items() if marker[0] > now}
+            # Entries live at most `ttl`, so the marker can go once they all have
+            self._owners[owner] = (now + self.ttl + self.hold, time.time() + self.hold)
+        self.stats.count("invalidations")
+
+    def owner_dropped_at(self, owner: int) -> Optional[float]:
+        with self._lock:
+            marker = self._owners.get(owner)
+        return marker[1] if marker is not None and marker[0] > time.monotonic() else None
+
+    def status(self) -> dict:
+        with self._lock:
+            size = len(self._entries)
+        return {**super().status(), "entries": size, "max_entries": self.max_entries, "ttl": self.ttl}
+
+class RedisCache(NullCache):
+    """Shared cache on a Redis (compatible) client; TTL expiry and eviction are Redis's own"""
+    backend = "redis"
+    blocking = True
+
+    def __init__(self, client, ttl: float, hold: float, prefix: str = "goal_tracker:"):
+        super().__init__()
+        self.client = client
+        self.ttl = ttl
+        self.hold = hold
+        self.prefix = prefix
+
+    def get(self, key: str) -> Optional[Any]:
+        raw = self.client.get(self.prefix + key)
+        if raw is None or raw in (TOMBSTONE, TOMBSTONE.encode()):
+            self.stats.count("misses")
+            return None
+        self.stats.count("hits")
+        return json.loads(raw)
+
+    def add(self, key: str, value: Any):
+        # NX: never overwrite a live entry or an invalidation tombstone
+        if self.client.set(self.prefix + key, json.dumps(value), nx=True, px=int(self.ttl * 1000)):
+            self.stats.count("stores")
+
+    def invalidate(self, keys: Iterable[str]):
+        keys = list(keys)
+        pipeline = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipeline.set(self.prefix + key, TOMBSTONE, px=int(self.hold * 1000))
+        pipeline.execute()
+        self.stats.count("invalidations", len(keys))
+
+    def drop_owner(self, owner: int):
+        self.client.set(
+            f"{self.prefix}owner:{owner}", str(time.time() + self.hold), px=int((self.ttl + self.hold) * 1000)
+        )
+        self.stats.count("invalidations")
+
+    def owner_dropped_at(self, owner: int) -> Optional[float]:
+        raw = self.client.get(f"{self.prefix}owner:{owner}")
+        return float(raw) if raw is not None else None
+
+    def note_writes(self, user_ids: Iterable[int], window: float):
+        pipeline = self.client.pipeline(transaction=False)
+        for user_id in user_ids:
+            pipeline.set(f"{self.prefix}wrote:{user_id}", "1", px=int(window * 1000))
+        pipeline.execute()
+
+    def wrote_recently(self, user_id: int) -> bool:
+        return self.client.get(f"{self.prefix}wrote:{user_id}") is not None
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_cache() -> NullCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = build_cache()
+    return _cache
+
+def build_cache() -> NullCache:
+    if settings.CACHE_BACKEND == "memory":
+        return MemoryCache(settings.CACHE_MAX_ENTRIES, settings.CACHE_TTL, settings.CACHE_INVALIDATION_HOLD)
+    if settings.CACHE_BACKEND == "redis":
+        import redis
+        return RedisCache(redis.Redis.from_url(settings.CACHE_URL), settings.CACHE_TTL, settings.CACHE_INVALIDATION_HOLD)
+    if settings.CACHE_BACKEND != "none":
+        raise ValueError(f"Unknown CACHE_BACKEND {settings.CACHE_BACKEND!r} (expected none, memory or redis)")
+    return NullCache()
+
+def set_cache(cache: Optional[NullCache]):
+    """Replace the process-wide cache (None rebuilds it from settings on next use)"""
+    global _cache
+    _cache = cache
+
+# A forked worker connects its own cache client instead of sharing its parent's
+os.register_at_fork(after_in_child=lambda: set_cache(None))
+
+def entity_key(kind: str, entity_id: int) -> str:
+    return f"{kind}:{entity_id}"
+
+def _fresh(cache: NullCache, entry) -> bool:
+    dropped_at = cache.owner_dropped_at(entry["owner"])
+    return dropped_at is None or entry["loaded_at"] > dropped_at
+
+def read_through(kind: str, entity_id: int, schema, load: Callable[[], Any], owner: Callable[[Any], int]):
+    """Return `schema` for the entity, from the cache or from `load()` (which may raise 404);
+    `owner(loaded)` gives the id of the user the loaded entity belongs to"""
+    cache = get_cache()
+    if cache.backend == "none":
+        return schema.model_validate(load())
+    key = entity_key(kind, entity_id)
+    entry = cache.get(key)
+    if entry is not None:
+        if _fresh(cache, entry):
+            return schema.model_validate(entry["value"])
+        cache.invalidate([key])
+    loaded_at = time.time()
+    loaded = load()
+    value = schema.model_validate(loaded)
+    cache.add(key, {"owner": owner(loaded), "loaded_at": loaded_at, "value": value.model_dump(mode="json")})
+    return value
+
+async def _run(cache: NullCache, operation, *args):
+    # Keep network round trips of a shared backend off the event loop
+    if cache.blocking:
+        return await run_in_threadpool(operation, *args)
+    return operation(*args)
+
+async def async_read_through(kind: str, entity_id: int, schema, load, owner):
+    """read_through for async controllers; `load` is a coroutine function, `owner` may be one"""
+    cache = get_cache()
+    if cache.backend == "none":
+        return schema.model_validate(await load())
+    key = entity_key(kind, entity_id)
+    entry = await _run(cache, cache.get, key)
+    if entry is not None:
+        if await _run(cache, _fresh, cache, entry):
+            return schema.model_validate(entry["value"])
+        await _run(cache, cache.invalidate, [key])
+    loaded_at = time.time()
+    loaded = await load()
+    value = schema.model_validate(loaded)
+    owner_id = owner(loaded)
+    if inspect.isawaitable(owner_id):
+        owner_id = await owner_id
+    await _run(cache, cache.add, key, {"owner": owner_id, "loaded_at": loaded_at, "value": value.model_dump(mode="json")})
+    return value
+
+def invalidate(keys: Iterable[str]):
+    keys = list(keys)
+    if keys:
+        get_cache().invalidate(keys)
+
+async def async_invalidate(keys: Iterable[str]):
+    keys = list(keys)
+    if keys:
+        cache = get_cache()
+        await _run(cache, cache.invalidate, keys)
+
+def invalidate_owner(user_id: int):
+    """Drop every cached entity of a user: after a delete that cascades, in O(1)"""
+    get_cache().drop_owner(user_id)
+
+async def async_invalidate_owner(user_id: int):
+    cache = get_cache()
+    await _run(cache, cache.drop_owner, user_id)
+
+def note_writes(user_ids: Iterable[int], window: float):
+    """Mark `user_ids` as having written, for `window` seconds"""
+    user_ids = list(user_ids)
+    if user_ids:
+        get_cache().note_writes(user_ids, window)
+
+async def async_note_writes(user_ids: Iterable[int], window: float):
+    user_ids = list(user_ids)
+    if user_ids:
+        cache = get_cache()
+        await _run(cache, cache.note_writes, user_ids, window)
+
+def wrote_recently(user_id: int) -> bool:
+    return get_cache().wrote_recently(user_id)
+
+async def async_wrote_recently(user_id: int) -> bool:
+    cache = get_cache()
+    return await _run(cache, cache.wrote_recently, user_id)
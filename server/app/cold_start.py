@@ -0,0 +1,34 @@
+"""
+Startup timing for cold starts
+
+Import this module first in an entry point so the clock starts before anything
+else is loaded; milestones are recorded with mark() and reported once, as a single
+structured log line, when the first request finishes.
+"""
+import json
+import logging
+import os
+import time
+
+PROCESS_START = time.perf_counter()
+
+logger = logging.getLogger("app.cold_start")
+
+_marks = {}
+_reported = False
+
+def mark(name: str):
+    """Record the first time a milestone is reached, in ms since the clock started"""
+    if name not in _marks:
+        _marks[name] = round((time.perf_counter() - PROCESS_START) * 1000, 2)
+
+def report() -> dict:
+    return {"pid": os.getpid(), "marks_ms": dict(_marks)}
+
+def first_request_done():
+    global _reported
+    if _reported:
+        return
+    _reported = True
+    mark("first_request_done")
+    logger.info(json.dumps({"event": "cold_start", **report()}))
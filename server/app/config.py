@@ -5,6 +5,84 @@ class Settings(BaseSettings):
     DATABASE_URL: str
     HOST: str = "0.0.0.0"
     PORT: int = 8000
+    # Serve the routes through the async engine/AsyncSession instead of the threadpool
+    ASYNC_DB: bool = False
+    # Defaults to DATABASE_URL with its driver swapped for asyncpg/aiosqlite
+    ASYNC_DATABASE_URL: Optional[str] = None
+    # Read replica serving GET/HEAD requests (writes always go to DATABASE_URL); unset, every
+    # request uses the primary. ASYNC_REPLICA_DATABASE_URL defaults like ASYNC_DATABASE_URL
+    REPLICA_DATABASE_URL: Optional[str] = None
+    ASYNC_REPLICA_DATABASE_URL: Optional[str] = None
+    # Seconds after a user's write during which reads about that user's data wait for the
+    # replica to reach their latest data_version, so writes are read back through replica
+    # lag (app/replicas.py); 0 always reads from the replica. Set CACHE_BACKEND=redis to
+    # share the window between workers
+    REPLICA_READ_YOUR_WRITES: float = 5
+    # Cold-start mode for serverless entry points: routers are imported on first use
+    # and connections are not pooled in-process (NullPool)
+    SERVERLESS: bool = False
+    # Production server (python run.py --production): worker processes (0: one per CPU core);
+    # with gunicorn installed, a worker is replaced after WEB_MAX_REQUESTS requests (0: never)
+    # plus a random 0..WEB_MAX_REQUESTS_JITTER, so workers do not all restart at once
+    WEB_WORKERS: int = 0
+    WEB_MAX_REQUESTS: int = 10000
+    WEB_MAX_REQUESTS_JITTER: int = 1000
+    # Seconds a stopping or recycled worker gets to finish its in-flight requests
+    WEB_GRACEFUL_TIMEOUT: int = 30
+    # uvicorn event loop and HTTP parser: "auto" uses uvloop / httptools when installed
+    # (uvicorn[standard]), else asyncio / h11
+    WEB_LOOP: str = "auto"
+    WEB_HTTP: str = "auto"
+    # Connection pool (ignored in SERVERLESS mode); defaults match SQLAlchemy's.
+    # Size workers so that workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) stays below Postgres max_connections
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = -1
+    DB_POOL_PRE_PING: bool = False
+    # Rows per multi-row INSERT ... RETURNING statement in bulk topic inserts
+    BULK_INSERT_CHUNK_SIZE: int = 1000
+    # Rejected rows listed (by line) in an import report; the rest are only counted
+    IMPORT_MAX_ERRORS: int = 100
+    # Rows per server-side cursor fetch, and per streamed chunk, of an account export
+    EXPORT_BATCH_SIZE: int = 1000
+    # N+1 guard: flag a request that runs the same statement shape more than this many
+    # times (0 disables); QUERY_REPEAT_ACTION is "warn" (log) or "raise" (dev/test)
+    QUERY_REPEAT_LIMIT: int = 0
+    QUERY_REPEAT_ACTION: str = "warn"
+    # Encode the goal tree endpoints' response schemas straight to JSON bytes instead of
+    # re-validating them against response_model and running jsonable_encoder
+    FAST_JSON_RESPONSES: bool = True
+    # Goals with at least this many topics get their point aggregates from the NumPy
+    # engine in app/goal_metrics.py, when numpy is installed (0 disables it)
+    VECTORIZED_METRICS_MIN_TOPICS: int = 1000
+    # IANA zone whose calendar days the progress history buckets completions into (app/days.py)
+    PROGRESS_TIMEZONE: str = "UTC"
+    # Entity read cache: "none", "memory" (single worker process only) or "redis" (CACHE_URL)
+    CACHE_BACKEND: str = "none"
+    CACHE_URL: Optional[str] = None
+    CACHE_TTL: float = 300
+    CACHE_MAX_ENTRIES: int = 10000
+    # Seconds an invalidated key refuses new entries, covering reads that raced the write
+    CACHE_INVALIDATION_HOLD: float = 5
+    # Change feed (GET /api/users/{id}/events): "memory" reaches only the streams of the
+    # publishing worker process, "redis" fans events out to every worker through EVENTS_URL
+    EVENTS_BACKEND: str = "memory"
+    EVENTS_URL: Optional[str] = None
+    # Events buffered per open stream before it is told to resync
+    EVENTS_MAX_QUEUED: int = 100
+    # Seconds between keep-alive comments on an idle stream (keeps proxies from closing it)
+    EVENTS_KEEPALIVE: float = 15
+    # Delta sync (GET /api/sync/{id}?since=): changes up to this many seconds before the
+    # cursor are sent again, covering writes whose transaction started before the cursor
+    # was taken but committed after it
+    SYNC_CURSOR_OVERLAP: float = 60
+    # Tombstones older than this are pruned (manage.py prune-tombstones); older cursors get 410
+    SYNC_TOMBSTONE_RETENTION_DAYS: int = 30
+    # List endpoints (goals of a user, resources of a goal, topics of a resource): page size
+    # when a request gives no ?limit= (0 returns the whole list) and the largest ?limit= allowed
+    LIST_PAGE_SIZE: int = 0
+    LIST_MAX_LIMIT: int = 1000
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,128 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from fastapi import HTTPException
+from app.models.goal import Goal
+from app.models.resource import Resource
+from app.schemas.goal import GoalCreate, GoalUpdate, GoalResponse, GoalSummaryResponse, GoalDetailResponse
+from app.controllers.goal_controller import GoalController
+from app.controllers.version_controller import AsyncVersionController
+from app.controllers.event_controller import AsyncEventController
+from app.controllers.sync_controller import AsyncSyncController
+from app.cache import async_read_through, async_invalidate, async_invalidate_owner, entity_key
+from app.detail_shape import DetailShape, FULL_SHAPE
+from app.days import progress_today
+from app.pagination import Page, page_size, paginate, build_page
+from typing import AsyncIterator, List, Optional
+
+class AsyncGoalController:
+    @staticmethod
+    async def create_goal(db: AsyncSession, goal: GoalCreate):
+        db_goal = Goal(**goal.model_dump())
+        db.add(db_goal)
+        await AsyncVersionController.user_changed(db, db_goal.user_id)
+        await db.commit()
+        await db.refresh(db_goal)
+        await AsyncEventController.publish(db, "goal.created", [db_goal.goal_id], goal_ids=[db_goal.goal_id])
+        return db_goal
+    
+    @staticmethod
+    async def get_goals_by_user(db: AsyncSession, user_id: int, limit: Optional[int] = None, cursor: Optional[str] = None) -> Page:
+        limit = page_size(limit)
+        statement = paginate(
+            select(Goal).where(Goal.user_id == user_id), Goal.created_at, Goal.goal_id, db.bind.dialect.name, limit, cursor
+        )
+        return build_page((await db.scalars(statement)).all(), limit, "goal_id")
+    
+    @staticmethod
+    async def get_goal(db: AsyncSession, goal_id: int) -> GoalResponse:
+        return await async_read_through("goal", goal_id, GoalResponse, lambda: AsyncGoalController._get(db, goal_id), lambda goal: goal.user_id)
+    
+    @staticmethod
+    async def _get(db: AsyncSession, goal_id: int) -> Goal:
+        goal = await db.scalar(select(Goal).where(Goal.goal_id == goal_id))
+        if not goal:
+            raise HTTPException(status_code=404, detail="Goal not found")
+        return goal
+    
+    @staticmethod
+    async def update_goal(db: AsyncSession, goal_id: int, goal_update: GoalUpdate):
+        goal = await AsyncGoalController._get(db, goal_id)
+        
+        update_data = goal_update.model_dump(exclude_unset=True)
+        for key, value in update_data.items():
+            setattr(goal, key, value)
+        await AsyncVersionController.user_changed(db, goal.user_id)
+        
+        await db.commit()
+        await async_invalidate([entity_key("goal", goal_id)])
+        await db.refresh(goal)
+        await AsyncEventController.publish(db, "goal.updated", [goal_id], goal_ids=[goal_id])
+        return goal
+    
+    @staticmethod
+    async def delete_goal(db: AsyncSession, goal_id: int):
+        goal = await AsyncGoalController._get(db, goal_id)
+        
+        await AsyncVersionController.user_changed(db, goal.user_id)
+        await AsyncSyncController.record_deletion(db, "goal", goal_id, goal_id)
+        await db.delete(goal)
+        await db.commit()
+        await async_invalidate_owner(goal.user_id)
+        await AsyncEventController.publish(db, "goal.deleted", [goal_id], user_id=goal.user_id)
+        return {"message": "Goal deleted successfully"}
+    
+    @staticmethod
+    async def get_goals_with_details(db: AsyncSession, user_id: int, shape: DetailShape = FULL_SHAPE) -> List[GoalDetailResponse]:
+        if shape.sparse:
+            today = progress_today()
+            rows = (await db.execute(GoalController.shaped_statement(user_id, shape, today))).all()
+            topics = GoalController._topics_by_resource(
+                await db.execute(GoalController.shaped_topics_statement(user_id, shape)) if shape.depth == "full" else ()
+            )
+            return [
+                GoalController._build_shaped_detail(goal, *today_points, shape=shape, today=today, topics=topics)
+                for goal, *today_points in rows
+            ]
+        
+        # Lazy loads are not available on AsyncSession, so the tree is loaded up front
+        goals = await db.scalars(
+            select(Goal).where(Goal.user_id == user_id).options(
+                selectinload(Goal.resources).selectinload(Resource.topics)
+            )
+        )
+        
+        today = progress_today()
+        return [
+            GoalController._build_goal_detail(
+                goal, ((resource, resource.topics) for resource in goal.resources), today
+            )
+            for goal in goals
+        ]
+    
+    @staticmethod
+    async def stream_goals_with_details(db: AsyncSession, user_id: int, batch_size: int = 500) -> AsyncIterator[GoalDetailResponse]:
+        today = progress_today()
+        rows = await db.stream(
+            GoalController.tree_rows_statement(user_id).execution_options(yield_per=batch_size)
+        )
+        
+        goal_rows = []
+        async for row in rows:
+            if goal_rows and row[0] is not goal_rows[0][0]:
+                yield GoalController._build_goal_detail(goal_rows[0][0], GoalController._group_resources(goal_rows), today)
+                goal_rows = []
+            goal_rows.append(row)
+        if goal_rows:
+            yield GoalController._build_goal_detail(goal_rows[0][0], GoalController._group_resources(goal_rows), today)
+    
+    @staticmethod
+    async def get_goals_summary(db: AsyncSession, user_id: int) -> List[GoalSummaryResponse]:
+        today = progress_today()
+        rows = (await db.execute(GoalController.summary_statement(user_id, today))).all()
+        return [
+            GoalSummaryResponse(**GoalController._goal_metrics(
+                goal, goal.goals_total_points, goal.completed_points_goal, todays_points, today
+            ))
+            for goal, todays_points in rows
+        ]
@@ -0,0 +1,119 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
+from fastapi import HTTPException
+from app.models.resource import Resource
+from app.schemas.resource import ResourceCreate, ResourceUpdate, ResourceResponse
+from app.controllers.resource_controller import ResourceController
+from app.controllers.rollup_controller import AsyncRollupController
+from app.controllers.version_controller import AsyncVersionController
+from app.controllers.progress_controller import AsyncProgressController
+from app.controllers.event_controller import AsyncEventController
+from app.controllers.sync_controller import AsyncSyncController
+from app.controllers.cache_controller import AsyncCacheController
+from app.cache import async_read_through, async_invalidate, async_invalidate_owner, entity_key
+from app.pagination import Page, page_size, paginate, build_page
+from typing import Optional
+
+class AsyncResourceController:
+    @staticmethod
+    async def create_resource(db: AsyncSession, resource: ResourceCreate):
+        resource_data = resource.model_dump()
+        
+        # Convert time string to timedelta if provided
+        if resource_data.get('total_time_per_unit'):
+            try:
+                resource_data['total_time_per_unit'] = ResourceController._parse_time_string(
+                    resource_data['total_time_per_unit']
+                )
+            except:
+                resource_data['total_time_per_unit'] = None
+        
+        db_resource = Resource(**resource_data)
+        db.add(db_resource)
+        await AsyncVersionController.goals_changed(db, [db_resource.goal_id])
+        await db.commit()
+        await db.refresh(db_resource)
+        await AsyncEventController.publish(db, "resource.created", [db_resource.resource_id], resource_ids=[db_resource.resource_id])
+        return AsyncResourceController._with_time_string(db_resource)
+    
+    @staticmethod
+    async def get_resources_by_goal(db: AsyncSession, goal_id: int, limit: Optional[int] = None, cursor: Optional[str] = None) -> Page:
+        limit = page_size(limit)
+        statement = paginate(
+            select(Resource).where(Resource.goal_id == goal_id),
+            Resource.created_at, Resource.resource_id, db.bind.dialect.name, limit, cursor
+        )
+        page = build_page((await db.scalars(statement)).all(), limit, "resource_id")
+        for resource in page.items:
+            AsyncResourceController._with_time_string(resource)
+        return page
+    
+    @staticmethod
+    async def get_resource(db: AsyncSession, resource_id: int) -> ResourceResponse:
+        async def load():
+            return AsyncResourceController._with_time_string(await AsyncResourceController._get(db, resource_id))
+        return await async_read_through(
+            "resource", resource_id, ResourceResponse, load, lambda resource: AsyncCacheController.owner(db, "resource", resource_id)
+        )
+    
+    @staticmethod
+    async def update_resource(db: AsyncSession, resource_id: int, resource_update: ResourceUpdate):
+        resource = await AsyncResourceController._get(db, resource_id)
+        
+        update_data = resource_update.model_dump(exclude_unset=True)
+        old_value_per_unit = resource.value_per_unit
+        
+        # Convert time string to timedelta if provided
+        if 'total_time_per_unit' in update_data and update_data['total_time_per_unit']:
+            try:
+                update_data['total_time_per_unit'] = ResourceController._parse_time_string(
+                    update_data['total_time_per_unit']
+                )
+            except:
+                update_data['total_time_per_unit'] = None
+        
+        for key, value in update_data.items():
+            setattr(resource, key, value)
+        
+        # Topic point values depend on value_per_unit, so the rollups must follow it
+        if 'value_per_unit' in update_data:
+            await AsyncRollupController.resource_revalued(db, resource)
+            await AsyncProgressController.resource_revalued(db, resource, old_value_per_unit)
+        await AsyncVersionController.goals_changed(db, [resource.goal_id])
+        
+        await db.commit()
+        await async_invalidate([entity_key("resource", resource_id)])
+        await db.refresh(resource)
+        await AsyncEventController.publish(db, "resource.updated", [resource_id], resource_ids=[resource_id])
+        return AsyncResourceController._with_time_string(resource)
+    
+    @staticmethod
+    async def delete_resource(db: AsyncSession, resource_id: int):
+        resource = await AsyncResourceController._get(db, resource_id)
+        
+        await AsyncRollupController.resource_removed(db, resource)
+        await AsyncProgressController.resource_removed(db, resource)
+        owners = await AsyncVersionController.goals_changed(db, [resource.goal_id])
+        await AsyncSyncController.record_deletion(db, "resource", resource_id, resource.goal_id)
+        await db.delete(resource)
+        await db.commit()
+        for user_id in owners:
+            await async_invalidate_owner(user_id)
+        await AsyncEventController.publish(db, "resource.deleted", [resource_id], goal_ids=[resource.goal_id])
+        return {"message": "Resource deleted successfully"}
+    
+    @staticmethod
+    async def _get(db: AsyncSession, resource_id: int) -> Resource:
+        resource = await db.scalar(select(Resource).where(Resource.resource_id == resource_id))
+        if not resource:
+            raise HTTPException(status_code=404, detail="Resource not found")
+        return resource
+    
+    @staticmethod
+    def _with_time_string(resource: Resource) -> Resource:
+        # Convert timedelta to string before returning, without marking the row dirty
+        # (the session outlives the request helper, so a later flush must not write it back)
+        if resource.total_time_per_unit:
+            set_committed_value(resource, "total_time_per_unit", str(resource.total_time_per_unit))
+        return resource
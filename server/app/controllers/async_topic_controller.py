@@ -0,0 +1,141 @@
+from sqlalchemy import Row, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException
+from app.models.topic import ResourceTopic
+from app.models.resource import Resource
+from app.controllers.rollup_controller import RollupController, AsyncRollupController
+from app.controllers.version_controller import AsyncVersionController
+from app.controllers.progress_controller import ProgressController, AsyncProgressController
+from app.controllers.event_controller import AsyncEventController
+from app.controllers.topic_controller import TopicController
+from app.controllers.sync_controller import AsyncSyncController
+from app.controllers.cache_controller import AsyncCacheController
+from app.days import progress_now
+from app.cache import async_read_through, async_invalidate, entity_key
+from app.schemas.topic import TopicCreate, TopicUpdate, BulkTopicCreate, TopicStatusUpdate, TopicResponse
+from app.config import settings
+from app.pagination import Page, page_size, paginate, build_page
+from typing import List, Optional
+
+class AsyncTopicController:
+    @staticmethod
+    async def create_topic(db: AsyncSession, topic: TopicCreate):
+        resource = await AsyncTopicController._get_resource(db, topic.resource_id)
+        db_topic = ResourceTopic(**topic.model_dump())
+        db.add(db_topic)
+        await AsyncRollupController.topics_added(db, resource, [db_topic])
+        await AsyncProgressController.topics_added(db, resource, [db_topic])
+        await AsyncVersionController.goals_changed(db, [resource.goal_id])
+        await db.commit()
+        await db.refresh(db_topic)
+        await AsyncEventController.publish(db, "topic.created", [db_topic.topic_id], resource_ids=[db_topic.resource_id])
+        return db_topic
+    
+    @staticmethod
+    async def bulk_create_topics(db: AsyncSession, bulk_data: BulkTopicCreate) -> List[TopicResponse]:
+        """Create multiple topics for a resource in one call"""
+        resource = await AsyncTopicController._get_resource(db, bulk_data.resource_id)
+        topics = await AsyncTopicController._insert_topics(
+            db, resource, [topic_data.model_dump() for topic_data in bulk_data.topics]
+        )
+        response = [TopicResponse.model_validate(topic) for topic in topics]
+        await db.commit()
+        await AsyncEventController.publish(db, "topic.created", [topic.topic_id for topic in response], resource_ids=[resource.resource_id])
+        return response
+    
+    @staticmethod
+    async def _insert_topics(db: AsyncSession, resource: Resource, rows: List[dict]) -> List[Row]:
+        """One multi-row INSERT ... RETURNING per chunk, as in TopicController._insert_topics"""
+        topics = []
+        chunk_size = settings.BULK_INSERT_CHUNK_SIZE
+        for start in range(0, len(rows), chunk_size):
+            chunk = TopicController._insert_values(resource, rows[start:start + chunk_size])
+            inserted = (await db.execute(TopicController.insert_statement(), chunk)).all()
+            topics.extend(sorted(inserted, key=lambda topic: topic.topic_id))
+        
+        await AsyncRollupController.topics_added(db, resource, topics)
+        await AsyncProgressController.topics_added(db, resource, topics)
+        await AsyncVersionController.goals_changed(db, [resource.goal_id])
+        return topics
+    
+    @staticmethod
+    async def get_topics_by_resource(db: AsyncSession, resource_id: int, limit: Optional[int] = None, cursor: Optional[str] = None) -> Page:
+        limit = page_size(limit)
+        statement = paginate(
+            select(ResourceTopic).where(ResourceTopic.resource_id == resource_id),
+            ResourceTopic.created_at, ResourceTopic.topic_id, db.bind.dialect.name, limit, cursor
+        )
+        return build_page((await db.scalars(statement)).all(), limit, "topic_id")
+    
+    @staticmethod
+    async def get_topic(db: AsyncSession, topic_id: int) -> TopicResponse:
+        return await async_read_through(
+            "topic", topic_id, TopicResponse, lambda: AsyncTopicController._get(db, topic_id),
+            lambda topic: AsyncCacheController.owner(db, "topic", topic_id)
+        )
+    
+    @staticmethod
+    async def _get(db: AsyncSession, topic_id: int, locked: bool = False) -> ResourceTopic:
+        statement = TopicController.locked_statement(topic_id) if locked else select(ResourceTopic).where(ResourceTopic.topic_id == topic_id)
+        topic = await db.scalar(statement)
+        if not topic:
+            raise HTTPException(status_code=404, detail="Topic not found")
+        return topic
+    
+    @staticmethod
+    async def update_topic(db: AsyncSession, topic_id: int, topic_update: TopicUpdate):
+        return await AsyncTopicController._apply_update(db, topic_id, topic_update.model_dump(exclude_unset=True))
+    
+    @staticmethod
+    async def update_topic_status(db: AsyncSession, topic_id: int, status_update: TopicStatusUpdate):
+        """Update topic's completion and skipped status"""
+        return await AsyncTopicController._apply_update(db, topic_id, status_update.model_dump(exclude_unset=True))
+    
+    @staticmethod
+    async def delete_topic(db: AsyncSession, topic_id: int):
+        topic = await AsyncTopicController._get(db, topic_id, locked=True)
+        resource = await AsyncTopicController._get_resource(db, topic.resource_id)
+        
+        await AsyncRollupController.topic_removed(db, resource, topic)
+        await AsyncProgressController.topic_removed(db, resource, topic)
+        await AsyncVersionController.goals_changed(db, [resource.goal_id])
+        await AsyncSyncController.record_deletion(db, "topic", topic_id, resource.goal_id)
+        await db.delete(topic)
+        await db.commit()
+        await async_invalidate([entity_key("topic", topic_id)])
+        await AsyncEventController.publish(db, "topic.deleted", [topic_id], resource_ids=[resource.resource_id])
+        return {"message": "Topic deleted successfully"}
+    
+    @staticmethod
+    async def _apply_update(db: AsyncSession, topic_id: int, update_data: dict):
+        topic = await AsyncTopicController._get(db, topic_id, locked=True)
+        resource = await AsyncTopicController._get_resource(db, topic.resource_id)
+        before = RollupController.topic_contribution(resource, topic)
+        bucket_before = ProgressController.topic_snapshot(resource, topic)
+        
+        # If is_completed is being set to True, automatically set complete_date
+        if "is_completed" in update_data and update_data["is_completed"] == True:
+            if not topic.is_completed:  # Only set if it wasn't already completed
+                update_data["complete_date"] = progress_now()
+        # If is_completed is being set to False, clear complete_date
+        elif "is_completed" in update_data and update_data["is_completed"] == False:
+            update_data["complete_date"] = None
+        
+        for key, value in update_data.items():
+            setattr(topic, key, value)
+        
+        await AsyncRollupController.topic_changed(db, resource, before, RollupController.topic_contribution(resource, topic))
+        await AsyncProgressController.topic_changed(db, bucket_before, ProgressController.topic_snapshot(resource, topic))
+        await AsyncVersionController.goals_changed(db, [resource.goal_id])
+        await db.commit()
+        await async_invalidate([entity_key("topic", topic_id)])
+        await db.refresh(topic)
+        await AsyncEventController.publish(db, "topic.updated", [topic_id], resource_ids=[topic.resource_id])
+        return topic
+    
+    @staticmethod
+    async def _get_resource(db: AsyncSession, resource_id: int) -> Resource:
+        resource = await db.scalar(select(Resource).where(Resource.resource_id == resource_id))
+        if not resource:
+            raise HTTPException(status_code=404, detail="Resource not found")
+        return resource
@@ -0,0 +1,88 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import HTTPException
+from app.models.user import User
+from app.schemas.user import UserCreate, UserUpdate, UserLogin, ChangePassword, UserResponse
+from app.controllers.version_controller import AsyncVersionController
+from app.cache import async_read_through, async_invalidate, async_invalidate_owner, entity_key
+from app.replicas import async_writers
+
+class AsyncUserController:
+    @staticmethod
+    async def create_user(db: AsyncSession, user: UserCreate):
+        # Check if email already exists
+        existing_user = await db.scalar(select(User).where(User.email == user.email))
+        if existing_user:
+            raise HTTPException(status_code=400, detail="Email already registered")
+        
+        db_user = User(**user.model_dump())
+        db.add(db_user)
+        await db.commit()
+        await db.refresh(db_user)
+        return db_user
+    
+    @staticmethod
+    async def login(db: AsyncSession, login_data: UserLogin):
+        user = await db.scalar(select(User).where(User.email == login_data.email))
+        if not user:
+            raise HTTPException(status_code=401, detail="Invalid email or password")
+        
+        if user.password != login_data.password:
+            raise HTTPException(status_code=401, detail="Invalid email or password")
+        
+        return user
+    
+    @staticmethod
+    async def get_user(db: AsyncSession, user_id: int) -> UserResponse:
+        return await async_read_through("user", user_id, UserResponse, lambda: AsyncUserController._get(db, user_id), lambda user: user.user_id)
+    
+    @staticmethod
+    async def _get(db: AsyncSession, user_id: int) -> User:
+        user = await db.scalar(select(User).where(User.user_id == user_id))
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+        return user
+    
+    @staticmethod
+    async def update_user(db: AsyncSession, user_id: int, user_update: UserUpdate):
+        user = await AsyncUserController._get(db, user_id)
+        
+        update_data = user_update.model_dump(exclude_unset=True)
+        
+        # Check if email is being updated and if it's already taken
+        if "email" in update_data and update_data["email"] != user.email:
+            existing_user = await db.scalar(select(User).where(User.email == update_data["email"]))
+            if existing_user:
+                raise HTTPException(status_code=400, detail="Email already registered")
+        
+        for key, value in update_data.items():
+            setattr(user, key, value)
+        # Also marks the change for replica routing (app/replicas.py)
+        await AsyncVersionController.user_changed(db, user_id)
+        
+        await db.commit()
+        await async_invalidate([entity_key("user", user_id)])
+        await db.refresh(user)
+        return user
+    
+    @staticmethod
+    async def change_password(db: AsyncSession, user_id: int, password_data: ChangePassword):
+        user = await AsyncUserController._get(db, user_id)
+        
+        if user.password != password_data.old_password:
+            raise HTTPException(status_code=401, detail="Old password is incorrect")
+        
+        user.password = password_data.new_password
+        await db.commit()
+        await db.refresh(user)
+        return user
+    
+    @staticmethod
+    async def delete_user(db: AsyncSession, user_id: int):
+        user = await AsyncUserController._get(db, user_id)
+        
+        await db.delete(user)
+        await db.commit()
+        await async_invalidate_owner(user_id)
+        await async_writers([user_id])
+        return {"message": "User deleted successfully"}
@@ -0,0 +1,34 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.models.goal import Goal
+from app.models.resource import Resource
+from app.models.topic import ResourceTopic
+from app.controllers.version_controller import VersionController
+
+class CacheController:
+    """Owner lookups for cache entries of resources and topics (users and goals carry
+    their user_id); only run on a cache miss with a cache configured"""
+
+    @staticmethod
+    def owner_statement(kind: str, entity_id: int):
+        if kind == "resource":
+            return VersionController.users_of_resources([entity_id])
+        return (
+            select(Goal.user_id)
+            .join(Resource, Resource.goal_id == Goal.goal_id)
+            .join(ResourceTopic, ResourceTopic.resource_id == Resource.resource_id)
+            .where(ResourceTopic.topic_id == entity_id)
+        )
+
+    @staticmethod
+    def owner(db: Session, kind: str, entity_id: int) -> int:
+        return db.scalar(CacheController.owner_statement(kind, entity_id))
+
+
+class AsyncCacheController:
+    """AsyncSession counterpart of CacheController"""
+
+    @staticmethod
+    async def owner(db: AsyncSession, kind: str, entity_id: int) -> int:
+        return await db.scalar(CacheController.owner_statement(kind, entity_id))
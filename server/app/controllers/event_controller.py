@@ -0,0 +1,89 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.models.goal import Goal
+from app.models.resource import Resource
+from app.events import get_broker, publish, async_publish
+from typing import Iterable, Optional
+
+class EventController:
+    """Publishes a change event to the owning user's event stream once a write has committed.
+
+    Events carry the ids written plus the current rollups of the goals and resources
+    involved, e.g. {"type": "topic.updated", "ids": [7], "goals": [{"goal_id": 1,
+    "goals_total_points": 40.0, "completed_points_goal": 12.0}], "resources": [...]}, so
+    clients can update progress without refetching. The goals of the given resources are
+    included. Call it with ids captured before the commit (expired attributes would reload);
+    nothing is read when no stream listens.
+    """
+
+    @staticmethod
+    def goals_statement(goal_ids: Iterable[int]):
+        return select(
+            Goal.goal_id, Goal.user_id, Goal.goals_total_points, Goal.completed_points_goal
+        ).where(Goal.goal_id.in_(goal_ids)).order_by(Goal.goal_id)
+
+    @staticmethod
+    def resources_statement(resource_ids: Iterable[int]):
+        return select(
+            Resource.resource_id, Resource.goal_id, Resource.total_topic_points, Resource.completed_points_resources
+        ).where(Resource.resource_id.in_(resource_ids)).order_by(Resource.resource_id)
+
+    @staticmethod
+    def event_goal_ids(goal_ids: Iterable[int], resource_rows) -> set:
+        """The given goals plus the goals of the resources written"""
+        return (set(goal_ids) | {row.goal_id for row in resource_rows}) - {None}
+
+    @staticmethod
+    def build_event(event_type: str, ids: Iterable[int], goal_rows, resource_rows, user_id: Optional[int]):
+        """(user_id, event), or None when the owner is unknown (e.g. the goal is gone)"""
+        goals = []
+        for goal_id, owner_id, goals_total_points, completed_points_goal in goal_rows:
+            user_id = owner_id if user_id is None else user_id
+            goals.append({
+                "goal_id": goal_id,
+                "goals_total_points": goals_total_points or 0,
+                "completed_points_goal": completed_points_goal or 0,
+            })
+        if user_id is None:
+            return None
+        resources = [
+            {
+                "resource_id": resource_id,
+                "goal_id": goal_id,
+                "total_topic_points": total_topic_points or 0,
+                "completed_points_resources": completed_points_resources or 0,
+            }
+            for resource_id, goal_id, total_topic_points, completed_points_resources in resource_rows
+        ]
+        return user_id, {"type": event_type, "ids": sorted(set(ids)), "goals": goals, "resources": resources}
+
+    @staticmethod
+    def publish(db: Session, event_type: str, ids: Iterable[int], goal_ids: Iterable[int] = (),
+                resource_ids: Iterable[int] = (), user_id: Optional[int] = None):
+        if not get_broker().active:
+            return
+        resource_ids = set(resource_ids) - {None}
+        resource_rows = db.execute(EventController.resources_statement(resource_ids)).all() if resource_ids else []
+        goal_ids = EventController.event_goal_ids(goal_ids, resource_rows)
+        goal_rows = db.execute(EventController.goals_statement(goal_ids)).all() if goal_ids else []
+        built = EventController.build_event(event_type, ids, goal_rows, resource_rows, user_id)
+        if built is not None:
+            publish(*built)
+
+
+class AsyncEventController:
+    """AsyncSession counterpart of EventController"""
+
+    @staticmethod
+    async def publish(db: AsyncSession, event_type: str, ids: Iterable[int], goal_ids: Iterable[int] = (),
+                      resource_ids: Iterable[int] = (), user_id: Optional[int] = None):
+        if not get_broker().active:
+            return
+        resource_ids = set(resource_ids) - {None}
+        resource_rows = (await db.execute(EventController.resources_statement(resource_ids))).all() if resource_ids else []
+        goal_ids = EventController.event_goal_ids(goal_ids, resource_rows)
+        goal_rows = (await db.execute(EventController.goals_statement(goal_ids))).all() if goal_ids else []
+        built = EventController.build_event(event_type, ids, goal_rows, resource_rows, user_id)
+        if built is not None:
+            await async_publish(*built)
@@ -0,0 +1,60 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from fastapi import HTTPException
+from app.models.user import User
+from app.models.goal import Goal
+from app.models.resource import Resource
+from app.models.topic import ResourceTopic
+from app.exports import ExportWriter, export_columns
+from app.config import settings
+from typing import AsyncIterator, Iterator
+
+class ExportController:
+    """Full-account export, streamed from a server-side cursor (see app/exports.py)"""
+
+    @staticmethod
+    def user_statement(user_id: int):
+        return select(User.user_id).where(User.user_id == user_id)
+
+    @staticmethod
+    def rows_statement(user_id: int):
+        """Every column of the user's goals, resources and topics, one row per topic, in tree order"""
+        goals, resources, topics = Goal.__table__, Resource.__table__, ResourceTopic.__table__
+        # Core tables rather than the mapped classes: plain rows skip the ORM's per-row loading
+        return select(*export_columns()).select_from(
+            goals.outerjoin(resources, resources.c.goal_id == goals.c.goal_id).outerjoin(
+                topics, topics.c.resource_id == resources.c.resource_id
+            )
+        ).where(goals.c.user_id == user_id).order_by(
+            goals.c.goal_id, resources.c.resource_id, topics.c.topic_id
+        ).execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+
+    @staticmethod
+    def export(db: Session, user_id: int, format: str) -> Iterator[bytes]:
+        # Check before streaming starts: afterwards the status line is already sent
+        if db.scalar(ExportController.user_statement(user_id)) is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        return ExportController._chunks(db, user_id, ExportWriter(format))
+
+    @staticmethod
+    def _chunks(db: Session, user_id: int, writer: ExportWriter) -> Iterator[bytes]:
+        yield writer.header()
+        for rows in db.execute(ExportController.rows_statement(user_id)).partitions():
+            yield writer.encode(rows)
+
+
+class AsyncExportController:
+    """AsyncSession counterpart of ExportController"""
+
+    @staticmethod
+    async def export(db: AsyncSession, user_id: int, format: str) -> AsyncIterator[bytes]:
+        if await db.scalar(ExportController.user_statement(user_id)) is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        return AsyncExportController._chunks(db, user_id, ExportWriter(format))
+
+    @staticmethod
+    async def _chunks(db: AsyncSession, user_id: int, writer: ExportWriter) -> AsyncIterator[bytes]:
+        yield writer.header()
+        async for rows in (await db.stream(ExportController.rows_statement(user_id))).partitions():
+            yield writer.encode(rows)
@@ -1,32 +1,49 @@
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select, func, and_
+from sqlalchemy.orm import Session, joinedload, selectinload, load_only
 from fastapi import HTTPException
 from app.models.goal import Goal
 from app.models.resource import Resource
 from app.models.topic import ResourceTopic
-from app.schemas.goal import GoalCreate, GoalUpdate, GoalDetailResponse, ResourceDetail, TopicDetail
-from typing import List
-from datetime import datetime, date
+from app.schemas.goal import GoalCreate, GoalUpdate, GoalResponse, GoalSummaryResponse, GoalDetailResponse, ResourceDetail, TopicDetail
+from app.controllers.version_controller import VersionController
+from app.controllers.event_controller import EventController
+from app.controllers.sync_controller import SyncController
+from app.cache import read_through, invalidate, invalidate_owner, entity_key
+from app.goal_metrics import compute_metrics
+from app.days import progress_day_bounds, progress_today
+from app.detail_shape import DetailShape, FULL_SHAPE, GOAL_COLUMNS, RESOURCE_COLUMNS, RESOURCE_ROLLUP_COLUMNS, TOPIC_COLUMNS
+from app.pagination import Page, page_size, paginate, build_page
+from typing import Iterable, Iterator, List, Optional, Tuple
+from itertools import groupby
+from datetime import date
 
 class GoalController:
     @staticmethod
     def create_goal(db: Session, goal: GoalCreate):
         db_goal = Goal(**goal.model_dump())
         db.add(db_goal)
+        VersionController.user_changed(db, db_goal.user_id)
         db.commit()
         db.refresh(db_goal)
+        EventController.publish(db, "goal.created", [db_goal.goal_id], goal_ids=[db_goal.goal_id])
         return db_goal
     
     @staticmethod
-    def get_goals_by_user(db: Session, user_id: int):
-        goals = db.query(Goal).filter(Goal.user_id == user_id).all()
-        return goals
+    def get_goals_by_user(db: Session, user_id: int, limit: Optional[int] = None, cursor: Optional[str] = None) -> Page:
+        limit = page_size(limit)
+        statement = paginate(
+            select(Goal).where(Goal.user_id == user_id), Goal.created_at, Goal.goal_id, db.get_bind().dialect.name, limit, cursor
+        )
+        return build_page(db.scalars(statement).all(), limit, "goal_id")
     
     @staticmethod
-    def get_goal(db: Session, goal_id: int):
-        goal = db.query(Goal).filter(Goal.goal_id == goal_id).first()
-        if not goal:
-            raise HTTPException(status_code=404, detail="Goal not found")
-        return goal
+    def get_goal(db: Session, goal_id: int) -> GoalResponse:
+        def load():
+            goal = db.query(Goal).filter(Goal.goal_id == goal_id).first()
+            if not goal:
+                raise HTTPException(status_code=404, detail="Goal not found")
+            return goal
+        return read_through("goal", goal_id, GoalResponse, load, lambda goal: goal.user_id)
     
     @staticmethod
     def update_goal(db: Session, goal_id: int, goal_update: GoalUpdate):
@@ -37,9 +54,12 @@ class GoalController:
         update_data = goal_update.model_dump(exclude_unset=True)
         for key, value in update_data.items():
             setattr(goal, key, value)
+        VersionController.user_changed(db, goal.user_id)
         
         db.commit()
+        invalidate([entity_key("goal", goal_id)])
         db.refresh(goal)
+        EventController.publish(db, "goal.updated", [goal_id], goal_ids=[goal_id])
         return goal
     
     @staticmethod
@@ -48,131 +68,286 @@ class GoalController:
         if not goal:
             raise HTTPException(status_code=404, detail="Goal not found")
         
+        VersionController.user_changed(db, goal.user_id)
+        user_id = goal.user_id
+        SyncController.record_deletion(db, "goal", goal_id, goal_id)
         db.delete(goal)
         db.commit()
+        invalidate_owner(user_id)
+        EventController.publish(db, "goal.deleted", [goal_id], user_id=user_id)
         return {"message": "Goal deleted successfully"}
     
     @staticmethod
-    def get_goals_with_details(db: Session, user_id: int) -> List[GoalDetailResponse]:
+    def get_goals_with_details(db: Session, user_id: int, shape: DetailShape = FULL_SHAPE) -> List[GoalDetailResponse]:
+        if shape.sparse:
+            today = progress_today()
+            rows = db.execute(GoalController.shaped_statement(user_id, shape, today)).all()
+            topics = GoalController._topics_by_resource(
+                db.execute(GoalController.shaped_topics_statement(user_id, shape)) if shape.depth == "full" else ()
+            )
+            return [
+                GoalController._build_shaped_detail(goal, *today_points, shape=shape, today=today, topics=topics)
+                for goal, *today_points in rows
+            ]
+        
         goals = db.query(Goal).filter(Goal.user_id == user_id).options(
             joinedload(Goal.resources).joinedload(Resource.topics)
         ).all()
         
-        result = []
-        today = date.today()
+        today = progress_today()
+        return [
+            GoalController._build_goal_detail(
+                goal, ((resource, resource.topics) for resource in goal.resources), today
+            )
+            for goal in goals
+        ]
+    
+    @staticmethod
+    def shaped_statement(user_id: int, shape: DetailShape, today: date):
+        """Select the user's goals with only the columns and levels `shape` needs
+
+        Rows are (goal,) or, when today's points are needed without topics to derive them
+        from, (goal, today's completed points).
+        """
+        if shape.needs_today and shape.depth != "full":
+            statement = GoalController.summary_statement(user_id, today)
+        else:
+            statement = select(Goal).where(Goal.user_id == user_id)
         
-        for goal in goals:
-            # Calculate all metrics for the goal
-            resources_detail = []
-            goals_total_points = 0
-            completed_points_goal = 0
-            todays_completed_points = 0
-            
-            for resource in goal.resources:
-                topics_detail = []
-                total_topic_points = 0
-                completed_points_resources = 0
-                
-                for topic in resource.topics:
-                    # topic_point_value = resource value per unit * topic point multiplier
-                    topic_point_value = resource.value_per_unit * topic.point_multiplier
-                    total_topic_points += topic_point_value
-                    
-                    if topic.is_completed:
-                        completed_points_resources += topic_point_value
-                    
-                    # Check if topic was completed today
-                    if topic.is_completed and topic.complete_date:
-                        complete_date_only = topic.complete_date.date()
-                        if complete_date_only == today:
-                            todays_completed_points += topic_point_value
-                    
-                    topics_detail.append(TopicDetail(
-                        topic_id=topic.topic_id,
-                        title=topic.title,
-                        point_multiplier=topic.point_multiplier,
-                        is_completed=topic.is_completed,
-                        is_skipped=topic.is_skipped,
-                        topic_point_value=topic_point_value,
-                        complete_date=topic.complete_date,
-                        created_at=topic.created_at
-                    ))
-                
-                goals_total_points += total_topic_points
-                completed_points_goal += completed_points_resources
-                
-                resources_detail.append(ResourceDetail(
-                    resource_id=resource.resource_id,
-                    resource_type=resource.resource_type,
-                    title=resource.title,
-                    value_per_unit=resource.value_per_unit,
-                    total_time_per_unit=str(resource.total_time_per_unit) if resource.total_time_per_unit else None,
-                    resource_link=resource.resource_link,
-                    note=resource.note,
-                    total_topic_points=total_topic_points,
-                    completed_points_resources=completed_points_resources,
-                    topics=topics_detail,
-                    created_at=resource.created_at
-                ))
-            
-            # Calculate increment_goal_value_per_point and current_goal_value
-            if goals_total_points > 0:
-                increment_goal_value_per_point = (goal.target_value - goal.initial_value) / goals_total_points
-                current_goal_value = goal.initial_value + (completed_points_goal * increment_goal_value_per_point)
+        options = [load_only(*(getattr(Goal, column) for column in shape.goal_columns()))]
+        if shape.depth != "goal":
+            options.append(selectinload(Goal.resources).load_only(*(getattr(Resource, column) for column in shape.resource_columns())))
+        return statement.options(*options)
+    
+    @staticmethod
+    def shaped_topics_statement(user_id: int, shape: DetailShape):
+        """Select the needed topic columns of a user's tree as plain rows (no ORM objects: with
+        thousands of topics, building those costs more than the query)"""
+        return select(*(getattr(ResourceTopic, column) for column in sorted(shape.topic_columns()))).join(
+            Resource, ResourceTopic.resource_id == Resource.resource_id
+        ).join(
+            Goal, Resource.goal_id == Goal.goal_id
+        ).where(Goal.user_id == user_id).order_by(ResourceTopic.resource_id, ResourceTopic.topic_id)
+    
+    @staticmethod
+    def _topics_by_resource(rows) -> dict:
+        return {resource_id: list(topics) for resource_id, topics in groupby(rows, key=lambda row: row.resource_id)}
+    
+    @staticmethod
+    def _build_shaped_detail(goal: Goal, todays_completed_points: float = 0, *, shape: DetailShape, today: date, topics: dict) -> GoalDetailResponse:
+        """A partial GoalDetailResponse holding only the fields of `shape` (dump it with exclude_unset);
+        reads only the attributes shaped_statement loaded"""
+        values = {field: getattr(goal, field) for field in (shape.goals & GOAL_COLUMNS) | {"goal_id"}}
+        resources = [
+            (resource, topics.get(resource.resource_id, ())) for resource in goal.resources
+        ] if shape.depth != "goal" else []
+        
+        metrics = compute_metrics(resources, today) if shape.depth == "full" and shape.needs_metrics else None
+        if shape.goal_calculated:
+            if metrics:
+                totals = (metrics.goals_total_points, metrics.completed_points_goal, metrics.todays_completed_points)
             else:
-                increment_goal_value_per_point = 0
-                current_goal_value = goal.initial_value
-            
-            # Calculate daily target metrics
-            from_today_remaining_days = None
-            daily_target_points = None
-            daily_target_value = None
-            
-            if goal.target_date:
-                from_today_remaining_days = (goal.target_date - today).days
-                
-                if from_today_remaining_days > 0:
-                    # Daily target points = goals total points / total days
-                    daily_target_points = goals_total_points / from_today_remaining_days
-                    
-                    # Daily target value = (target value - current goal value) / total days
-                    daily_target_value = (goal.target_value - current_goal_value) / from_today_remaining_days
-            
-            # Calculate today's completed value
-            todays_completed_value = todays_completed_points * increment_goal_value_per_point
-            
-            # Calculate today's completion percentage
-            todays_completion_percentage = None
-            if daily_target_points and daily_target_points > 0:
-                todays_completion_percentage = (todays_completed_points / daily_target_points) * 100
+                totals = (goal.goals_total_points, goal.completed_points_goal, todays_completed_points)
+            calculated = GoalController._calculated_goal_fields(goal, *totals, today)
+            values.update((field, calculated[field]) for field in shape.goals if field in calculated)
+        
+        if shape.depth != "goal":
+            values["resources"] = []
+            for index, (resource, topics) in enumerate(resources):
+                resource_values = {field: getattr(resource, field) for field in (shape.resources & RESOURCE_COLUMNS) | {"resource_id"}}
+                if resource_values.get("total_time_per_unit"):
+                    resource_values["total_time_per_unit"] = str(resource_values["total_time_per_unit"])
+                for field in shape.resources & RESOURCE_ROLLUP_COLUMNS:
+                    resource_values[field] = getattr(resource, field) if metrics is None else (
+                        metrics.resource_totals if field == "total_topic_points" else metrics.resource_completed
+                    )[index]
+                if shape.depth == "full":
+                    resource_values["topics"] = []
+                    for position, topic in enumerate(topics):
+                        topic_values = {field: getattr(topic, field) for field in (shape.topics & TOPIC_COLUMNS) | {"topic_id"}}
+                        if "topic_point_value" in shape.topics:
+                            topic_values["topic_point_value"] = metrics.topic_values[index][position]
+                        resource_values["topics"].append(TopicDetail.model_construct(**topic_values))
+                values["resources"].append(ResourceDetail.model_construct(**resource_values))
+        
+        return GoalDetailResponse.model_construct(**values)
+    
+    @staticmethod
+    def stream_goals_with_details(db: Session, user_id: int, batch_size: int = 500) -> Iterator[GoalDetailResponse]:
+        """Yield one goal detail at a time, reading the tree through a single server-side cursor"""
+        today = progress_today()
+        rows = db.execute(
+            GoalController.tree_rows_statement(user_id).execution_options(yield_per=batch_size)
+        )
+        
+        # Rows arrive ordered by goal, so only one goal's resources/topics are held at a time
+        for goal, goal_rows in groupby(rows, key=lambda row: row[0]):
+            yield GoalController._build_goal_detail(goal, GoalController._group_resources(goal_rows), today)
+    
+    @staticmethod
+    def tree_rows_statement(user_id: int):
+        """Select (goal, resource, topic) rows for a user's whole goal tree, ordered for grouping"""
+        return select(Goal, Resource, ResourceTopic).outerjoin(
+            Resource, Resource.goal_id == Goal.goal_id
+        ).outerjoin(
+            ResourceTopic, ResourceTopic.resource_id == Resource.resource_id
+        ).where(Goal.user_id == user_id).order_by(
+            Goal.goal_id, Resource.resource_id, ResourceTopic.topic_id
+        )
+    
+    @staticmethod
+    def _group_resources(goal_rows) -> List[Tuple[Resource, List[ResourceTopic]]]:
+        """Fold one goal's ordered (goal, resource, topic) rows into (resource, topics) pairs"""
+        resources = []
+        for resource, resource_rows in groupby(goal_rows, key=lambda row: row[1]):
+            if resource is None:
+                continue
+            resources.append((resource, [row[2] for row in resource_rows if row[2] is not None]))
+        return resources
+    
+    @staticmethod
+    def _build_goal_detail(goal: Goal, resources: Iterable[Tuple[Resource, Iterable[ResourceTopic]]], today: date) -> GoalDetailResponse:
+        resources = [(resource, list(topics)) for resource, topics in resources]
+        # Calculate all metrics for the goal
+        metrics = compute_metrics(resources, today)
+        
+        resources_detail = []
+        for (resource, topics), topic_values, total_topic_points, completed_points_resources in zip(
+            resources, metrics.topic_values, metrics.resource_totals, metrics.resource_completed
+        ):
+            topics_detail = [
+                TopicDetail(
+                    topic_id=topic.topic_id,
+                    title=topic.title,
+                    point_multiplier=topic.point_multiplier,
+                    is_completed=topic.is_completed,
+                    is_skipped=topic.is_skipped,
+                    topic_point_value=topic_point_value,
+                    complete_date=topic.complete_date,
+                    created_at=topic.created_at
+                )
+                for topic, topic_point_value in zip(topics, topic_values)
+            ]
             
-            result.append(GoalDetailResponse(
-                goal_id=goal.goal_id,
-                user_id=goal.user_id,
-                title=goal.title,
-                description=goal.description,
-                reward_type=goal.reward_type,
-                target_value=goal.target_value,
-                initial_value=goal.initial_value,
-                domain_name=goal.domain_name,
-                initial_date=goal.initial_date,
-                target_date=goal.target_date,
-                goals_total_points=goals_total_points,
-                increment_goal_value_per_point=increment_goal_value_per_point,
-                completed_points_goal=completed_points_goal,
-                current_goal_value=current_goal_value,
-                # Daily target calculations
-                from_today_remaining_days=from_today_remaining_days,
-                daily_target_points=daily_target_points,
-                daily_target_value=daily_target_value,
-                # Today's progress
-                todays_completed_points=todays_completed_points,
-                todays_completed_value=todays_completed_value,
-                todays_completion_percentage=todays_completion_percentage,
-                resources=resources_detail,
-                created_at=goal.created_at
+            resources_detail.append(ResourceDetail(
+                resource_id=resource.resource_id,
+                resource_type=resource.resource_type,
+                title=resource.title,
+                value_per_unit=resource.value_per_unit,
+                total_time_per_unit=str(resource.total_time_per_unit) if resource.total_time_per_unit else None,
+                resource_link=resource.resource_link,
+                note=resource.note,
+                total_topic_points=total_topic_points,
+                completed_points_resources=completed_points_resources,
+                topics=topics_detail,
+                created_at=resource.created_at
             ))
         
-        return result
+        return GoalDetailResponse(
+            **GoalController._goal_metrics(
+                goal, metrics.goals_total_points, metrics.completed_points_goal, metrics.todays_completed_points, today
+            ),
+            resources=resources_detail
+        )
     
-
+    @staticmethod
+    def get_goals_summary(db: Session, user_id: int) -> List[GoalSummaryResponse]:
+        """Headline metrics per goal from one GROUP BY query, without loading resources or topics"""
+        today = progress_today()
+        rows = db.execute(GoalController.summary_statement(user_id, today)).all()
+        return [
+            GoalSummaryResponse(**GoalController._goal_metrics(
+                goal, goal.goals_total_points, goal.completed_points_goal, todays_points, today
+            ))
+            for goal, todays_points in rows
+        ]
+    
+    @staticmethod
+    def summary_statement(user_id: int, today: date):
+        """Select each goal of a user with the points of the topics completed today"""
+        day_start, day_end = progress_day_bounds(today)
+        
+        # Totals come from the rollup columns; only today's completions are aggregated from topics
+        todays_completed_points = func.coalesce(
+            func.sum(Resource.value_per_unit * ResourceTopic.point_multiplier), 0
+        )
+        return select(Goal, todays_completed_points).outerjoin(
+            Resource, Resource.goal_id == Goal.goal_id
+        ).outerjoin(
+            ResourceTopic,
+            and_(
+                ResourceTopic.resource_id == Resource.resource_id,
+                ResourceTopic.is_completed.is_(True),
+                ResourceTopic.complete_date >= day_start,
+                ResourceTopic.complete_date < day_end
+            )
+        ).where(Goal.user_id == user_id).group_by(Goal.goal_id)
+    
+    @staticmethod
+    def _goal_metrics(goal: Goal, goals_total_points, completed_points_goal, todays_completed_points, today: date) -> dict:
+        """The goal columns plus the calculated goal fields, shared by the summary and detail responses"""
+        return dict(
+            goal_id=goal.goal_id,
+            user_id=goal.user_id,
+            title=goal.title,
+            description=goal.description,
+            reward_type=goal.reward_type,
+            target_value=goal.target_value,
+            initial_value=goal.initial_value,
+            domain_name=goal.domain_name,
+            initial_date=goal.initial_date,
+            target_date=goal.target_date,
+            created_at=goal.created_at,
+            **GoalController._calculated_goal_fields(
+                goal, goals_total_points, completed_points_goal, todays_completed_points, today
+            )
+        )
+    
+    @staticmethod
+    def _calculated_goal_fields(goal: Goal, goals_total_points, completed_points_goal, todays_completed_points, today: date) -> dict:
+        """The calculated goal fields; reads only target_value, initial_value and target_date of the goal"""
+        # Calculate increment_goal_value_per_point and current_goal_value
+        if goals_total_points > 0:
+            increment_goal_value_per_point = (goal.target_value - goal.initial_value) / goals_total_points
+            current_goal_value = goal.initial_value + (completed_points_goal * increment_goal_value_per_point)
+        else:
+            increment_goal_value_per_point = 0
+            current_goal_value = goal.initial_value
+        
+        # Calculate daily target metrics
+        from_today_remaining_days = None
+        daily_target_points = None
+        daily_target_value = None
+        
+        if goal.target_date:
+            from_today_remaining_days = (goal.target_date - today).days
+            
+            if from_today_remaining_days > 0:
+                # Daily target points = goals total points / total days
+                daily_target_points = goals_total_points / from_today_remaining_days
+                
+                # Daily target value = (target value - current goal value) / total days
+                daily_target_value = (goal.target_value - current_goal_value) / from_today_remaining_days
+        
+        # Calculate today's completed value
+        todays_completed_value = todays_completed_points * increment_goal_value_per_point
+        
+        # Calculate today's completion percentage
+        todays_completion_percentage = None
+        if daily_target_points and daily_target_points > 0:
+            todays_completion_percentage = (todays_completed_points / daily_target_points) * 100
+        
+        return dict(
+            goals_total_points=goals_total_points,
+            increment_goal_value_per_point=increment_goal_value_per_point,
+            completed_points_goal=completed_points_goal,
+            current_goal_value=current_goal_value,
+            # Daily target calculations
+            from_today_remaining_days=from_today_remaining_days,
+            daily_target_points=daily_target_points,
+            daily_target_value=daily_target_value,
+            # Today's progress
+            todays_completed_points=todays_completed_points,
+            todays_completed_value=todays_completed_value,
+            todays_completion_percentage=todays_completion_percentage
+        )
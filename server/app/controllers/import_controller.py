@@ -0,0 +1,197 @@
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from fastapi import HTTPException
+from app.models.goal import Goal
+from app.models.resource import Resource
+from app.schemas.imports import ImportRow, ImportRowError, ImportReport, RESOURCE_FIELDS, TOPIC_FIELDS
+from app.controllers.resource_controller import ResourceController
+from app.controllers.topic_controller import TopicController
+from app.controllers.async_topic_controller import AsyncTopicController
+from app.controllers.version_controller import VersionController, AsyncVersionController
+from app.controllers.event_controller import EventController, AsyncEventController
+from app.imports import ImportParser, ParsedRow
+from app.config import settings
+from typing import AsyncIterable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+class ResourceRef(NamedTuple):
+    """The resource columns topic inserts read; kept across batches in place of ORM
+    instances, which every commit would expire and reload one SELECT at a time"""
+    resource_id: int
+    goal_id: int
+    value_per_unit: Optional[int]
+
+# (line number, row) of a row waiting for its batch
+BatchRow = Tuple[int, ImportRow]
+
+class ImportController:
+    """Streaming import of resources and topics into a goal (see app/imports.py).
+
+    Valid rows are written in batches of about BULK_INSERT_CHUNK_SIZE topics, each in its
+    own transaction, through the same multi-row INSERT ... RETURNING as /api/topics/bulk;
+    rejected rows are skipped and reported by line. A batch the database refuses rolls back
+    alone and its rows are reported as rejected; the batches around it are still imported.
+    """
+
+    @staticmethod
+    def resources_statement(goal_id: int):
+        return (
+            select(Resource.title, Resource.resource_id, Resource.goal_id, Resource.value_per_unit)
+            .where(Resource.goal_id == goal_id)
+            .order_by(Resource.resource_id)
+        )
+
+    @staticmethod
+    def by_title(rows: Iterable) -> Dict[str, ResourceRef]:
+        """The goal's resources by title (the oldest one of a repeated title)"""
+        titles: Dict[str, ResourceRef] = {}
+        for row in rows:
+            titles.setdefault(row.title, ResourceRef(row.resource_id, row.goal_id, row.value_per_unit))
+        return titles
+
+    @staticmethod
+    def collect(parsed: List[ParsedRow], report: ImportReport, batch: List[BatchRow]) -> bool:
+        """Move parsed rows into `batch` and rejections into the report; True once the batch is full"""
+        accepted = len(batch)
+        for line, row in parsed:
+            if isinstance(row, str):
+                if len(report.errors) < settings.IMPORT_MAX_ERRORS:
+                    report.errors.append(ImportRowError(line=line, error=row))
+            else:
+                batch.append((line, row))
+        # Once per chunk: assigning a field of a pydantic model is slow enough to show per row
+        report.rows += len(parsed)
+        report.rejected += len(parsed) - (len(batch) - accepted)
+        return len(batch) >= settings.BULK_INSERT_CHUNK_SIZE
+
+    @staticmethod
+    def plan_batch(goal_id: int, resources: Dict[str, ResourceRef], batch: List[BatchRow]) -> Tuple[Dict[str, Resource], Dict[str, List[dict]]]:
+        """The resources a batch creates and its topic rows, both by resource title"""
+        created: Dict[str, Resource] = {}
+        topics: Dict[str, List[dict]] = {}
+        for _, row in batch:
+            if row.resource not in resources and row.resource not in created:
+                values = {field: getattr(row, field) for field in RESOURCE_FIELDS}
+                if values["total_time_per_unit"]:
+                    try:
+                        values["total_time_per_unit"] = ResourceController._parse_time_string(values["total_time_per_unit"])
+                    except ValueError:
+                        values["total_time_per_unit"] = None
+                created[row.resource] = Resource(goal_id=goal_id, title=row.resource, **values)
+            if row.topic is not None:
+                topics.setdefault(row.resource, []).append(
+                    {"title": row.topic, **{field: getattr(row, field) for field in TOPIC_FIELDS}}
+                )
+        return created, topics
+
+    @staticmethod
+    def refs(created: Dict[str, Resource]) -> Dict[str, ResourceRef]:
+        """ResourceRefs of flushed new resources"""
+        return {
+            title: ResourceRef(resource.resource_id, resource.goal_id, resource.value_per_unit)
+            for title, resource in created.items()
+        }
+
+    @staticmethod
+    def reject_batch(report: ImportReport, batch: List[BatchRow], error: SQLAlchemyError):
+        reason = f"Not imported, the database rejected its batch: {getattr(error, 'orig', None) or error}"
+        report.rejected += len(batch)
+        for line, _ in batch[:max(settings.IMPORT_MAX_ERRORS - len(report.errors), 0)]:
+            report.errors.append(ImportRowError(line=line, error=reason))
+
+    @staticmethod
+    def write_batch(db: Session, goal_id: int, resources: Dict[str, ResourceRef], batch: List[BatchRow], report: ImportReport):
+        created, topics = ImportController.plan_batch(goal_id, resources, batch)
+        try:
+            db.add_all(created.values())
+            db.flush()
+            batch_resources = {**resources, **ImportController.refs(created)}
+            topic_ids = []
+            for title, rows in topics.items():
+                topic_ids.extend(topic.topic_id for topic in TopicController._insert_topics(db, batch_resources[title], rows))
+            if created and not topics:
+                VersionController.goals_changed(db, [goal_id])
+            db.commit()
+        except SQLAlchemyError as error:
+            db.rollback()
+            ImportController.reject_batch(report, batch, error)
+            return
+        resources.update(batch_resources)
+        created_ids = [batch_resources[title].resource_id for title in created]
+        resource_ids = [batch_resources[title].resource_id for title in topics]
+
+        report.resources_created += len(created_ids)
+        report.topics_created += len(topic_ids)
+        if created_ids:
+            EventController.publish(db, "resource.created", created_ids, resource_ids=created_ids)
+        if topic_ids:
+            EventController.publish(db, "topic.created", topic_ids, resource_ids=resource_ids)
+
+    @staticmethod
+    def import_rows(db: Session, goal_id: int, chunks: Iterable[bytes], format: str) -> ImportReport:
+        if db.scalar(select(Goal.goal_id).where(Goal.goal_id == goal_id)) is None:
+            raise HTTPException(status_code=404, detail="Goal not found")
+        resources = ImportController.by_title(db.execute(ImportController.resources_statement(goal_id)))
+
+        parser = ImportParser(format)
+        report = ImportReport()
+        batch: List[BatchRow] = []
+        for chunk in chunks:
+            if ImportController.collect(parser.feed(chunk), report, batch):
+                ImportController.write_batch(db, goal_id, resources, batch, report)
+                batch.clear()
+        ImportController.collect(parser.close(), report, batch)
+        if batch:
+            ImportController.write_batch(db, goal_id, resources, batch, report)
+        return report
+
+
+class AsyncImportController:
+    """AsyncSession counterpart of ImportController"""
+
+    @staticmethod
+    async def write_batch(db: AsyncSession, goal_id: int, resources: Dict[str, ResourceRef], batch: List[BatchRow], report: ImportReport):
+        created, topics = ImportController.plan_batch(goal_id, resources, batch)
+        try:
+            db.add_all(created.values())
+            await db.flush()
+            batch_resources = {**resources, **ImportController.refs(created)}
+            topic_ids = []
+            for title, rows in topics.items():
+                topic_ids.extend(topic.topic_id for topic in await AsyncTopicController._insert_topics(db, batch_resources[title], rows))
+            if created and not topics:
+                await AsyncVersionController.goals_changed(db, [goal_id])
+            await db.commit()
+        except SQLAlchemyError as error:
+            await db.rollback()
+            ImportController.reject_batch(report, batch, error)
+            return
+        resources.update(batch_resources)
+        created_ids = [batch_resources[title].resource_id for title in created]
+        resource_ids = [batch_resources[title].resource_id for title in topics]
+
+        report.resources_created += len(created_ids)
+        report.topics_created += len(topic_ids)
+        if created_ids:
+            await AsyncEventController.publish(db, "resource.created", created_ids, resource_ids=created_ids)
+        if topic_ids:
+            await AsyncEventController.publish(db, "topic.created", topic_ids, resource_ids=resource_ids)
+
+    @staticmethod
+    async def import_rows(db: AsyncSession, goal_id: int, chunks: AsyncIterable[bytes], format: str) -> ImportReport:
+        if await db.scalar(select(Goal.goal_id).where(Goal.goal_id == goal_id)) is None:
+            raise HTTPException(status_code=404, detail="Goal not found")
+        resources = ImportController.by_title(await db.execute(ImportController.resources_statement(goal_id)))
+
+        parser = ImportParser(format)
+        report = ImportReport()
+        batch: List[BatchRow] = []
+        async for chunk in chunks:
+            if ImportController.collect(parser.feed(chunk), report, batch):
+                await AsyncImportController.write_batch(db, goal_id, resources, batch, report)
+                batch.clear()
+        ImportController.collect(parser.close(), report, batch)
+        if batch:
+            await AsyncImportController.write_batch(db, goal_id, resources, batch, report)
+        return report
@@ -0,0 +1,283 @@
+from sqlalchemy import select, update, insert, delete, literal, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from fastapi import HTTPException
+from app.models.goal import Goal
+from app.models.resource import Resource
+from app.models.topic import ResourceTopic
+from app.models.daily_progress import DailyProgress
+from app.controllers.rollup_controller import RollupController
+from app.schemas.goal import GoalHistoryResponse, DailyProgressPoint
+from app.days import progress_day, progress_today
+from typing import Dict, Iterable, List, Optional, Tuple
+from datetime import date, timedelta
+
+# (goal_id, day) -> [completed points, completed topics]
+Deltas = Dict[Tuple[int, date], List[float]]
+
+class ProgressController:
+    """Maintains the daily_progress buckets: what each goal gained on each day.
+
+    A topic counts on the day of its complete_date (app.days.progress_day) while it is completed;
+    completed topics without a complete_date have no day and are left out, as in
+    the "today" figures. Like the rollups, every helper only stages statements on
+    the session so buckets commit together with the topic write.
+    """
+
+    HISTORY_DEFAULT_DAYS = 90
+    HISTORY_MAX_DAYS = 3660
+
+    @staticmethod
+    def topic_bucket(resource: Resource, point_multiplier, is_completed, complete_date) -> Optional[Tuple[Tuple[int, date], float]]:
+        """The ((goal_id, day), points) a topic contributes, or None"""
+        day = progress_day(complete_date)
+        if not is_completed or day is None or resource.goal_id is None:
+            return None
+        _, points = RollupController.topic_points(resource.value_per_unit, point_multiplier, True)
+        return (resource.goal_id, day), points
+
+    @staticmethod
+    def topic_snapshot(resource: Resource, topic: ResourceTopic):
+        return ProgressController.topic_bucket(resource, topic.point_multiplier, topic.is_completed, topic.complete_date)
+
+    @staticmethod
+    def add_delta(deltas: Deltas, bucket, sign: int = 1):
+        if bucket is None:
+            return
+        key, points = bucket
+        entry = deltas.setdefault(key, [0.0, 0])
+        entry[0] += sign * points
+        entry[1] += sign
+
+    @staticmethod
+    def changed_deltas(before, after) -> Deltas:
+        deltas: Deltas = {}
+        ProgressController.add_delta(deltas, before, -1)
+        ProgressController.add_delta(deltas, after, 1)
+        return deltas
+
+    @staticmethod
+    def upsert_statements(dialect_name: str, goal_id: int, day: date, points: float, topics: int):
+        """Statements that add (points, topics) to a bucket, creating it if needed.
+
+        The row is inserted with INSERT ... SELECT from goals so user_id comes along
+        without an extra round trip.
+        """
+        source = select(
+            Goal.goal_id, literal(day, DailyProgress.day.type), Goal.user_id, literal(points), literal(topics)
+        ).where(Goal.goal_id == goal_id)
+        columns = ["goal_id", "day", "user_id", "completed_points", "completed_topics"]
+        increments = {
+            "completed_points": DailyProgress.completed_points + points,
+            "completed_topics": DailyProgress.completed_topics + topics,
+        }
+
+        if dialect_name in ("postgresql", "sqlite"):
+            dialect_insert = postgresql.insert if dialect_name == "postgresql" else sqlite.insert
+            return [
+                dialect_insert(DailyProgress).from_select(columns, source).on_conflict_do_update(
+                    index_elements=[DailyProgress.goal_id, DailyProgress.day], set_=increments
+                )
+            ]
+        # Other dialects: update, and insert when no bucket existed (see apply_deltas)
+        return [
+            update(DailyProgress).where(DailyProgress.goal_id == goal_id, DailyProgress.day == day).values(**increments),
+            insert(DailyProgress).from_select(columns, source),
+        ]
+
+    @staticmethod
+    def apply_deltas(db: Session, deltas: Deltas):
+        dialect_name = db.get_bind().dialect.name
+        for (goal_id, day), (points, topics) in deltas.items():
+            if not points and not topics:
+                continue
+            statements = ProgressController.upsert_statements(dialect_name, goal_id, day, points, topics)
+            result = db.execute(statements[0])
+            if len(statements) > 1 and result.rowcount == 0:
+                db.execute(statements[1])
+
+    @staticmethod
+    def topics_added(db: Session, resource: Resource, topics: Iterable[ResourceTopic]):
+        deltas: Deltas = {}
+        for topic in topics:
+            ProgressController.add_delta(deltas, ProgressController.topic_snapshot(resource, topic))
+        ProgressController.apply_deltas(db, deltas)
+
+    @staticmethod
+    def topic_changed(db: Session, before, after):
+        """Move a topic between buckets given its topic_snapshot() before and after a write"""
+        ProgressController.apply_deltas(db, ProgressController.changed_deltas(before, after))
+
+    @staticmethod
+    def topic_removed(db: Session, resource: Resource, topic: ResourceTopic):
+        deltas: Deltas = {}
+        ProgressController.add_delta(deltas, ProgressController.topic_snapshot(resource, topic), -1)
+        ProgressController.apply_deltas(db, deltas)
+
+    @staticmethod
+    def completed_topics_statement(resource_id: int):
+        return select(ResourceTopic.point_multiplier, ResourceTopic.complete_date).where(
+            ResourceTopic.resource_id == resource_id,
+            ResourceTopic.is_completed.is_(True),
+            ResourceTopic.complete_date.is_not(None)
+        )
+
+    @staticmethod
+    def resource_deltas(resource: Resource, rows, old_value_per_unit=None, removed: bool = False) -> Deltas:
+        """Bucket deltas of a resource's completed topics when it is revalued or removed"""
+        deltas: Deltas = {}
+        for point_multiplier, complete_date in rows:
+            if removed:
+                ProgressController.add_delta(deltas, ProgressController.topic_bucket(resource, point_multiplier, True, complete_date), -1)
+                continue
+            old = RollupController.topic_points(old_value_per_unit, point_multiplier, True)[1]
+            new = RollupController.topic_points(resource.value_per_unit, point_multiplier, True)[1]
+            key = (resource.goal_id, progress_day(complete_date))
+            deltas.setdefault(key, [0.0, 0])[0] += new - old
+        return deltas
+
+    @staticmethod
+    def resource_revalued(db: Session, resource: Resource, old_value_per_unit):
+        if resource.goal_id is None:
+            return
+        rows = db.execute(ProgressController.completed_topics_statement(resource.resource_id)).all()
+        ProgressController.apply_deltas(db, ProgressController.resource_deltas(resource, rows, old_value_per_unit))
+
+    @staticmethod
+    def resource_removed(db: Session, resource: Resource):
+        if resource.goal_id is None:
+            return
+        rows = db.execute(ProgressController.completed_topics_statement(resource.resource_id)).all()
+        ProgressController.apply_deltas(db, ProgressController.resource_deltas(resource, rows, removed=True))
+
+    @staticmethod
+    def rebuild(db: Session, user_id: Optional[int] = None) -> dict:
+        """Recreate the buckets (of one user, or all) from the topics table"""
+        query = db.query(
+            Goal.goal_id, Goal.user_id, Resource.value_per_unit, ResourceTopic.point_multiplier, ResourceTopic.complete_date
+        ).join(Resource, Resource.goal_id == Goal.goal_id).join(
+            ResourceTopic, ResourceTopic.resource_id == Resource.resource_id
+        ).filter(ResourceTopic.is_completed.is_(True), ResourceTopic.complete_date.is_not(None))
+        clear = delete(DailyProgress)
+        if user_id is not None:
+            query = query.filter(Goal.user_id == user_id)
+            clear = clear.where(DailyProgress.user_id == user_id)
+
+        buckets = {}
+        for goal_id, owner_id, value_per_unit, point_multiplier, complete_date in query.yield_per(1000):
+            key = (goal_id, progress_day(complete_date))
+            bucket = buckets.setdefault(key, {
+                "goal_id": goal_id, "day": key[1], "user_id": owner_id, "completed_points": 0.0, "completed_topics": 0
+            })
+            bucket["completed_points"] += RollupController.topic_points(value_per_unit, point_multiplier, True)[1]
+            bucket["completed_topics"] += 1
+
+        db.execute(clear)
+        if buckets:
+            db.execute(insert(DailyProgress), list(buckets.values()))
+        db.commit()
+        return {"buckets": len(buckets)}
+
+    @staticmethod
+    def history_range(from_date: Optional[date], to_date: Optional[date]) -> Tuple[date, date]:
+        to_date = to_date or progress_today()
+        from_date = from_date or to_date - timedelta(days=ProgressController.HISTORY_DEFAULT_DAYS - 1)
+        if from_date > to_date:
+            raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+        if (to_date - from_date).days >= ProgressController.HISTORY_MAX_DAYS:
+            raise HTTPException(status_code=400, detail=f"History is limited to {ProgressController.HISTORY_MAX_DAYS} days")
+        return from_date, to_date
+
+    @staticmethod
+    def history_statements(goal_id: int, from_date: date, to_date: date):
+        """(points completed before the range, buckets within it)"""
+        before = select(func.coalesce(func.sum(DailyProgress.completed_points), 0)).where(
+            DailyProgress.goal_id == goal_id, DailyProgress.day < from_date
+        )
+        within = select(DailyProgress.day, DailyProgress.completed_points, DailyProgress.completed_topics).where(
+            DailyProgress.goal_id == goal_id, DailyProgress.day >= from_date, DailyProgress.day <= to_date
+        ).order_by(DailyProgress.day)
+        return before, within
+
+    @staticmethod
+    def build_history(goal_id: int, from_date: date, to_date: date, completed_before: float, rows) -> GoalHistoryResponse:
+        """One point per day of the range (zeros on days without a bucket), with a running total"""
+        by_day = {day: (points, topics) for day, points, topics in rows}
+        cumulative = completed_before
+        days = []
+        for offset in range((to_date - from_date).days + 1):
+            day = from_date + timedelta(days=offset)
+            points, topics = by_day.get(day, (0.0, 0))
+            cumulative += points
+            days.append(DailyProgressPoint(
+                day=day, completed_points=points, completed_topics=topics, cumulative_points=cumulative
+            ))
+        return GoalHistoryResponse(goal_id=goal_id, from_date=from_date, to_date=to_date, days=days)
+
+    @staticmethod
+    def get_goal_history(db: Session, goal_id: int, from_date: Optional[date] = None, to_date: Optional[date] = None) -> GoalHistoryResponse:
+        """Daily completed points of a goal from the pre-aggregated buckets (O(days), not O(topics))"""
+        from_date, to_date = ProgressController.history_range(from_date, to_date)
+        if db.scalar(select(Goal.goal_id).where(Goal.goal_id == goal_id)) is None:
+            raise HTTPException(status_code=404, detail="Goal not found")
+        before, within = ProgressController.history_statements(goal_id, from_date, to_date)
+        return ProgressController.build_history(
+            goal_id, from_date, to_date, db.scalar(before), db.execute(within).all()
+        )
+
+
+class AsyncProgressController:
+    """AsyncSession counterpart of ProgressController, sharing its statements"""
+
+    @staticmethod
+    async def apply_deltas(db: AsyncSession, deltas: Deltas):
+        dialect_name = db.bind.dialect.name
+        for (goal_id, day), (points, topics) in deltas.items():
+            if not points and not topics:
+                continue
+            statements = ProgressController.upsert_statements(dialect_name, goal_id, day, points, topics)
+            result = await db.execute(statements[0])
+            if len(statements) > 1 and result.rowcount == 0:
+                await db.execute(statements[1])
+
+    @staticmethod
+    async def topics_added(db: AsyncSession, resource: Resource, topics: Iterable[ResourceTopic]):
+        deltas: Deltas = {}
+        for topic in topics:
+            ProgressController.add_delta(deltas, ProgressController.topic_snapshot(resource, topic))
+        await AsyncProgressController.apply_deltas(db, deltas)
+
+    @staticmethod
+    async def topic_changed(db: AsyncSession, before, after):
+        await AsyncProgressController.apply_deltas(db, ProgressController.changed_deltas(before, after))
+
+    @staticmethod
+    async def topic_removed(db: AsyncSession, resource: Resource, topic: ResourceTopic):
+        deltas: Deltas = {}
+        ProgressController.add_delta(deltas, ProgressController.topic_snapshot(resource, topic), -1)
+        await AsyncProgressController.apply_deltas(db, deltas)
+
+    @staticmethod
+    async def resource_revalued(db: AsyncSession, resource: Resource, old_value_per_unit):
+        if resource.goal_id is None:
+            return
+        rows = (await db.execute(ProgressController.completed_topics_statement(resource.resource_id))).all()
+        await AsyncProgressController.apply_deltas(db, ProgressController.resource_deltas(resource, rows, old_value_per_unit))
+
+    @staticmethod
+    async def resource_removed(db: AsyncSession, resource: Resource):
+        if resource.goal_id is None:
+            return
+        rows = (await db.execute(ProgressController.completed_topics_statement(resource.resource_id))).all()
+        await AsyncProgressController.apply_deltas(db, ProgressController.resource_deltas(resource, rows, removed=True))
+
+    @staticmethod
+    async def get_goal_history(db: AsyncSession, goal_id: int, from_date: Optional[date] = None, to_date: Optional[date] = None) -> GoalHistoryResponse:
+        from_date, to_date = ProgressController.history_range(from_date, to_date)
+        if await db.scalar(select(Goal.goal_id).where(Goal.goal_id == goal_id)) is None:
+            raise HTTPException(status_code=404, detail="Goal not found")
+        before, within = ProgressController.history_statements(goal_id, from_date, to_date)
+        return ProgressController.build_history(
+            goal_id, from_date, to_date, await db.scalar(before), (await db.execute(within)).all()
+        )
@@ -1,7 +1,17 @@
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from app.models.resource import Resource
-from app.schemas.resource import ResourceCreate, ResourceUpdate
+from app.schemas.resource import ResourceCreate, ResourceUpdate, ResourceResponse
+from app.controllers.rollup_controller import RollupController
+from app.controllers.version_controller import VersionController
+from app.controllers.progress_controller import ProgressController
+from app.controllers.event_controller import EventController
+from app.controllers.sync_controller import SyncController
+from app.controllers.cache_controller import CacheController
+from app.cache import read_through, invalidate, invalidate_owner, entity_key
+from app.pagination import Page, page_size, paginate, build_page
+from typing import Optional
 from datetime import timedelta
 
 class ResourceController:
@@ -20,31 +30,42 @@ class ResourceController:
         
         db_resource = Resource(**resource_data)
         db.add(db_resource)
+        VersionController.goals_changed(db, [db_resource.goal_id])
         db.commit()
         db.refresh(db_resource)
+        EventController.publish(db, "resource.created", [db_resource.resource_id], resource_ids=[db_resource.resource_id])
         # Convert timedelta to string before returning
         if db_resource.total_time_per_unit:
             db_resource.total_time_per_unit = str(db_resource.total_time_per_unit)
         return db_resource
     
     @staticmethod
-    def get_resources_by_goal(db: Session, goal_id: int):
-        resources = db.query(Resource).filter(Resource.goal_id == goal_id).all()
+    def get_resources_by_goal(db: Session, goal_id: int, limit: Optional[int] = None, cursor: Optional[str] = None) -> Page:
+        limit = page_size(limit)
+        statement = paginate(
+            select(Resource).where(Resource.goal_id == goal_id),
+            Resource.created_at, Resource.resource_id, db.get_bind().dialect.name, limit, cursor
+        )
+        page = build_page(db.scalars(statement).all(), limit, "resource_id")
         # Convert timedelta to string for each resource
-        for resource in resources:
+        for resource in page.items:
             if resource.total_time_per_unit:
                 resource.total_time_per_unit = str(resource.total_time_per_unit)
-        return resources
+        return page
     
     @staticmethod
-    def get_resource(db: Session, resource_id: int):
-        resource = db.query(Resource).filter(Resource.resource_id == resource_id).first()
-        if not resource:
-            raise HTTPException(status_code=404, detail="Resource not found")
-        # Convert timedelta to string before returning
-        if resource.total_time_per_unit:
-            resource.total_time_per_unit = str(resource.total_time_per_unit)
-        return resource
+    def get_resource(db: Session, resource_id: int) -> ResourceResponse:
+        def load():
+            resource = db.query(Resource).filter(Resource.resource_id == resource_id).first()
+            if not resource:
+                raise HTTPException(status_code=404, detail="Resource not found")
+            # Convert timedelta to string before returning
+            if resource.total_time_per_unit:
+                resource.total_time_per_unit = str(resource.total_time_per_unit)
+            return resource
+        return read_through(
+            "resource", resource_id, ResourceResponse, load, lambda resource: CacheController.owner(db, "resource", resource_id)
+        )
     
     @staticmethod
     def update_resource(db: Session, resource_id: int, resource_update: ResourceUpdate):
@@ -53,6 +74,7 @@ class ResourceController:
             raise HTTPException(status_code=404, detail="Resource not found")
         
         update_data = resource_update.model_dump(exclude_unset=True)
+        old_value_per_unit = resource.value_per_unit
         
         # Convert time string to timedelta if provided
         if 'total_time_per_unit' in update_data and update_data['total_time_per_unit']:
@@ -66,8 +88,16 @@ class ResourceController:
         for key, value in update_data.items():
             setattr(resource, key, value)
         
+        # Topic point values depend on value_per_unit, so the rollups must follow it
+        if 'value_per_unit' in update_data:
+            RollupController.resource_revalued(db, resource)
+            ProgressController.resource_revalued(db, resource, old_value_per_unit)
+        VersionController.goals_changed(db, [resource.goal_id])
+        
         db.commit()
+        invalidate([entity_key("resource", resource_id)])
         db.refresh(resource)
+        EventController.publish(db, "resource.updated", [resource_id], resource_ids=[resource_id])
         # Convert timedelta to string before returning
         if resource.total_time_per_unit:
             resource.total_time_per_unit = str(resource.total_time_per_unit)
@@ -79,8 +109,16 @@ class ResourceController:
         if not resource:
             raise HTTPException(status_code=404, detail="Resource not found")
         
+        RollupController.resource_removed(db, resource)
+        ProgressController.resource_removed(db, resource)
+        owners = VersionController.goals_changed(db, [resource.goal_id])
+        goal_id = resource.goal_id
+        SyncController.record_deletion(db, "resource", resource_id, goal_id)
         db.delete(resource)
         db.commit()
+        for user_id in owners:
+            invalidate_owner(user_id)
+        EventController.publish(db, "resource.deleted", [resource_id], goal_ids=[goal_id])
         return {"message": "Resource deleted successfully"}
     
     @staticmethod
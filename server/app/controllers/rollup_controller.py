@@ -0,0 +1,233 @@
+from sqlalchemy import select, update, func, case
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.models.goal import Goal
+from app.models.resource import Resource
+from app.models.topic import ResourceTopic
+from app.controllers.version_controller import VersionController
+from typing import Iterable, Optional, Tuple
+import math
+
+class RollupController:
+    """Keeps the point rollup columns on goals and resources in sync with their topics.
+
+    Every helper only stages statements on the given session; the calling controller
+    commits them together with its own write so rollups never lag behind topics.
+    """
+
+    @staticmethod
+    def topic_points(value_per_unit, point_multiplier, is_completed) -> Tuple[float, float]:
+        """Return the (total, completed) points a single topic contributes"""
+        points = (value_per_unit or 0) * (point_multiplier or 0)
+        return points, (points if is_completed else 0)
+
+    @staticmethod
+    def topic_contribution(resource: Resource, topic: ResourceTopic) -> Tuple[float, float]:
+        return RollupController.topic_points(resource.value_per_unit, topic.point_multiplier, topic.is_completed)
+
+    @staticmethod
+    def delta_statements(resource_id: int, goal_id: Optional[int], total_delta: float, completed_delta: float):
+        """Build the UPDATE statements that shift a resource (and its goal) by the given deltas"""
+        statements = [
+            update(Resource)
+            .where(Resource.resource_id == resource_id)
+            .values(
+                total_topic_points=Resource.total_topic_points + total_delta,
+                completed_points_resources=Resource.completed_points_resources + completed_delta
+            )
+        ]
+        if goal_id is not None:
+            statements.append(
+                update(Goal)
+                .where(Goal.goal_id == goal_id)
+                .values(
+                    goals_total_points=Goal.goals_total_points + total_delta,
+                    completed_points_goal=Goal.completed_points_goal + completed_delta
+                )
+            )
+        return statements
+
+    @staticmethod
+    def apply_delta(db: Session, resource: Resource, total_delta: float, completed_delta: float):
+        if not total_delta and not completed_delta:
+            return
+        for statement in RollupController.delta_statements(
+            resource.resource_id, resource.goal_id, total_delta, completed_delta
+        ):
+            db.execute(statement)
+
+    @staticmethod
+    def topics_added(db: Session, resource: Resource, topics: Iterable[ResourceTopic]):
+        total_delta = 0
+        completed_delta = 0
+        for topic in topics:
+            total, completed = RollupController.topic_contribution(resource, topic)
+            total_delta += total
+            completed_delta += completed
+        RollupController.apply_delta(db, resource, total_delta, completed_delta)
+
+    @staticmethod
+    def topic_changed(db: Session, resource: Resource, before: Tuple[float, float], after: Tuple[float, float]):
+        RollupController.apply_delta(db, resource, after[0] - before[0], after[1] - before[1])
+
+    @staticmethod
+    def topic_removed(db: Session, resource: Resource, topic: ResourceTopic):
+        total, completed = RollupController.topic_contribution(resource, topic)
+        RollupController.apply_delta(db, resource, -total, -completed)
+
+    @staticmethod
+    def resource_removed_statement(resource: Resource):
+        """Build the UPDATE that subtracts a resource's rollups from its goal"""
+        return (
+            update(Goal)
+            .where(Goal.goal_id == resource.goal_id)
+            .values(
+                goals_total_points=Goal.goals_total_points - resource.total_topic_points,
+                completed_points_goal=Goal.completed_points_goal - resource.completed_points_resources
+            )
+        )
+
+    @staticmethod
+    def resource_removed(db: Session, resource: Resource):
+        """Subtract a resource's rollups from its goal before the resource is deleted"""
+        if resource.goal_id is None:
+            return
+        db.execute(RollupController.resource_removed_statement(resource))
+
+    @staticmethod
+    def multiplier_sums_statement(resource_id: int):
+        """Build the query for a resource's (total, completed) point multiplier sums"""
+        return select(
+            func.coalesce(func.sum(ResourceTopic.point_multiplier), 0),
+            func.coalesce(func.sum(case((ResourceTopic.is_completed.is_(True), ResourceTopic.point_multiplier), else_=0)), 0)
+        ).where(ResourceTopic.resource_id == resource_id)
+
+    @staticmethod
+    def revalue_deltas(resource: Resource, total_multiplier: float, completed_multiplier: float) -> Tuple[float, float]:
+        value_per_unit = resource.value_per_unit or 0
+        return (
+            value_per_unit * total_multiplier - resource.total_topic_points,
+            value_per_unit * completed_multiplier - resource.completed_points_resources
+        )
+
+    @staticmethod
+    def resource_revalued(db: Session, resource: Resource):
+        """Recompute a resource's rollups after its value_per_unit changed"""
+        sums = db.execute(RollupController.multiplier_sums_statement(resource.resource_id)).one()
+        RollupController.apply_delta(db, resource, *RollupController.revalue_deltas(resource, *sums))
+
+    @staticmethod
+    def recompute(db: Session, user_id: Optional[int] = None) -> dict:
+        """Rebuild every rollup from the topics table and fix the rows that drifted"""
+        point_value = func.coalesce(Resource.value_per_unit, 0) * func.coalesce(ResourceTopic.point_multiplier, 0)
+        resource_query = db.query(
+            Resource.resource_id,
+            Resource.goal_id,
+            Resource.total_topic_points,
+            Resource.completed_points_resources,
+            func.coalesce(func.sum(point_value), 0),
+            func.coalesce(func.sum(case((ResourceTopic.is_completed.is_(True), point_value), else_=0)), 0)
+        ).outerjoin(
+            ResourceTopic, ResourceTopic.resource_id == Resource.resource_id
+        ).group_by(
+            Resource.resource_id, Resource.goal_id, Resource.total_topic_points, Resource.completed_points_resources
+        )
+        goal_query = db.query(Goal.goal_id, Goal.goals_total_points, Goal.completed_points_goal)
+
+        if user_id is not None:
+            resource_query = resource_query.join(Goal, Goal.goal_id == Resource.goal_id).filter(Goal.user_id == user_id)
+            goal_query = goal_query.filter(Goal.user_id == user_id)
+
+        goal_totals = {}
+        changed_goals = set()
+        resource_fixes = []
+        resources_checked = 0
+        for resource_id, goal_id, stored_total, stored_completed, total, completed in resource_query:
+            resources_checked += 1
+            if goal_id is not None:
+                goal_total, goal_completed = goal_totals.get(goal_id, (0, 0))
+                goal_totals[goal_id] = (goal_total + total, goal_completed + completed)
+            if not (RollupController._same(stored_total, total) and RollupController._same(stored_completed, completed)):
+                changed_goals.add(goal_id)
+                resource_fixes.append({
+                    "resource_id": resource_id,
+                    "total_topic_points": total,
+                    "completed_points_resources": completed
+                })
+
+        goal_fixes = []
+        goals_checked = 0
+        for goal_id, stored_total, stored_completed in goal_query:
+            goals_checked += 1
+            total, completed = goal_totals.get(goal_id, (0, 0))
+            if not (RollupController._same(stored_total, total) and RollupController._same(stored_completed, completed)):
+                changed_goals.add(goal_id)
+                goal_fixes.append({
+                    "goal_id": goal_id,
+                    "goals_total_points": total,
+                    "completed_points_goal": completed
+                })
+
+        if resource_fixes:
+            db.execute(update(Resource), resource_fixes)
+        if goal_fixes:
+            db.execute(update(Goal), goal_fixes)
+        # Repaired rollups change what the summary endpoint returns, so their trees' ETags must change
+        changed_goals.discard(None)
+        if changed_goals:
+            VersionController.goals_changed(db, changed_goals)
+        db.commit()
+
+        return {
+            "resources_checked": resources_checked,
+            "resources_fixed": len(resource_fixes),
+            "goals_checked": goals_checked,
+            "goals_fixed": len(goal_fixes)
+        }
+
+    @staticmethod
+    def _same(stored, expected) -> bool:
+        return stored is not None and math.isclose(stored, expected, rel_tol=1e-9, abs_tol=1e-9)
+
+
+class AsyncRollupController:
+    """AsyncSession counterpart of RollupController, sharing its statements"""
+
+    @staticmethod
+    async def apply_delta(db: AsyncSession, resource: Resource, total_delta: float, completed_delta: float):
+        if not total_delta and not completed_delta:
+            return
+        for statement in RollupController.delta_statements(
+            resource.resource_id, resource.goal_id, total_delta, completed_delta
+        ):
+            await db.execute(statement)
+
+    @staticmethod
+    async def topics_added(db: AsyncSession, resource: Resource, topics: Iterable[ResourceTopic]):
+        total_delta = 0
+        completed_delta = 0
+        for topic in topics:
+            total, completed = RollupController.topic_contribution(resource, topic)
+            total_delta += total
+            completed_delta += completed
+        await AsyncRollupController.apply_delta(db, resource, total_delta, completed_delta)
+
+    @staticmethod
+    async def topic_changed(db: AsyncSession, resource: Resource, before: Tuple[float, float], after: Tuple[float, float]):
+        await AsyncRollupController.apply_delta(db, resource, after[0] - before[0], after[1] - before[1])
+
+    @staticmethod
+    async def topic_removed(db: AsyncSession, resource: Resource, topic: ResourceTopic):
+        total, completed = RollupController.topic_contribution(resource, topic)
+        await AsyncRollupController.apply_delta(db, resource, -total, -completed)
+
+    @staticmethod
+    async def resource_removed(db: AsyncSession, resource: Resource):
+        if resource.goal_id is None:
+            return
+        await db.execute(RollupController.resource_removed_statement(resource))
+
+    @staticmethod
+    async def resource_revalued(db: AsyncSession, resource: Resource):
+        sums = (await db.execute(RollupController.multiplier_sums_statement(resource.resource_id))).one()
+        await AsyncRollupController.apply_delta(db, resource, *RollupController.revalue_deltas(resource, *sums))
@@ -0,0 +1,161 @@
+from sqlalchemy import select, insert, literal, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from fastapi import HTTPException
+from app.models.user import User
+from app.models.goal import Goal
+from app.models.resource import Resource
+from app.models.topic import ResourceTopic
+from app.models.tombstone import Tombstone
+from app.schemas.sync import SyncResponse
+from app.config import settings
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+class SyncController:
+    """Delta sync of a user's goal tree.
+
+    GET /api/sync/{user_id} returns the whole tree and a cursor; passing the cursor back
+    as ?since= returns only the goals, resources and topics created or changed since then
+    (rows with updated_at after the cursor, via the (parent, updated_at) indexes) and the
+    deletions recorded as tombstones. Rollup changes bump updated_at too, so a changed
+    topic also brings its resource and goal. The window starts SYNC_CURSOR_OVERLAP seconds
+    before the cursor, so rows may repeat and clients must apply results idempotently.
+    """
+
+    @staticmethod
+    def parse_cursor(since: str) -> datetime:
+        try:
+            cursor = datetime.fromisoformat(since.replace("Z", "+00:00"))
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid sync cursor")
+        if cursor.tzinfo is None:
+            cursor = cursor.replace(tzinfo=timezone.utc)
+        return cursor.astimezone(timezone.utc)
+
+    @staticmethod
+    def format_cursor(moment: datetime) -> str:
+        # SQLite hands back naive UTC timestamps
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        return moment.astimezone(timezone.utc).replace(tzinfo=None).isoformat() + "Z"
+
+    @staticmethod
+    def window_start(since: str, now: datetime) -> datetime:
+        """Lower bound of updated_at/deleted_at for a sync from `since`; 410 once tombstones may be pruned"""
+        cursor = SyncController.parse_cursor(since)
+        if now.tzinfo is None:
+            now = now.replace(tzinfo=timezone.utc)
+        if cursor < now - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS):
+            raise HTTPException(status_code=410, detail="Sync cursor expired, sync again without 'since'")
+        return cursor - timedelta(seconds=settings.SYNC_CURSOR_OVERLAP)
+
+    @staticmethod
+    def tombstone_statement(entity_type: str, entity_id: int, goal_id: int):
+        """INSERT of a tombstone owned by the user of `goal_id`; run it before the delete"""
+        return insert(Tombstone).from_select(
+            ["user_id", "entity_type", "entity_id"],
+            select(Goal.user_id, literal(entity_type), literal(entity_id)).where(Goal.goal_id == goal_id),
+        )
+
+    @staticmethod
+    def prune_statement(now: datetime):
+        return Tombstone.__table__.delete().where(
+            Tombstone.deleted_at < now - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+        )
+
+    @staticmethod
+    def change_statements(user_id: int, start: Optional[datetime]):
+        """(goals, resources, topics, tombstones) changed at or after `start` (everything when None)"""
+        goals = select(Goal).where(Goal.user_id == user_id)
+        resources = select(Resource).join(Goal, Resource.goal_id == Goal.goal_id).where(Goal.user_id == user_id)
+        topics = (
+            select(ResourceTopic)
+            .join(Resource, ResourceTopic.resource_id == Resource.resource_id)
+            .join(Goal, Resource.goal_id == Goal.goal_id)
+            .where(Goal.user_id == user_id)
+        )
+        tombstones = select(Tombstone).where(Tombstone.user_id == user_id)
+        if start is None:
+            tombstones = None
+        else:
+            goals = goals.where(Goal.updated_at >= start)
+            resources = resources.where(Resource.updated_at >= start)
+            topics = topics.where(ResourceTopic.updated_at >= start)
+            tombstones = tombstones.where(Tombstone.deleted_at >= start).order_by(Tombstone.deleted_at, Tombstone.tombstone_id)
+        return (
+            goals.order_by(Goal.goal_id),
+            resources.order_by(Resource.resource_id),
+            topics.order_by(ResourceTopic.topic_id),
+            tombstones,
+        )
+
+    @staticmethod
+    def cursor_statement(user_id: int):
+        """The database clock (the next cursor) if the user exists"""
+        return select(func.now()).where(select(User.user_id).where(User.user_id == user_id).exists())
+
+    @staticmethod
+    def build_response(now: datetime, full: bool, goals, resources, topics, tombstones) -> SyncResponse:
+        return SyncResponse(
+            cursor=SyncController.format_cursor(now),
+            full=full,
+            goals=goals,
+            resources=resources,
+            topics=topics,
+            deleted=tombstones,
+        )
+
+    @staticmethod
+    def record_deletion(db: Session, entity_type: str, entity_id: int, goal_id: int):
+        db.execute(SyncController.tombstone_statement(entity_type, entity_id, goal_id))
+
+    @staticmethod
+    def prune_tombstones(db: Session) -> int:
+        now = datetime.now(timezone.utc)
+        deleted = db.execute(SyncController.prune_statement(now)).rowcount
+        db.commit()
+        return deleted
+
+    @staticmethod
+    def get_changes(db: Session, user_id: int, since: Optional[str]) -> SyncResponse:
+        # Take the cursor before reading, so a write landing meanwhile is sent again next time
+        now = db.scalar(SyncController.cursor_statement(user_id))
+        if now is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        start = SyncController.window_start(since, now) if since else None
+
+        goals, resources, topics, tombstones = SyncController.change_statements(user_id, start)
+        return SyncController.build_response(
+            now,
+            start is None,
+            db.scalars(goals).all(),
+            db.scalars(resources).all(),
+            db.scalars(topics).all(),
+            db.scalars(tombstones).all() if tombstones is not None else [],
+        )
+
+
+class AsyncSyncController:
+    """AsyncSession counterpart of SyncController, sharing its statements"""
+
+    @staticmethod
+    async def record_deletion(db: AsyncSession, entity_type: str, entity_id: int, goal_id: int):
+        await db.execute(SyncController.tombstone_statement(entity_type, entity_id, goal_id))
+
+    @staticmethod
+    async def get_changes(db: AsyncSession, user_id: int, since: Optional[str]) -> SyncResponse:
+        now = await db.scalar(SyncController.cursor_statement(user_id))
+        if now is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        start = SyncController.window_start(since, now) if since else None
+
+        goals, resources, topics, tombstones = SyncController.change_statements(user_id, start)
+        return SyncController.build_response(
+            now,
+            start is None,
+            (await db.scalars(goals)).all(),
+            (await db.scalars(resources)).all(),
+            (await db.scalars(topics)).all(),
+            (await db.scalars(tombstones)).all() if tombstones is not None else [],
+        )
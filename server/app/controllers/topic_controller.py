@@ -1,61 +1,134 @@
+from sqlalchemy import Row, select, insert, update, case
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from app.models.topic import ResourceTopic
-from app.schemas.topic import TopicCreate, TopicUpdate, BulkTopicCreate, TopicStatusUpdate
-from typing import List
-from datetime import datetime
+from app.models.resource import Resource
+from app.controllers.rollup_controller import RollupController
+from app.controllers.version_controller import VersionController
+from app.controllers.progress_controller import ProgressController
+from app.controllers.event_controller import EventController
+from app.controllers.sync_controller import SyncController
+from app.controllers.cache_controller import CacheController
+from app.days import progress_now
+from app.cache import read_through, invalidate, entity_key
+from app.schemas.topic import TopicCreate, TopicUpdate, BulkTopicCreate, TopicStatusUpdate, TopicStatusBatchItem, TopicResponse
+from app.config import settings
+from app.pagination import Page, page_size, paginate, build_page
+from typing import List, Optional
+
+TOPIC_DEFAULTS = {
+    column.key: column.default.arg for column in ResourceTopic.__table__.columns
+    if column.default is not None and column.default.is_scalar
+}
 
 class TopicController:
     @staticmethod
     def create_topic(db: Session, topic: TopicCreate):
+        resource = TopicController._get_resource(db, topic.resource_id)
         db_topic = ResourceTopic(**topic.model_dump())
         db.add(db_topic)
+        RollupController.topics_added(db, resource, [db_topic])
+        ProgressController.topics_added(db, resource, [db_topic])
+        VersionController.goals_changed(db, [resource.goal_id])
         db.commit()
         db.refresh(db_topic)
+        EventController.publish(db, "topic.created", [db_topic.topic_id], resource_ids=[db_topic.resource_id])
         return db_topic
     
     @staticmethod
-    def bulk_create_topics(db: Session, bulk_data: BulkTopicCreate):
+    def bulk_create_topics(db: Session, bulk_data: BulkTopicCreate) -> List[TopicResponse]:
         """Create multiple topics for a resource in one call"""
-        db_topics = []
-        for topic_data in bulk_data.topics:
-            db_topic = ResourceTopic(
-                resource_id=bulk_data.resource_id,
-                **topic_data.model_dump()
-            )
-            db.add(db_topic)
-            db_topics.append(db_topic)
+        resource = TopicController._get_resource(db, bulk_data.resource_id)
+        topics = TopicController._insert_topics(
+            db, resource, [topic_data.model_dump() for topic_data in bulk_data.topics]
+        )
         
+        # Build the response from the RETURNING rows now; after commit the objects
+        # would be expired and reloaded one SELECT at a time
+        response = [TopicResponse.model_validate(topic) for topic in topics]
         db.commit()
-        for topic in db_topics:
-            db.refresh(topic)
-        
-        return db_topics
+        EventController.publish(db, "topic.created", [topic.topic_id for topic in response], resource_ids=[bulk_data.resource_id])
+        return response
     
     @staticmethod
-    def get_topics_by_resource(db: Session, resource_id: int):
-        topics = db.query(ResourceTopic).filter(ResourceTopic.resource_id == resource_id).all()
+    def _insert_topics(db: Session, resource: Resource, rows: List[dict]) -> List[Row]:
+        """Insert topic rows for a resource with one multi-row INSERT ... RETURNING per chunk;
+        returns the inserted rows (all ResourceTopic columns), not ORM objects"""
+        topics = []
+        chunk_size = settings.BULK_INSERT_CHUNK_SIZE
+        for start in range(0, len(rows), chunk_size):
+            chunk = TopicController._insert_values(resource, rows[start:start + chunk_size])
+            # sort_by_parameter_order would make some dialects (SQLite) fall back to one
+            # INSERT per row; ids are assigned in VALUES order, so sort by id instead
+            inserted = db.execute(TopicController.insert_statement(), chunk).all()
+            topics.extend(sorted(inserted, key=lambda topic: topic.topic_id))
+        
+        RollupController.topics_added(db, resource, topics)
+        ProgressController.topics_added(db, resource, topics)
+        VersionController.goals_changed(db, [resource.goal_id])
         return topics
     
     @staticmethod
-    def get_topic(db: Session, topic_id: int):
-        topic = db.query(ResourceTopic).filter(ResourceTopic.topic_id == topic_id).first()
+    def insert_statement():
+        # A Core INSERT: the ORM bulk path builds an object per RETURNING row, and starts a
+        # new INSERT whenever the set of None values changes from one row to the next
+        return insert(ResourceTopic.__table__).returning(*ResourceTopic.__table__.columns)
+    
+    @staticmethod
+    def _insert_values(resource: Resource, rows: List[dict]) -> List[dict]:
+        """Parameters for insert_statement(), with None replaced by the column defaults as the ORM would"""
+        return [
+            {**row, **{key: default for key, default in TOPIC_DEFAULTS.items() if row.get(key) is None}, "resource_id": resource.resource_id}
+            for row in rows
+        ]
+    
+    @staticmethod
+    def get_topics_by_resource(db: Session, resource_id: int, limit: Optional[int] = None, cursor: Optional[str] = None) -> Page:
+        limit = page_size(limit)
+        statement = paginate(
+            select(ResourceTopic).where(ResourceTopic.resource_id == resource_id),
+            ResourceTopic.created_at, ResourceTopic.topic_id, db.get_bind().dialect.name, limit, cursor
+        )
+        return build_page(db.scalars(statement).all(), limit, "topic_id")
+    
+    @staticmethod
+    def get_topic(db: Session, topic_id: int) -> TopicResponse:
+        def load():
+            topic = db.query(ResourceTopic).filter(ResourceTopic.topic_id == topic_id).first()
+            if not topic:
+                raise HTTPException(status_code=404, detail="Topic not found")
+            return topic
+        return read_through("topic", topic_id, TopicResponse, load, lambda topic: CacheController.owner(db, "topic", topic_id))
+    
+    @staticmethod
+    def locked_statement(topic_id: int):
+        """SELECT a topic FOR UPDATE: writes derive rollup and progress deltas from the state it
+        returns, so concurrent writes to one topic must take turns"""
+        return (
+            select(ResourceTopic)
+            .where(ResourceTopic.topic_id == topic_id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+    
+    @staticmethod
+    def _get_locked(db: Session, topic_id: int) -> ResourceTopic:
+        topic = db.scalar(TopicController.locked_statement(topic_id))
         if not topic:
             raise HTTPException(status_code=404, detail="Topic not found")
         return topic
     
     @staticmethod
     def update_topic(db: Session, topic_id: int, topic_update: TopicUpdate):
-        topic = db.query(ResourceTopic).filter(ResourceTopic.topic_id == topic_id).first()
-        if not topic:
-            raise HTTPException(status_code=404, detail="Topic not found")
-        
+        topic = TopicController._get_locked(db, topic_id)
+        before = RollupController.topic_contribution(topic.resource, topic)
+        bucket_before = ProgressController.topic_snapshot(topic.resource, topic)
         update_data = topic_update.model_dump(exclude_unset=True)
         
         # If is_completed is being set to True, automatically set complete_date
         if "is_completed" in update_data and update_data["is_completed"] == True:
             if not topic.is_completed:  # Only set if it wasn't already completed
-                update_data["complete_date"] = datetime.now()
+                update_data["complete_date"] = progress_now()
         # If is_completed is being set to False, clear complete_date
         elif "is_completed" in update_data and update_data["is_completed"] == False:
             update_data["complete_date"] = None
@@ -63,23 +136,27 @@ class TopicController:
         for key, value in update_data.items():
             setattr(topic, key, value)
         
+        RollupController.topic_changed(db, topic.resource, before, RollupController.topic_contribution(topic.resource, topic))
+        ProgressController.topic_changed(db, bucket_before, ProgressController.topic_snapshot(topic.resource, topic))
+        VersionController.goals_changed(db, [topic.resource.goal_id])
         db.commit()
+        invalidate([entity_key("topic", topic_id)])
         db.refresh(topic)
+        EventController.publish(db, "topic.updated", [topic_id], resource_ids=[topic.resource_id])
         return topic
     
     @staticmethod
     def update_topic_status(db: Session, topic_id: int, status_update: TopicStatusUpdate):
         """Update topic's completion and skipped status"""
-        topic = db.query(ResourceTopic).filter(ResourceTopic.topic_id == topic_id).first()
-        if not topic:
-            raise HTTPException(status_code=404, detail="Topic not found")
-        
+        topic = TopicController._get_locked(db, topic_id)
+        before = RollupController.topic_contribution(topic.resource, topic)
+        bucket_before = ProgressController.topic_snapshot(topic.resource, topic)
         update_data = status_update.model_dump(exclude_unset=True)
         
         # If is_completed is being set to True, automatically set complete_date
         if "is_completed" in update_data and update_data["is_completed"] == True:
             if not topic.is_completed:  # Only set if it wasn't already completed
-                update_data["complete_date"] = datetime.now()
+                update_data["complete_date"] = progress_now()
         # If is_completed is being set to False, clear complete_date
         elif "is_completed" in update_data and update_data["is_completed"] == False:
             update_data["complete_date"] = None
@@ -87,16 +164,119 @@ class TopicController:
         for key, value in update_data.items():
             setattr(topic, key, value)
         
+        RollupController.topic_changed(db, topic.resource, before, RollupController.topic_contribution(topic.resource, topic))
+        ProgressController.topic_changed(db, bucket_before, ProgressController.topic_snapshot(topic.resource, topic))
+        VersionController.goals_changed(db, [topic.resource.goal_id])
         db.commit()
+        invalidate([entity_key("topic", topic_id)])
         db.refresh(topic)
+        EventController.publish(db, "topic.updated", [topic_id], resource_ids=[topic.resource_id])
         return topic
     
     @staticmethod
-    def delete_topic(db: Session, topic_id: int):
-        topic = db.query(ResourceTopic).filter(ResourceTopic.topic_id == topic_id).first()
-        if not topic:
-            raise HTTPException(status_code=404, detail="Topic not found")
+    def batch_state_statement(topic_ids: List[int]):
+        """SELECT the state batch deltas are computed from, locking the topics FOR UPDATE in id
+        order so overlapping batches take turns instead of deadlocking or double-counting"""
+        return (
+            select(
+                ResourceTopic.topic_id, ResourceTopic.point_multiplier, ResourceTopic.is_completed,
+                ResourceTopic.complete_date, Resource
+            )
+            .join(Resource, Resource.resource_id == ResourceTopic.resource_id)
+            .where(ResourceTopic.topic_id.in_(topic_ids))
+            .order_by(ResourceTopic.topic_id)
+            .with_for_update(of=ResourceTopic)
+        )
+    
+    @staticmethod
+    def batch_update_topic_status(db: Session, updates: List[TopicStatusBatchItem]):
+        """Update the completion/skipped status of many topics in one transaction"""
+        # Later entries for the same topic win, as if the updates were sent one by one
+        changes = {}
+        for item in updates:
+            changes.setdefault(item.topic_id, {}).update(item.model_dump(exclude_unset=True, exclude={"topic_id"}))
+        if not changes:
+            return []
+        
+        topic_ids = list(changes)
+        current = db.execute(TopicController.batch_state_statement(topic_ids)).all()
+        
+        missing = set(topic_ids) - {row.topic_id for row in current}
+        if missing:
+            raise HTTPException(status_code=404, detail=f"Topics not found: {sorted(missing)}")
+        
+        # Only completion flips move points; they all land on the resource's completed rollup
+        # and on the daily bucket of the completion (today's for new ones)
+        now = progress_now()
+        completed_deltas = {}
+        bucket_deltas = {}
+        for topic_id, point_multiplier, was_completed, complete_date, resource in current:
+            is_completed = changes[topic_id].get("is_completed")
+            if is_completed is None or bool(is_completed) == bool(was_completed):
+                continue
+            _, points = RollupController.topic_points(resource.value_per_unit, point_multiplier, True)
+            resource_delta = completed_deltas.setdefault(resource.resource_id, [resource, 0])
+            resource_delta[1] += points if is_completed else -points
+            if is_completed:
+                ProgressController.add_delta(bucket_deltas, ProgressController.topic_bucket(resource, point_multiplier, True, now))
+            else:
+                ProgressController.add_delta(bucket_deltas, ProgressController.topic_bucket(resource, point_multiplier, True, complete_date), -1)
+        
+        def ids_where(field, value):
+            return [topic_id for topic_id, data in changes.items() if data.get(field) is value]
         
+        statements = [
+            # complete_date is only stamped on a false -> true transition
+            (ids_where("is_completed", True), {
+                "is_completed": True,
+                "complete_date": case(
+                    (ResourceTopic.is_completed.is_(True), ResourceTopic.complete_date), else_=now
+                )
+            }),
+            (ids_where("is_completed", False), {"is_completed": False, "complete_date": None}),
+            (ids_where("is_skipped", True), {"is_skipped": True}),
+            (ids_where("is_skipped", False), {"is_skipped": False}),
+        ]
+        for ids, values in statements:
+            if ids:
+                db.execute(
+                    update(ResourceTopic)
+                    .where(ResourceTopic.topic_id.in_(ids))
+                    .values(**values)
+                    .execution_options(synchronize_session=False)
+                )
+        
+        for resource, completed_delta in completed_deltas.values():
+            RollupController.apply_delta(db, resource, 0, completed_delta)
+        ProgressController.apply_deltas(db, bucket_deltas)
+        VersionController.goals_changed(db, {resource.goal_id for *_, resource in current})
+        resource_ids = {resource.resource_id for *_, resource in current}
+        
+        db.commit()
+        invalidate(entity_key("topic", topic_id) for topic_id in topic_ids)
+        EventController.publish(db, "topic.updated", topic_ids, resource_ids=resource_ids)
+        
+        topics = db.query(ResourceTopic).filter(ResourceTopic.topic_id.in_(topic_ids)).all()
+        topics_by_id = {topic.topic_id: topic for topic in topics}
+        return [topics_by_id[topic_id] for topic_id in topic_ids]
+    
+    @staticmethod
+    def delete_topic(db: Session, topic_id: int):
+        topic = TopicController._get_locked(db, topic_id)
+        RollupController.topic_removed(db, topic.resource, topic)
+        ProgressController.topic_removed(db, topic.resource, topic)
+        VersionController.goals_changed(db, [topic.resource.goal_id])
+        resource_id = topic.resource_id
+        SyncController.record_deletion(db, "topic", topic_id, topic.resource.goal_id)
         db.delete(topic)
         db.commit()
+        invalidate([entity_key("topic", topic_id)])
+        EventController.publish(db, "topic.deleted", [topic_id], resource_ids=[resource_id])
         return {"message": "Topic deleted successfully"}
+    
+    @staticmethod
+    def _get_resource(db: Session, resource_id: int) -> Resource:
+        resource = db.query(Resource).filter(Resource.resource_id == resource_id).first()
+        if not resource:
+            raise HTTPException(status_code=404, detail="Resource not found")
+        return resource
@@ -1,7 +1,10 @@
 from sqlalchemy.orm import Session
 from fastapi import HTTPException
 from app.models.user import User
-from app.schemas.user import UserCreate, UserUpdate, UserLogin, ChangePassword
+from app.schemas.user import UserCreate, UserUpdate, UserLogin, ChangePassword, UserResponse
+from app.controllers.version_controller import VersionController
+from app.cache import read_through, invalidate, invalidate_owner, entity_key
+from app.replicas import writers
 
 class UserController:
     @staticmethod
@@ -29,11 +32,13 @@ class UserController:
         return user
     
     @staticmethod
-    def get_user(db: Session, user_id: int):
-        user = db.query(User).filter(User.user_id == user_id).first()
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-        return user
+    def get_user(db: Session, user_id: int) -> UserResponse:
+        def load():
+            user = db.query(User).filter(User.user_id == user_id).first()
+            if not user:
+                raise HTTPException(status_code=404, detail="User not found")
+            return user
+        return read_through("user", user_id, UserResponse, load, lambda user: user.user_id)
     
     @staticmethod
     def update_user(db: Session, user_id: int, user_update: UserUpdate):
@@ -51,8 +56,11 @@ class UserController:
         
         for key, value in update_data.items():
             setattr(user, key, value)
+        # Also marks the change for replica routing (app/replicas.py)
+        VersionController.user_changed(db, user_id)
         
         db.commit()
+        invalidate([entity_key("user", user_id)])
         db.refresh(user)
         return user
     
@@ -78,4 +86,6 @@ class UserController:
         
         db.delete(user)
         db.commit()
+        invalidate_owner(user_id)
+        writers([user_id])
         return {"message": "User deleted successfully"}
@@ -0,0 +1,90 @@
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.models.user import User
+from app.models.goal import Goal
+from app.models.resource import Resource
+from app.replicas import writers, async_writers
+from typing import Iterable, List, Optional
+
+class VersionController:
+    """Maintains users.data_version, the version token of a user's goal tree.
+
+    Every goal/resource/topic write (and profile update) stages a bump of the owning
+    user's version in its own transaction, so a changed token always means the tree may
+    have changed: conditional GETs compare tokens instead of loading the tree, and read
+    replica routing compares them to tell whether the replica has caught up. Each bump
+    also marks its users as recent writers (app.replicas.writers).
+    """
+
+    @staticmethod
+    def bump_statement(user_ids):
+        """Build the UPDATE that bumps the version of `user_ids` (ids or a SELECT of user ids)"""
+        return (
+            update(User)
+            .where(User.user_id.in_(user_ids))
+            .values(data_version=User.data_version + 1)
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    def users_of_goals(goal_ids: Iterable[int]):
+        return select(Goal.user_id).where(Goal.goal_id.in_(list(goal_ids)))
+
+    @staticmethod
+    def users_of_resources(resource_ids: Iterable[int]):
+        return (
+            select(Goal.user_id)
+            .join(Resource, Resource.goal_id == Goal.goal_id)
+            .where(Resource.resource_id.in_(list(resource_ids)))
+        )
+
+    @staticmethod
+    def version_statement(user_id: int):
+        return select(User.data_version).where(User.user_id == user_id)
+
+    @staticmethod
+    def user_changed(db: Session, user_id: int):
+        db.execute(VersionController.bump_statement([user_id]))
+        writers([user_id])
+
+    @staticmethod
+    def goals_changed(db: Session, goal_ids: Iterable[int]) -> List[int]:
+        """Bump the owners of `goal_ids`, returning their ids"""
+        user_ids = db.scalars(VersionController.bump_statement(VersionController.users_of_goals(goal_ids)).returning(User.user_id)).all()
+        writers(user_ids)
+        return user_ids
+
+    @staticmethod
+    def resources_changed(db: Session, resource_ids: Iterable[int]):
+        writers(db.scalars(VersionController.bump_statement(VersionController.users_of_resources(resource_ids)).returning(User.user_id)).all())
+
+    @staticmethod
+    def user_version(db: Session, user_id: int) -> Optional[int]:
+        """The user's current tree version, or None if the user does not exist"""
+        return db.scalar(VersionController.version_statement(user_id))
+
+
+class AsyncVersionController:
+    """AsyncSession counterpart of VersionController, sharing its statements"""
+
+    @staticmethod
+    async def user_changed(db: AsyncSession, user_id: int):
+        await db.execute(VersionController.bump_statement([user_id]))
+        await async_writers([user_id])
+
+    @staticmethod
+    async def goals_changed(db: AsyncSession, goal_ids: Iterable[int]) -> List[int]:
+        user_ids = (await db.scalars(VersionController.bump_statement(VersionController.users_of_goals(goal_ids)).returning(User.user_id))).all()
+        await async_writers(user_ids)
+        return user_ids
+
+    @staticmethod
+    async def resources_changed(db: AsyncSession, resource_ids: Iterable[int]):
+        await async_writers((await db.scalars(
+            VersionController.bump_statement(VersionController.users_of_resources(resource_ids)).returning(User.user_id)
+        )).all())
+
+    @staticmethod
+    async def user_version(db: AsyncSession, user_id: int) -> Optional[int]:
+        return await db.scalar(VersionController.version_statement(user_id))
@@ -1,16 +1,292 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, exc, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.pool import NullPool, QueuePool, AsyncAdaptedQueuePool
+from sqlalchemy.sql.dml import UpdateBase
+from fastapi import Request
 from app.config import settings
+from app import cold_start
+from app.replicas import reads_from_replica, async_reads_from_replica
+from app.request_metrics import install_engine_hooks
+import os
+import threading
+import time
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Engines are built on first use rather than at import, so importing the app
+# (e.g. on a serverless cold start) never opens a connection pool
+_engine = None
+_replica_engine = None
+_engine_lock = threading.Lock()
+async_engine = None
+async_replica_engine = None
 
 Base = declarative_base()
 
-def get_db():
-    db = SessionLocal()
+class EngineSession(Session):
+    """Session that resolves the (lazily created) engines when it first needs a connection.
+
+    A session opened with replica=True reads from the replica engine; its flushes and
+    INSERT/UPDATE/DELETE statements still go to the primary"""
+    def __init__(self, *args, replica: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replica = replica
+
+    def get_bind(self, mapper=None, *, clause=None, **kwargs):
+        if self.replica and not self._flushing and not isinstance(clause, UpdateBase):
+            return self.replica_engine()
+        return self.primary_engine()
+
+    def primary_engine(self):
+        return get_engine()
+
+    def replica_engine(self):
+        return get_replica_engine()
+
+class AsyncEngineSession(EngineSession):
+    """The sync Session behind an AsyncSession, routed over the async engines"""
+    def primary_engine(self):
+        return get_async_engine().sync_engine
+
+    def replica_engine(self):
+        return get_async_replica_engine().sync_engine
+
+SessionLocal = sessionmaker(class_=EngineSession, autocommit=False, autoflush=False)
+AsyncSessionLocal = async_sessionmaker(sync_session_class=AsyncEngineSession, autoflush=False, expire_on_commit=False)
+
+def get_db(request: Request):
+    db = SessionLocal(replica=reads_from_replica(request, get_engine(), get_replica_engine()))
     try:
         yield db
     finally:
         db.close()
+
+def get_engine():
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = _build_engine(settings.DATABASE_URL)
+                cold_start.mark("engine_created")
+    return _engine
+
+def get_replica_engine():
+    """The read replica's engine, or the primary's when REPLICA_DATABASE_URL is unset"""
+    global _replica_engine
+    if not settings.REPLICA_DATABASE_URL:
+        return get_engine()
+    if _replica_engine is None:
+        with _engine_lock:
+            if _replica_engine is None:
+                _replica_engine = _build_engine(settings.REPLICA_DATABASE_URL)
+    return _replica_engine
+
+def get_async_engine():
+    global async_engine
+    if async_engine is None:
+        async_engine = _build_async_engine(settings.ASYNC_DATABASE_URL or to_async_url(settings.DATABASE_URL))
+        # AsyncEngineSession picks the engine per statement; the bind gives controllers the dialect
+        AsyncSessionLocal.configure(bind=async_engine)
+    return async_engine
+
+def get_async_replica_engine():
+    global async_replica_engine
+    if not settings.REPLICA_DATABASE_URL:
+        return get_async_engine()
+    if async_replica_engine is None:
+        async_replica_engine = _build_async_engine(
+            settings.ASYNC_REPLICA_DATABASE_URL or to_async_url(settings.REPLICA_DATABASE_URL)
+        )
+    return async_replica_engine
+
+async def get_async_db(request: Request):
+    replica = await async_reads_from_replica(request, get_async_engine(), get_async_replica_engine())
+    async with AsyncSessionLocal(replica=replica) as db:
+        yield db
+
+def _build_engine(url: str):
+    engine = create_engine(url, **_pool_options(url))
+    install_engine_hooks(engine)
+    enable_foreign_keys(engine)
+    return engine
+
+def _build_async_engine(url: str):
+    connect_args = {}
+    if settings.SERVERLESS:
+        # Transaction-mode poolers (pgbouncer/Supavisor) cannot keep asyncpg's prepared statements
+        connect_args["statement_cache_size"] = 0
+    engine = create_async_engine(
+        url,
+        connect_args=connect_args if url.startswith("postgresql+asyncpg") else {},
+        **_pool_options(url, async_driver=True)
+    )
+    install_engine_hooks(engine.sync_engine)
+    enable_foreign_keys(engine.sync_engine)
+    return engine
+
+def reset_engines():
+    """Forget this process's engines without closing their connections, which a forked
+    worker shares with its parent; each worker then builds its own engines and pools"""
+    global _engine, _replica_engine, async_engine, async_replica_engine
+    for engine in (_engine, _replica_engine, async_engine, async_replica_engine):
+        if engine is not None:
+            getattr(engine, "sync_engine", engine).dispose(close=False)
+    _engine = _replica_engine = async_engine = async_replica_engine = None
+    AsyncSessionLocal.configure(bind=None)
+
+# Covers any forking server (gunicorn --preload), not just run.py
+os.register_at_fork(after_in_child=reset_engines)
+
+def ping_databases() -> dict:
+    """"ok" or the error of a SELECT 1 on each database this process reads or writes"""
+    engines = {"primary": get_engine()}
+    if settings.REPLICA_DATABASE_URL:
+        engines["replica"] = get_replica_engine()
+    statuses = {}
+    for name, engine in engines.items():
+        try:
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+            statuses[name] = "ok"
+        except exc.SQLAlchemyError as error:
+            statuses[name] = f"{type(error).__name__}: {error}"
+    return statuses
+
+async def async_ping_databases() -> dict:
+    engines = {"primary": get_async_engine()}
+    if settings.REPLICA_DATABASE_URL:
+        engines["replica"] = get_async_replica_engine()
+    statuses = {}
+    for name, engine in engines.items():
+        try:
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+            statuses[name] = "ok"
+        except exc.SQLAlchemyError as error:
+            statuses[name] = f"{type(error).__name__}: {error}"
+    return statuses
+
+def enable_foreign_keys(engine):
+    """Turn on SQLite's (per-connection, off by default) foreign key enforcement for `engine`
+    (a sync Engine), so deletes cascade in the database as they do on Postgres"""
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+def _pool_options(url: str, async_driver: bool = False) -> dict:
+    # A serverless instance serves one request at a time and may be frozen between
+    # invocations, so pooled connections would only go stale; leave pooling to the
+    # external pooler in front of Postgres instead
+    if settings.SERVERLESS:
+        return {"poolclass": NullPool}
+    
+    # In-memory SQLite keeps a single connection per thread and takes no sizing options
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {}
+    
+    return {
+        "poolclass": InstrumentedAsyncAdaptedQueuePool if async_driver else InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+class PoolStats:
+    """Checkout counters for one pool, updated from whichever thread checks a connection out"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+    
+    def record(self, wait: float, timed_out: bool):
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += timed_out
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+    
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "checkout_timeouts": self.timeouts,
+                "checkout_wait_avg_ms": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "checkout_wait_max_ms": round(self.max_wait * 1000, 3),
+            }
+
+class _CheckoutTimingMixin:
+    """Times how long each checkout waits for a free connection (the wait behind `QueuePool limit` errors)"""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+    
+    def _do_get(self):
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self.stats.record(time.perf_counter() - start, timed_out)
+
+class InstrumentedQueuePool(_CheckoutTimingMixin, QueuePool):
+    pass
+
+class InstrumentedAsyncAdaptedQueuePool(_CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+def pool_status() -> dict:
+    """Occupancy and checkout wait statistics of every engine created so far"""
+    engines = {
+        "sync": _engine,
+        "sync_replica": _replica_engine,
+        "async": async_engine.sync_engine if async_engine is not None else None,
+        "async_replica": async_replica_engine.sync_engine if async_replica_engine is not None else None,
+    }
+    return {name: _describe_pool(engine.pool) for name, engine in engines.items() if engine is not None}
+
+def _describe_pool(pool) -> dict:
+    status = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "timeout": pool.timeout(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            # overflow() is negative while fewer than `size` connections have been opened
+            "overflow_in_use": max(pool.overflow(), 0),
+        })
+    if isinstance(pool, _CheckoutTimingMixin):
+        status.update(pool.stats.snapshot())
+    return status
+
+def to_async_url(url: str) -> str:
+    """Swap a sync database URL's driver for its asyncio counterpart"""
+    scheme, _, rest = url.partition("://")
+    dialect = scheme.split("+")[0]
+    if dialect in ("postgres", "postgresql"):
+        # asyncpg does not understand libpq's sslmode parameter
+        return "postgresql+asyncpg://" + rest.replace("sslmode=", "ssl=")
+    if dialect == "sqlite":
+        return "sqlite+aiosqlite://" + rest
+    return url
+
+def __getattr__(name):
+    # Keep `from app.database import engine` working while building it lazily
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
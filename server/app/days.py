@@ -0,0 +1,60 @@
+"""
+The calendar day a topic completion counts on
+
+daily_progress buckets (kept on every write, recreated by `manage.py rebuild-progress` and
+backfilled by migration 0005) and the "today" figures of the goal endpoints all put a
+completion on the date of its complete_date in PROGRESS_TIMEZONE, and "today" is the
+current date there. complete_date is stored in that zone, naive values being taken as
+already in it, so SQLite (which keeps the wall clock and drops the offset) and PostgreSQL
+(which keeps the instant) agree with the Python side on every day boundary.
+"""
+from datetime import date, datetime, time, timedelta
+from typing import Optional, Tuple
+from zoneinfo import ZoneInfo
+from sqlalchemy import DateTime
+from sqlalchemy.types import TypeDecorator
+from app.config import settings
+
+def progress_zone() -> ZoneInfo:
+    return ZoneInfo(settings.PROGRESS_TIMEZONE)
+
+def progress_now() -> datetime:
+    return datetime.now(progress_zone())
+
+def progress_today() -> date:
+    return progress_now().date()
+
+def progress_day(moment: Optional[datetime]) -> Optional[date]:
+    if moment is None:
+        return None
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(progress_zone())
+    return moment.date()
+
+def progress_day_bounds(day: date) -> Tuple[datetime, datetime]:
+    """[start, end) of `day` in PROGRESS_TIMEZONE, for range filters on complete_date"""
+    start = datetime.combine(day, time.min, tzinfo=progress_zone())
+    return start, datetime.combine(day + timedelta(days=1), time.min, tzinfo=progress_zone())
+
+def progress_day_sql(dialect_name: str, column: str) -> str:
+    """progress_day() of a timestamp column in raw SQL (for migrations)"""
+    if dialect_name == "sqlite":
+        # Stored as the wall clock in PROGRESS_TIMEZONE; CAST(... AS DATE) would yield a number
+        return f"date({column})"
+    return f"CAST(timezone('{progress_zone().key}', {column}) AS DATE)"
+
+class ProgressDateTime(TypeDecorator):
+    """DateTime(timezone=True) whose values are written in PROGRESS_TIMEZONE"""
+    impl = DateTime(timezone=True)
+    cache_ok = True
+
+    @property
+    def python_type(self):
+        return datetime
+
+    def process_bind_param(self, value: Optional[datetime], dialect) -> Optional[datetime]:
+        if value is None:
+            return None
+        if value.tzinfo is None:
+            return value.replace(tzinfo=progress_zone())
+        return value.astimezone(progress_zone())
@@ -0,0 +1,131 @@
+"""
+Sparse fieldsets and depth for GET /api/goals/user/{user_id}/details
+
+    depth=goal        goals only (no "resources" key)
+    depth=resources   goals and their resources (no "topics" key)
+    depth=full        the whole tree (default)
+    fields=title,target_date,resources.title,topics.is_completed
+                      only these fields; plain names are goal fields, "resources." and
+                      "topics." prefix resource and topic fields. A level with no field
+                      named keeps all its fields; ids are always included.
+
+A DetailShape is compiled into the query rather than applied to the output: it names the
+columns to load at each level (load_only), whether topics (or resources) are loaded at
+all, and whether today's completed points must be aggregated. Without topics, point
+totals come from the rollup columns.
+"""
+from typing import FrozenSet, NamedTuple, Optional
+from fastapi import HTTPException, Query
+from app.schemas.goal import GoalDetailResponse, ResourceDetail, TopicDetail
+
+DEPTHS = ("goal", "resources", "full")
+
+GOAL_COLUMNS = frozenset({
+    "goal_id", "user_id", "title", "description", "reward_type", "target_value", "initial_value",
+    "domain_name", "initial_date", "target_date", "created_at",
+})
+GOAL_FIELDS = frozenset(GoalDetailResponse.model_fields) - {"resources"}
+# Fields that need today's completed points
+TODAY_FIELDS = frozenset({"todays_completed_points", "todays_completed_value", "todays_completion_percentage"})
+# Goal columns read by GoalController._calculated_goal_fields
+GOAL_METRIC_COLUMNS = frozenset({"target_value", "initial_value", "target_date"})
+GOAL_ROLLUP_COLUMNS = frozenset({"goals_total_points", "completed_points_goal"})
+
+RESOURCE_FIELDS = frozenset(ResourceDetail.model_fields) - {"topics"}
+RESOURCE_ROLLUP_COLUMNS = frozenset({"total_topic_points", "completed_points_resources"})
+RESOURCE_COLUMNS = RESOURCE_FIELDS - RESOURCE_ROLLUP_COLUMNS
+
+TOPIC_FIELDS = frozenset(TopicDetail.model_fields)
+TOPIC_COLUMNS = TOPIC_FIELDS - {"topic_point_value"}
+# Topic columns read by the point aggregates (app/goal_metrics.py)
+TOPIC_METRIC_COLUMNS = frozenset({"point_multiplier", "is_completed", "complete_date"})
+
+class DetailShape(NamedTuple):
+    depth: str = "full"
+    # None: every field of the level
+    goal_fields: Optional[FrozenSet[str]] = None
+    resource_fields: Optional[FrozenSet[str]] = None
+    topic_fields: Optional[FrozenSet[str]] = None
+
+    @property
+    def sparse(self) -> bool:
+        """Whether the response differs from the full GoalDetailResponse tree"""
+        return self != FULL_SHAPE
+
+    @property
+    def goals(self) -> FrozenSet[str]:
+        return GOAL_FIELDS if self.goal_fields is None else self.goal_fields
+
+    @property
+    def resources(self) -> FrozenSet[str]:
+        return RESOURCE_FIELDS if self.resource_fields is None else self.resource_fields
+
+    @property
+    def topics(self) -> FrozenSet[str]:
+        return TOPIC_FIELDS if self.topic_fields is None else self.topic_fields
+
+    @property
+    def goal_calculated(self) -> bool:
+        return bool(self.goals - GOAL_COLUMNS)
+
+    @property
+    def needs_today(self) -> bool:
+        return bool(self.goals & TODAY_FIELDS)
+
+    @property
+    def needs_metrics(self) -> bool:
+        """Whether a full-depth response computes the point aggregates from the topics"""
+        return self.goal_calculated or bool(self.resources & RESOURCE_ROLLUP_COLUMNS) or "topic_point_value" in self.topics
+
+    def goal_columns(self) -> FrozenSet[str]:
+        columns = (self.goals & GOAL_COLUMNS) | {"goal_id"}
+        if self.goal_calculated:
+            columns |= GOAL_METRIC_COLUMNS
+            if self.depth != "full":
+                columns |= GOAL_ROLLUP_COLUMNS
+        return columns
+
+    def resource_columns(self) -> FrozenSet[str]:
+        columns = (self.resources & RESOURCE_COLUMNS) | {"resource_id", "goal_id"}
+        if self.depth == "full":
+            if self.needs_metrics:
+                columns |= {"value_per_unit"}
+        else:
+            columns |= self.resources & RESOURCE_ROLLUP_COLUMNS
+        return columns
+
+    def topic_columns(self) -> FrozenSet[str]:
+        columns = (self.topics & TOPIC_COLUMNS) | {"topic_id", "resource_id"}
+        if self.needs_metrics:
+            columns |= TOPIC_METRIC_COLUMNS
+        return columns
+
+FULL_SHAPE = DetailShape()
+
+def parse_shape(depth: str = "full", fields: Optional[str] = None) -> DetailShape:
+    if depth not in DEPTHS:
+        raise HTTPException(status_code=400, detail=f"depth must be one of {', '.join(DEPTHS)}")
+    if not fields:
+        return DetailShape(depth)
+
+    levels = {"": (set(), GOAL_FIELDS, "goal"), "resources.": (set(), RESOURCE_FIELDS, "resources"), "topics.": (set(), TOPIC_FIELDS, "full")}
+    for name in filter(None, (name.strip() for name in fields.split(","))):
+        prefix = next((prefix for prefix in ("resources.", "topics.") if name.startswith(prefix)), "")
+        selected, known, needed_depth = levels[prefix]
+        field = name[len(prefix):]
+        if field not in known:
+            raise HTTPException(status_code=400, detail=f"Unknown field '{name}'")
+        if DEPTHS.index(depth) < DEPTHS.index(needed_depth):
+            raise HTTPException(status_code=400, detail=f"Field '{name}' needs depth={needed_depth}")
+        selected.add(field)
+
+    goal_fields, resource_fields, topic_fields = (
+        frozenset(selected) if selected else None for selected, _, _ in levels.values()
+    )
+    return DetailShape(depth, goal_fields, resource_fields, topic_fields)
+
+def detail_shape(
+    depth: str = Query("full", description="goal, resources or full"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields, e.g. title,resources.title,topics.is_completed"),
+) -> DetailShape:
+    return parse_shape(depth, fields)
@@ -0,0 +1,53 @@
+"""
+Conditional GET support for the per-user goal tree endpoints
+
+ETags are derived from users.data_version (see VersionController) rather than from the
+response body, so a request can be answered with 304 Not Modified from a single-row
+lookup, before the tree is loaded or serialized.
+"""
+import hashlib
+from typing import Optional
+from fastapi import HTTPException, Request, Response
+from app.days import progress_today
+
+def tree_etag(kind: str, user_id: int, version: int, daily: bool = False) -> str:
+    """ETag of one representation of a user's goal tree.
+
+    `daily` representations include fields computed relative to today (days left,
+    today's points), so their tag also changes at midnight in PROGRESS_TIMEZONE.
+    """
+    tag = f"{kind}-{user_id}-{version}"
+    if daily:
+        tag += f"-{progress_today().isoformat()}"
+    return f'W/"{tag}"'
+
+def query_tag(request: Request, names) -> str:
+    """Tag suffix for the query parameters that select a different representation (e.g. a page)"""
+    values = [f"{name}={request.query_params[name]}" for name in names if name in request.query_params]
+    # Hashed: values may hold commas, which would split an If-None-Match list
+    return "." + hashlib.sha1("&".join(values).encode()).hexdigest()[:16] if values else ""
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    strip_weak = lambda value: value[2:] if value.startswith("W/") else value
+    return "*" in candidates or strip_weak(etag) in {strip_weak(candidate) for candidate in candidates}
+
+def check_not_modified(request: Request, response: Response, etag: Optional[str], vary: Optional[str] = None) -> dict:
+    """Raise 304 if the client already holds `etag`, otherwise tag the response with it.
+
+    Returns the caching headers, for endpoints that build their own Response
+    (those don't get the headers set on `response`).
+    """
+    if etag is None:
+        return {}
+    # no-cache: browsers may keep the body but must revalidate it on every request
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if vary:
+        headers["Vary"] = vary
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        raise HTTPException(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return headers
@@ -0,0 +1,194 @@
+"""
+Change feed pub/sub behind GET /api/users/{user_id}/events (Server-Sent Events)
+
+Writers publish a compact event per committed write to the owning user's channel;
+every open event stream of that user receives it. Brokers, chosen by EVENTS_BACKEND:
+    memory  in-process fan-out; only streams served by the publishing worker process see
+            an event, so use it with a single worker
+    redis   events go through Redis pub/sub at EVENTS_URL and each worker fans them out to
+            its own streams (needs `redis`)
+
+Each subscriber buffers at most EVENTS_MAX_QUEUED events. A subscriber that falls further
+behind gets a single {"type": "resync"} instead of the events it missed and should refetch.
+"""
+from typing import Dict, Optional, Set
+from starlette.concurrency import run_in_threadpool
+from app.config import settings
+import asyncio
+import json
+import os
+import threading
+
+class Subscription:
+    """One event stream's queue; it lives on the event loop that created it"""
+
+    def __init__(self, broker: "LocalBroker", user_id: int, max_queued: int):
+        self.broker = broker
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(max_queued)
+        self.overflowed = False
+
+    def put(self, event: dict):
+        # Runs on self.loop
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def get(self) -> dict:
+        if self.overflowed:
+            self.overflowed = False
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            return {"type": "resync"}
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+class LocalBroker:
+    backend = "memory"
+    # Whether publish() does network I/O (async writers then run it in the threadpool)
+    blocking = False
+
+    def __init__(self, max_queued: int = 100):
+        self.max_queued = max_queued
+        self._subscribers: Dict[int, Set[Subscription]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        """Whether publishing can reach anyone (writers skip building events otherwise)"""
+        return bool(self._subscribers)
+
+    def subscribe(self, user_id: int) -> Subscription:
+        """Open a subscription for the calling event loop"""
+        subscription = Subscription(self, user_id, self.max_queued)
+        with self._lock:
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+
+    def publish(self, user_id: int, event: dict):
+        self.deliver(user_id, event)
+
+    def deliver(self, user_id: int, event: dict):
+        """Hand an event to this process's subscribers; safe to call from any thread"""
+        with self._lock:
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.put, event)
+            except RuntimeError:
+                # The subscriber's loop is closed; its stream is gone
+                self.unsubscribe(subscription)
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "backend": self.backend,
+                "users": len(self._subscribers),
+                "subscribers": sum(len(subscribers) for subscribers in self._subscribers.values()),
+            }
+
+class RedisBroker(LocalBroker):
+    """Publishes through Redis pub/sub; one listener thread per process feeds the local subscribers"""
+    backend = "redis"
+    blocking = True
+
+    def __init__(self, client, max_queued: int = 100, prefix: str = "goal_tracker:events:"):
+        super().__init__(max_queued)
+        self.client = client
+        self.prefix = prefix
+        self._listener: Optional[threading.Thread] = None
+
+    @property
+    def active(self) -> bool:
+        # Subscribers may be connected to any worker
+        return True
+
+    def subscribe(self, user_id: int) -> Subscription:
+        with self._lock:
+            if self._listener is None:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(self.prefix + "*")
+                self._listener = threading.Thread(target=self._listen, args=(pubsub,), name="event-listener", daemon=True)
+                self._listener.start()
+        return super().subscribe(user_id)
+
+    def publish(self, user_id: int, event: dict):
+        self.client.publish(f"{self.prefix}{user_id}", json.dumps(event))
+
+    def _listen(self, pubsub):
+        for message in pubsub.listen():
+            if message["type"] != "pmessage":
+                continue
+            channel = message["channel"]
+            if isinstance(channel, bytes):
+                channel = channel.decode()
+            self.deliver(int(channel[len(self.prefix):]), json.loads(message["data"]))
+
+_broker = None
+_broker_lock = threading.Lock()
+
+def get_broker() -> LocalBroker:
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = build_broker()
+    return _broker
+
+def build_broker() -> LocalBroker:
+    if settings.EVENTS_BACKEND == "redis":
+        import redis
+        return RedisBroker(redis.Redis.from_url(settings.EVENTS_URL), settings.EVENTS_MAX_QUEUED)
+    if settings.EVENTS_BACKEND != "memory":
+        raise ValueError(f"Unknown EVENTS_BACKEND {settings.EVENTS_BACKEND!r} (expected memory or redis)")
+    return LocalBroker(settings.EVENTS_MAX_QUEUED)
+
+def set_broker(broker: Optional[LocalBroker]):
+    """Replace the process-wide broker (None rebuilds it from settings on next use)"""
+    global _broker
+    _broker = broker
+
+# A forked worker subscribes through its own broker instead of its parent's connection
+os.register_at_fork(after_in_child=lambda: set_broker(None))
+
+def publish(user_id: int, event: dict):
+    get_broker().publish(user_id, event)
+
+async def async_publish(user_id: int, event: dict):
+    broker = get_broker()
+    if broker.blocking:
+        await run_in_threadpool(broker.publish, user_id, event)
+    else:
+        broker.publish(user_id, event)
+
+def format_event(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+
+async def event_stream(user_id: int, keepalive: Optional[float] = None):
+    """SSE body for one user's events, with a comment line every `keepalive` idle seconds"""
+    keepalive = settings.EVENTS_KEEPALIVE if keepalive is None else keepalive
+    subscription = get_broker().subscribe(user_id)
+    try:
+        # Reconnect after 3s; a reconnecting client should refetch what it shows
+        yield "retry: 3000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), keepalive)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            yield format_event(event)
+    finally:
+        subscription.close()
@@ -0,0 +1,128 @@
+"""
+Streaming export of a user's goals, resources and topics (GET /api/users/{user_id}/export)
+
+The tree is read as one (goal, resource, topic) join ordered by goal, resource and topic,
+through a server-side cursor (yield_per) in batches of EXPORT_BATCH_SIZE rows; each batch
+is encoded and sent before the next is fetched, so a worker holds one batch whatever the
+size of the account.
+
+    format=ndjson   one record per line, parents before their children:
+                    {"type": "goal", "goal_id": 1, ...}
+                    {"type": "resource", "resource_id": 4, "goal_id": 1, ...}
+                    {"type": "topic", "topic_id": 9, "resource_id": 4, ...}
+    format=csv      one line per topic with its resource's and goal's columns ("goal.title",
+                    "resource.title", "topic.title", ...); goals without resources and
+                    resources without topics get a line with the missing columns empty
+
+With Accept-Encoding: gzip the stream is compressed as it is produced.
+"""
+import csv
+import io
+import zlib
+from datetime import date, timedelta
+from typing import AsyncIterator, Iterable, Iterator, List, Union
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from pydantic_core import to_json
+from app.models.goal import Goal
+from app.models.resource import Resource
+from app.models.topic import ResourceTopic
+
+# Record type, table and id column of each level, in the order of the selected columns
+LEVELS = (("goal", Goal.__table__, "goal_id"), ("resource", Resource.__table__, "resource_id"), ("topic", ResourceTopic.__table__, "topic_id"))
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+def export_columns():
+    return [column for _, table, _ in LEVELS for column in table.columns]
+
+def _plain(value):
+    # The API sends intervals as "H:MM:SS" strings (pydantic would write ISO 8601 durations)
+    return str(value) if isinstance(value, timedelta) else value
+
+class ExportWriter:
+    """Encodes batches of export rows (every column of LEVELS, side by side) to NDJSON or CSV"""
+
+    def __init__(self, format: str):
+        self.format = format
+        self.levels = []
+        start = 0
+        for kind, table, id_column in LEVELS:
+            keys = [column.key for column in table.columns]
+            self.levels.append((kind, keys, slice(start, start + len(keys)), keys.index(id_column)))
+            start += len(keys)
+        # csv.writer already writes None as an empty cell; only these columns need converting
+        self.csv_columns = [
+            (index, self._csv_converter(column.type.python_type)) for index, column in enumerate(export_columns())
+            if issubclass(column.type.python_type, (bool, date))
+        ]
+        # Ids of the goal and resource written last, which rows repeat until the next one
+        self.written = {"goal": None, "resource": None}
+
+    def header(self) -> bytes:
+        if self.format != "csv":
+            return b""
+        return self._csv([[f"{kind}.{key}" for kind, keys, _, _ in self.levels for key in keys]])
+
+    def encode(self, rows: Iterable) -> bytes:
+        if self.format == "csv":
+            return self._csv([self._csv_row(row) for row in rows])
+        lines = []
+        for row in rows:
+            for kind, keys, columns, id_index in self.levels:
+                values = row[columns]
+                entity_id = values[id_index]
+                if entity_id is None or self.written.get(kind) == entity_id:
+                    continue
+                if kind in self.written:
+                    self.written[kind] = entity_id
+                lines.append(to_json({"type": kind, **{key: _plain(value) for key, value in zip(keys, values)}}))
+        return b"\n".join(lines) + b"\n" if lines else b""
+
+    @staticmethod
+    def _csv(rows: List[list]) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerows(rows)
+        return buffer.getvalue().encode()
+
+    def _csv_row(self, row) -> list:
+        values = list(row)
+        for index, convert in self.csv_columns:
+            if values[index] is not None:
+                values[index] = convert(values[index])
+        return values
+
+    @staticmethod
+    def _csv_converter(python_type):
+        if python_type is bool:
+            return lambda value: "true" if value else "false"
+        return python_type.isoformat
+
+def accepts_gzip(request: Request) -> bool:
+    for coding in request.headers.get("accept-encoding", "").split(","):
+        name, _, params = coding.strip().partition(";")
+        if name.strip().lower() in ("gzip", "*") and params.replace(" ", "") not in ("q=0", "q=0.0"):
+            return True
+    return False
+
+def gzip_chunks(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        # Flush each batch, so compressed data leaves as promptly as plain data would
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+async def async_gzip_chunks(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(wbits=31)
+    async for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
+
+def export_response(request: Request, user_id: int, format: str, chunks: Union[Iterator[bytes], AsyncIterator[bytes]]) -> StreamingResponse:
+    headers = {
+        "Content-Disposition": f'attachment; filename="goal-tracker-user-{user_id}.{format}"',
+        "Vary": "Accept-Encoding",
+    }
+    if accepts_gzip(request):
+        headers["Content-Encoding"] = "gzip"
+        chunks = async_gzip_chunks(chunks) if hasattr(chunks, "__aiter__") else gzip_chunks(chunks)
+    return StreamingResponse(chunks, media_type=MEDIA_TYPES[format], headers=headers)
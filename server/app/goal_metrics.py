@@ -0,0 +1,107 @@
+"""
+Point aggregates of one goal tree: each topic's point value, each resource's total and
+completed points, and the goal's total, completed and today's points
+
+loop_metrics walks the topics one at a time. vectorized_metrics loads the topic columns
+into NumPy arrays and reduces them per resource with np.bincount, which adds the weights
+in input order, i.e. in the same order as the loop, so both return identical floats (a
+pairwise np.sum would not). compute_metrics uses the vectorized engine for goals with at
+least VECTORIZED_METRICS_MIN_TOPICS topics when NumPy is installed.
+"""
+from datetime import date
+from operator import attrgetter
+from typing import List, NamedTuple, Sequence, Tuple
+from app.config import settings
+from app.days import progress_day
+from app.models.resource import Resource
+from app.models.topic import ResourceTopic
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+class TreeMetrics(NamedTuple):
+    # Per resource, the point value of each of its topics
+    topic_values: List[List[float]]
+    resource_totals: List[float]
+    resource_completed: List[float]
+    goals_total_points: float
+    completed_points_goal: float
+    todays_completed_points: float
+
+def loop_metrics(resources: Sequence[Tuple[Resource, Sequence[ResourceTopic]]], today: date) -> TreeMetrics:
+    topic_values, resource_totals, resource_completed = [], [], []
+    goals_total_points = 0
+    completed_points_goal = 0
+    todays_completed_points = 0
+
+    for resource, topics in resources:
+        values = []
+        total_topic_points = 0
+        completed_points_resources = 0
+
+        for topic in topics:
+            # topic_point_value = resource value per unit * topic point multiplier
+            topic_point_value = resource.value_per_unit * topic.point_multiplier
+            values.append(topic_point_value)
+            total_topic_points += topic_point_value
+
+            if topic.is_completed:
+                completed_points_resources += topic_point_value
+
+            # Check if topic was completed today
+            if topic.is_completed and topic.complete_date:
+                if progress_day(topic.complete_date) == today:
+                    todays_completed_points += topic_point_value
+
+        topic_values.append(values)
+        resource_totals.append(total_topic_points)
+        resource_completed.append(completed_points_resources)
+        goals_total_points += total_topic_points
+        completed_points_goal += completed_points_resources
+
+    return TreeMetrics(
+        topic_values, resource_totals, resource_completed,
+        goals_total_points, completed_points_goal, todays_completed_points
+    )
+
+def vectorized_metrics(resources: Sequence[Tuple[Resource, Sequence[ResourceTopic]]], today: date) -> TreeMetrics:
+    counts = [len(topics) for _, topics in resources]
+    topics = [topic for _, resource_topics in resources for topic in resource_topics]
+    size = len(topics)
+
+    # Column per topic attribute; `owner` is the index of the topic's resource
+    owner = np.repeat(np.arange(len(resources)), counts)
+    value_per_unit = np.repeat(
+        np.fromiter((resource.value_per_unit for resource, _ in resources), dtype=np.float64, count=len(resources)), counts
+    )
+    multiplier = np.fromiter(map(attrgetter("point_multiplier"), topics), dtype=np.float64, count=size)
+    completed = np.fromiter(map(bool, map(attrgetter("is_completed"), topics)), dtype=bool, count=size)
+    completed_on = np.fromiter(
+        (progress_day(moment).toordinal() if moment else 0 for moment in map(attrgetter("complete_date"), topics)), dtype=np.int64, count=size
+    )
+
+    values = value_per_unit * multiplier
+    completed_today = completed & (completed_on == today.toordinal())
+
+    resource_totals = np.bincount(owner, weights=values, minlength=len(resources))
+    resource_completed = np.bincount(owner[completed], weights=values[completed], minlength=len(resources))
+
+    def ordered_sum(weights) -> float:
+        return float(np.bincount(np.zeros(len(weights), dtype=np.intp), weights=weights, minlength=1)[0])
+
+    return TreeMetrics(
+        [chunk.tolist() for chunk in np.split(values, np.cumsum(counts)[:-1])] if resources else [],
+        resource_totals.tolist(),
+        resource_completed.tolist(),
+        ordered_sum(resource_totals),
+        ordered_sum(resource_completed),
+        ordered_sum(values[completed_today]),
+    )
+
+def compute_metrics(resources: Sequence[Tuple[Resource, Sequence[ResourceTopic]]], today: date) -> TreeMetrics:
+    threshold = settings.VECTORIZED_METRICS_MIN_TOPICS
+    if np is not None and threshold > 0 and sum(len(topics) for _, topics in resources) >= threshold:
+        return vectorized_metrics(resources, today)
+    return loop_metrics(resources, today)
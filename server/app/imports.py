@@ -0,0 +1,101 @@
+"""
+Streaming CSV / NDJSON import of resources and topics into a goal
+
+One row per line, each naming a resource and (optionally) a topic in it:
+
+    resource,value_per_unit,topic,point_multiplier,is_completed
+    Book,5,Chapter 1,1,true
+    Book,5,Chapter 2,2,false
+
+NDJSON lines are objects with the same keys (app.schemas.imports.ImportRow); CSV needs a
+header naming them, and empty cells take the defaults. The body is parsed as it arrives,
+so memory holds one chunk and one insert batch, never the file. Quoted CSV fields cannot
+span lines.
+"""
+import codecs
+import csv
+import json
+from typing import Iterator, List, Optional, Tuple, Union
+import anyio
+from fastapi import HTTPException, Query, Request
+from pydantic import ValidationError
+from app.schemas.imports import ImportRow
+
+FORMATS = {"text/csv": "csv", "application/x-ndjson": "ndjson", "application/jsonl": "ndjson"}
+
+# (line number, the validated row or why it was rejected)
+ParsedRow = Tuple[int, Union[ImportRow, str]]
+
+class ImportParser:
+    """Turns an import body, fed in chunks of any size, into ParsedRows"""
+
+    def __init__(self, format: str):
+        self.format = format
+        self.decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self.pending = ""
+        self.line = 0
+        self.header: Optional[List[str]] = None
+
+    def feed(self, chunk: bytes) -> List[ParsedRow]:
+        lines = (self.pending + self.decoder.decode(chunk)).split("\n")
+        self.pending = lines.pop()
+        return [row for row in map(self._parse, lines) if row is not None]
+
+    def close(self) -> List[ParsedRow]:
+        rest = self.pending + self.decoder.decode(b"", final=True)
+        self.pending = ""
+        return [row for row in map(self._parse, rest.split("\n") if rest else []) if row is not None]
+
+    def _parse(self, line: str) -> Optional[ParsedRow]:
+        self.line += 1
+        line = line.rstrip("\r")
+        if not line.strip():
+            return None
+        if self.format == "csv":
+            values = next(csv.reader([line]))
+            if self.header is None:
+                self._read_header(values)
+                return None
+            if len(values) != len(self.header):
+                return self.line, f"Expected {len(self.header)} columns, got {len(values)}"
+            data = {name: value for name, value in zip(self.header, values) if value != ""}
+        else:
+            try:
+                data = json.loads(line)
+            except ValueError:
+                return self.line, "Invalid JSON"
+            if not isinstance(data, dict):
+                return self.line, "Expected a JSON object"
+        try:
+            return self.line, ImportRow.model_validate(data)
+        except ValidationError as error:
+            return self.line, "; ".join(
+                f"{'.'.join(map(str, detail['loc']))}: {detail['msg']}" for detail in error.errors(include_url=False)
+            )
+
+    def _read_header(self, names: List[str]):
+        self.header = [name.strip() for name in names]
+        unknown = sorted(set(self.header) - set(ImportRow.model_fields))
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown CSV columns: {', '.join(unknown)}")
+        if "resource" not in self.header:
+            raise HTTPException(status_code=400, detail="The CSV header needs a 'resource' column")
+
+def import_format(
+    request: Request,
+    format: Optional[str] = Query(None, description="csv or ndjson (default: from Content-Type)"),
+) -> str:
+    if format is None:
+        format = FORMATS.get(request.headers.get("content-type", "").split(";")[0].strip())
+    if format not in FORMATS.values():
+        raise HTTPException(status_code=415, detail="Send text/csv or application/x-ndjson, or pass ?format=csv|ndjson")
+    return format
+
+def request_chunks(request: Request) -> Iterator[bytes]:
+    """The request body as it arrives, for a sync endpoint (running in a worker thread)"""
+    chunks = request.stream().__aiter__()
+    while True:
+        try:
+            yield anyio.from_thread.run(chunks.__anext__)
+        except StopAsyncIteration:
+            return
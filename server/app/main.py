@@ -1,11 +1,16 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+from app import cold_start
 from app.config import settings
-from app.database import engine, Base
-from app.routes import user_routes, goal_routes, resource_routes, topic_routes
+from app.request_metrics import RequestMetricsMiddleware
+import asyncio
+import importlib
+import os
+import threading
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# The schema is managed by migrations (python manage.py migrate), never at import
 
 app = FastAPI(
     title="Goal Tracker API",
@@ -20,13 +25,76 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Next-page cursor of the list endpoints (app/pagination.py)
+    expose_headers=["X-Next-Cursor", "Link"],
 )
 
-# Include routers
-app.include_router(user_routes.router, prefix="/api/users", tags=["Users"])
-app.include_router(goal_routes.router, prefix="/api/goals", tags=["Goals"])
-app.include_router(resource_routes.router, prefix="/api/resources", tags=["Resources"])
-app.include_router(topic_routes.router, prefix="/api/topics", tags=["Topics"])
+# Statement count, DB time and serialization time per request (Server-Timing + log line)
+app.add_middleware(RequestMetricsMiddleware)
+
+# (prefix, tag, sync router module, async router module)
+ROUTERS = [
+    ("/api/users", "Users", "app.routes.user_routes", "app.routes.async_user_routes"),
+    ("/api/goals", "Goals", "app.routes.goal_routes", "app.routes.async_goal_routes"),
+    ("/api/resources", "Resources", "app.routes.resource_routes", "app.routes.async_resource_routes"),
+    ("/api/topics", "Topics", "app.routes.topic_routes", "app.routes.async_topic_routes"),
+    ("/api/sync", "Sync", "app.routes.sync_routes", "app.routes.async_sync_routes"),
+]
+
+_included_prefixes = set()
+_include_lock = threading.Lock()
+
+def include_routers(prefixes=None):
+    """Import and mount the routers for the given prefixes (all of them by default)"""
+    with _include_lock:
+        for prefix, tag, module, async_module in ROUTERS:
+            if prefix in _included_prefixes or (prefixes is not None and prefix not in prefixes):
+                continue
+            
+            # Async routers are registered first so they take precedence; any endpoint they
+            # don't implement falls through to the sync router
+            modules = [async_module, module] if settings.ASYNC_DB else [module]
+            for name in modules:
+                app.include_router(importlib.import_module(name).router, prefix=prefix, tags=[tag])
+            
+            _included_prefixes.add(prefix)
+            cold_start.mark(f"routers_loaded:{prefix}")
+        
+        if settings.ASYNC_DB:
+            # Drop the sync routes shadowed by an async one so the OpenAPI schema lists each endpoint once
+            served = set()
+            for route in list(app.router.routes):
+                key = (route.path, frozenset(getattr(route, "methods", None) or ()))
+                if key in served:
+                    app.router.routes.remove(route)
+                served.add(key)
+        
+        # Routes may have been added after the schema was generated
+        app.openapi_schema = None
+
+class LazyRouterMiddleware:
+    """Mounts a prefix's routers (and so imports its controllers/schemas) on its first request"""
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            path = scope["path"]
+            if path in (app.docs_url, app.redoc_url, app.openapi_url):
+                include_routers()
+            else:
+                include_routers([
+                    prefix for prefix, *_ in ROUTERS
+                    if path == prefix or path.startswith(prefix + "/")
+                ])
+        await self.app(scope, receive, send)
+        if scope["type"] == "http":
+            cold_start.first_request_done()
+
+if settings.SERVERLESS:
+    app.add_middleware(LazyRouterMiddleware)
+else:
+    include_routers()
 
 @app.get("/")
 def read_root():
@@ -35,3 +103,41 @@ def read_root():
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
+
+@app.get("/health/ready")
+async def readiness():
+    """Whether this worker can serve: 200 when its databases answer, 503 otherwise"""
+    from app.database import ping_databases, async_ping_databases
+    databases = await async_ping_databases() if settings.ASYNC_DB else await run_in_threadpool(ping_databases)
+    ready = all(status == "ok" for status in databases.values())
+    return JSONResponse({
+        "ready": ready,
+        "pid": os.getpid(),
+        "event_loop": type(asyncio.get_running_loop()).__module__.split(".")[0],
+        "databases": databases,
+    }, status_code=200 if ready else 503)
+
+@app.get("/health/db-pool")
+def db_pool_status():
+    """Connection pool occupancy and checkout wait times of this worker"""
+    from app.database import pool_status
+    return pool_status()
+
+@app.get("/health/cache")
+def cache_status():
+    """Entity cache backend and its hit/miss/eviction counters (per worker for local counters)"""
+    from app.cache import get_cache
+    return get_cache().status()
+
+@app.get("/health/events")
+def events_status():
+    """Change feed broker and the event streams open on this worker"""
+    from app.events import get_broker
+    return get_broker().status()
+
+@app.get("/health/startup")
+def startup_report():
+    """Cold-start timing milestones of this instance"""
+    return cold_start.report()
+
+cold_start.mark("app_imported")
@@ -2,5 +2,7 @@ from app.models.user import User
 from app.models.goal import Goal
 from app.models.resource import Resource
 from app.models.topic import ResourceTopic
+from app.models.daily_progress import DailyProgress
+from app.models.tombstone import Tombstone
 
-__all__ = ["User", "Goal", "Resource", "ResourceTopic"]
+__all__ = ["User", "Goal", "Resource", "ResourceTopic", "DailyProgress", "Tombstone"]
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, Float, Date, ForeignKey, Index
+from app.database import Base
+
+class DailyProgress(Base):
+    """Completed points/topics of one goal on one day, maintained by ProgressController"""
+    __tablename__ = "daily_progress"
+    __table_args__ = (
+        Index("ix_daily_progress_user_id_day", "user_id", "day"),
+    )
+    
+    goal_id = Column(Integer, ForeignKey("goals.goal_id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
+    completed_points = Column(Float, nullable=False, default=0, server_default="0")
+    completed_topics = Column(Integer, nullable=False, default=0, server_default="0")
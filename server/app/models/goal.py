@@ -1,13 +1,19 @@
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, Date, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, Date, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
 
 class Goal(Base):
     __tablename__ = "goals"
+    __table_args__ = (
+        # Delta sync: a user's goals changed since a cursor
+        Index("ix_goals_user_id_updated_at", "user_id", "updated_at"),
+        # Keyset pages of a user's goals (app/pagination.py)
+        Index("ix_goals_user_id_created_at", "user_id", "created_at", "goal_id"),
+    )
     
     goal_id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False, index=True)
     title = Column(String(255), nullable=False)
     description = Column(Text)
     reward_type = Column(String(100))
@@ -16,8 +22,14 @@ class Goal(Base):
     domain_name = Column(String(100))
     initial_date = Column(Date)
     target_date = Column(Date)
+    # Rollups maintained by RollupController on every topic/resource write
+    goals_total_points = Column(Float, nullable=False, default=0, server_default="0")
+    completed_points_goal = Column(Float, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Also set by the rollup UPDATE statements, so point changes show up in delta syncs
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
     user = relationship("User", back_populates="goals")
-    resources = relationship("Resource", back_populates="goal", cascade="all, delete-orphan")
+    resources = relationship("Resource", back_populates="goal", cascade="all, delete-orphan", passive_deletes=True)
+    daily_progress = relationship("DailyProgress", cascade="all, delete-orphan", passive_deletes=True)
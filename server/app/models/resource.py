@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, Text, Interval, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Text, Interval, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
 
 class Resource(Base):
     __tablename__ = "resources"
+    __table_args__ = (
+        Index("ix_resources_goal_id_updated_at", "goal_id", "updated_at"),
+        Index("ix_resources_goal_id_created_at", "goal_id", "created_at", "resource_id"),
+    )
     
     resource_id = Column(Integer, primary_key=True, index=True)
     resource_type = Column(String(50))
@@ -13,9 +17,13 @@ class Resource(Base):
     total_time_per_unit = Column(Interval)
     resource_link = Column(String(500))
     note = Column(Text)
-    goal_id = Column(Integer, ForeignKey("goals.goal_id", ondelete="CASCADE"))
+    goal_id = Column(Integer, ForeignKey("goals.goal_id", ondelete="CASCADE"), index=True)
+    # Rollups maintained by RollupController on every topic/resource write
+    total_topic_points = Column(Float, nullable=False, default=0, server_default="0")
+    completed_points_resources = Column(Float, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
     goal = relationship("Goal", back_populates="resources")
-    topics = relationship("ResourceTopic", back_populates="resource", cascade="all, delete-orphan")
+    topics = relationship("ResourceTopic", back_populates="resource", cascade="all, delete-orphan", passive_deletes=True)
@@ -1,10 +1,18 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
+from app.days import ProgressDateTime
 
 class ResourceTopic(Base):
     __tablename__ = "resource_topics"
+    __table_args__ = (
+        # resource_id leads both composites, so they also serve plain "by resource" lookups
+        Index("ix_resource_topics_resource_id_is_completed", "resource_id", "is_completed"),
+        Index("ix_resource_topics_resource_id_complete_date", "resource_id", "complete_date"),
+        Index("ix_resource_topics_resource_id_updated_at", "resource_id", "updated_at"),
+        Index("ix_resource_topics_resource_id_created_at", "resource_id", "created_at", "topic_id"),
+    )
     
     topic_id = Column(Integer, primary_key=True, index=True)
     resource_id = Column(Integer, ForeignKey("resources.resource_id", ondelete="CASCADE"), nullable=False)
@@ -12,8 +20,9 @@ class ResourceTopic(Base):
     point_multiplier = Column(Float, default=1.0)
     is_completed = Column(Boolean, default=False)
     is_skipped = Column(Boolean, default=False)
-    complete_date = Column(DateTime(timezone=True))
+    complete_date = Column(ProgressDateTime)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationships
     resource = relationship("Resource", back_populates="topics")
@@ -12,7 +12,11 @@ class User(Base):
     phone = Column(String(20))
     occupation = Column(String(100))
     password = Column(String(255), nullable=False)
+    # Version token of the user's goal tree, bumped by VersionController on every goal/resource/topic write
+    data_version = Column(Integer, nullable=False, default=0, server_default="0")
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
-    # Relationships
-    goals = relationship("Goal", back_populates="user", cascade="all, delete-orphan")
+    # Relationships; passive_deletes leaves deleting the subtree to ON DELETE CASCADE
+    # instead of loading every goal, resource and topic to delete them one by one
+    goals = relationship("Goal", back_populates="user", cascade="all, delete-orphan", passive_deletes=True)
@@ -0,0 +1,90 @@
+"""
+Keyset pagination for the list endpoints (goals of a user, resources of a goal, topics
+of a resource)
+
+Lists are ordered by (created_at, id). A page is fetched with WHERE (created_at, id) >
+(the last row's) ORDER BY created_at, id LIMIT n+1 on a (parent id, created_at, id)
+index, so every page costs the same however deep it is, unlike OFFSET. The body stays
+a plain JSON array; the cursor of the next page is sent in the X-Next-Cursor header
+(and as a Link: <...>; rel="next" URL) and is absent on the last page.
+"""
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from typing import List, NamedTuple, Optional, Tuple
+from fastapi import HTTPException, Query, Request, Response
+from sqlalchemy import String, literal, select, tuple_, union_all
+from sqlalchemy.orm import aliased
+from app.config import settings
+
+class Page(NamedTuple):
+    items: List
+    next_cursor: Optional[str]
+
+def encode_cursor(created_at: datetime, entity_id: int) -> str:
+    return urlsafe_b64encode(f"{created_at.isoformat()}|{entity_id}".encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        created_at, entity_id = urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode().split("|")
+        return datetime.fromisoformat(created_at), int(entity_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid page cursor")
+
+def page_size(limit: Optional[int]) -> Optional[int]:
+    """Rows per page for a request's ?limit= (None: the rest of the list)"""
+    return limit or settings.LIST_PAGE_SIZE or None
+
+def paginate(statement, created_column, id_column, dialect_name: str, limit: Optional[int], cursor: Optional[str]):
+    """Order `statement` (a select of one entity) by (created_at, id) and restrict it to one
+    page, plus one row to tell whether a next page exists"""
+    order = (created_column, id_column)
+    fetch = limit + 1 if limit else None
+    if not cursor:
+        return statement.order_by(*order).limit(fetch)
+    created_at, entity_id = decode_cursor(cursor)
+    if dialect_name != "sqlite":
+        return statement.where(tuple_(*order) > tuple_(created_at, entity_id)).order_by(*order).limit(fetch)
+
+    # SQLite compares the stored text: CURRENT_TIMESTAMP defaults are "YYYY-MM-DD HH:MM:SS",
+    # datetimes written from Python carry ".ffffff", which sorts after the bare form. It
+    # also seeks a row-value range on created_at alone, walking every row that shares the
+    # cursor's timestamp (a bulk insert's worth), so seek the rest of that timestamp and
+    # the later rows separately
+    stored = created_at.strftime("%Y-%m-%d %H:%M:%S.%f")
+    same_time = [stored] if created_at.microsecond else [stored, stored[:-7]]
+    same_second = statement.where(
+        created_column.in_([literal(text, String) for text in same_time]), id_column > entity_id
+    ).order_by(id_column).limit(fetch)
+    later = statement.where(created_column > literal(stored, String)).order_by(*order).limit(fetch)
+    rows = union_all(select(same_second.subquery()), select(later.subquery())).subquery()
+    entity = aliased(statement.column_descriptions[0]["entity"], rows)
+    return select(entity).order_by(rows.c[created_column.key], rows.c[id_column.key]).limit(fetch)
+
+def build_page(rows, limit: Optional[int], id_attribute: str) -> Page:
+    if not limit or len(rows) <= limit:
+        return Page(list(rows), None)
+    rows = rows[:limit]
+    return Page(rows, encode_cursor(rows[-1].created_at, getattr(rows[-1], id_attribute)))
+
+class PageRequest:
+    """A list request's ?limit= and ?cursor=; respond() adds the next-page headers"""
+
+    def __init__(self, request: Request, response: Response, limit: Optional[int], cursor: Optional[str]):
+        self.request = request
+        self.response = response
+        self.limit = limit
+        self.cursor = cursor
+
+    def respond(self, page: Page) -> List:
+        if page.next_cursor is not None:
+            self.response.headers["X-Next-Cursor"] = page.next_cursor
+            self.response.headers["Link"] = f'<{self.request.url.include_query_params(cursor=page.next_cursor)}>; rel="next"'
+        return page.items
+
+def page_request(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=settings.LIST_MAX_LIMIT),
+    cursor: Optional[str] = None,
+) -> PageRequest:
+    return PageRequest(request, response, limit, cursor)
@@ -0,0 +1,115 @@
+"""
+Read-replica routing
+
+With REPLICA_DATABASE_URL set, GET and HEAD requests get a session reading from the
+replica (app.database.EngineSession) while every other request, and any write a read
+request makes, uses the primary.
+
+So that a user reads back their own writes while the replica catches up, every write
+(through VersionController's data_version bumps) marks its user as a recent writer for
+REPLICA_READ_YOUR_WRITES seconds, in the cache layer (app/cache.py). A read about a recent
+writer's data (the user, goal, resource or topic named in its path) compares that user's
+data_version on the replica with the primary's, and reads from the primary until the
+replica has caught up. Reads about anyone else never touch the primary: a path naming a
+user needs no lookup at all, and one naming a goal, resource or topic finds its owner with
+one query on the replica.
+"""
+from typing import Iterable, Optional
+from fastapi import Request
+from app.config import settings
+from app.cache import note_writes, async_note_writes, wrote_recently, async_wrote_recently
+
+READ_METHODS = ("GET", "HEAD")
+
+def tracks_writes() -> bool:
+    return bool(settings.REPLICA_DATABASE_URL) and settings.REPLICA_READ_YOUR_WRITES > 0
+
+def writers(user_ids: Iterable[int]):
+    """Mark users whose data a write changed"""
+    if tracks_writes():
+        note_writes(user_ids, settings.REPLICA_READ_YOUR_WRITES)
+
+async def async_writers(user_ids: Iterable[int]):
+    if tracks_writes():
+        await async_note_writes(user_ids, settings.REPLICA_READ_YOUR_WRITES)
+
+def wants_replica(request: Request) -> bool:
+    return bool(settings.REPLICA_DATABASE_URL) and request.method in READ_METHODS
+
+def owner_version_statement(path_params: dict):
+    """SELECT (user_id, data_version) of the user owning the entity in the path, or None"""
+    # app.models imports app.database, which imports this module
+    from sqlalchemy import select
+    from app.models import User, Goal, Resource, ResourceTopic
+
+    statement = select(User.user_id, User.data_version)
+    if "user_id" in path_params:
+        return statement.where(User.user_id == int(path_params["user_id"]))
+    statement = statement.join(Goal, Goal.user_id == User.user_id)
+    if "goal_id" in path_params:
+        return statement.where(Goal.goal_id == int(path_params["goal_id"]))
+    statement = statement.join(Resource, Resource.goal_id == Goal.goal_id)
+    if "resource_id" in path_params:
+        return statement.where(Resource.resource_id == int(path_params["resource_id"]))
+    if "topic_id" in path_params:
+        statement = statement.join(ResourceTopic, ResourceTopic.resource_id == Resource.resource_id)
+        return statement.where(ResourceTopic.topic_id == int(path_params["topic_id"]))
+    return None
+
+def _owner_lookup(request: Request):
+    """(user id named in the path or None, owner statement), or None when there is nothing to check"""
+    if not tracks_writes():
+        return None
+    try:
+        statement = owner_version_statement(request.path_params)
+        user_id = int(request.path_params["user_id"]) if "user_id" in request.path_params else None
+    except ValueError:
+        # Not an id; the route rejects the request without reading anything
+        return None
+    return None if statement is None else (user_id, statement)
+
+def _primary_version_statement(user_id: int):
+    from app.controllers.version_controller import VersionController
+    return VersionController.version_statement(user_id)
+
+def replica_is_current(primary_version: Optional[int], replica_version: Optional[int]) -> bool:
+    # Missing on either side (just created or deleted): the primary has the answer
+    return primary_version is not None and replica_version is not None and replica_version >= primary_version
+
+def reads_from_replica(request: Request, primary, replica) -> bool:
+    """Whether a request's session reads from the replica; `primary` and `replica` are engines"""
+    if not wants_replica(request):
+        return False
+    lookup = _owner_lookup(request)
+    if lookup is None:
+        return True
+    user_id, statement = lookup
+    if user_id is not None and not wrote_recently(user_id):
+        return True
+    with replica.connect() as conn:
+        owner = conn.execute(statement).first()
+    if owner is None:
+        return False
+    if user_id is None and not wrote_recently(owner.user_id):
+        return True
+    with primary.connect() as conn:
+        return replica_is_current(conn.scalar(_primary_version_statement(owner.user_id)), owner.data_version)
+
+async def async_reads_from_replica(request: Request, primary, replica) -> bool:
+    """reads_from_replica over async engines"""
+    if not wants_replica(request):
+        return False
+    lookup = _owner_lookup(request)
+    if lookup is None:
+        return True
+    user_id, statement = lookup
+    if user_id is not None and not await async_wrote_recently(user_id):
+        return True
+    async with replica.connect() as conn:
+        owner = (await conn.execute(statement)).first()
+    if owner is None:
+        return False
+    if user_id is None and not await async_wrote_recently(owner.user_id):
+        return True
+    async with primary.connect() as conn:
+        return replica_is_current(await conn.scalar(_primary_version_statement(owner.user_id)), owner.data_version)
@@ -0,0 +1,179 @@
+"""
+Per-request database and serialization metrics
+
+RequestMetricsMiddleware opens a RequestMetrics for every HTTP request; the engine
+hooks installed by install_engine_hooks() count statements and DB time into it, and
+TimedRoute measures how long FastAPI spends turning the endpoint's return value into
+a response. The totals go out as a Server-Timing header and one JSON log line.
+
+With QUERY_REPEAT_LIMIT > 0 the same statement shape running more than that many
+times in one request (the signature of an N+1 loop) is logged, or raises
+RepeatedQueryError when QUERY_REPEAT_ACTION is "raise" (meant for dev/test).
+"""
+from contextvars import ContextVar
+from collections import Counter
+from functools import wraps
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+from app.config import settings
+import asyncio
+import json
+import logging
+import re
+import time
+
+logger = logging.getLogger("app.request_metrics")
+
+_current: ContextVar = ContextVar("request_metrics", default=None)
+
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|\$\d+|(?<![:\w]):\w+|\?")
+_PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_WHITESPACE = re.compile(r"\s+")
+
+class RepeatedQueryError(RuntimeError):
+    """The same statement shape ran more than QUERY_REPEAT_LIMIT times in one request"""
+
+class RequestMetrics:
+    # Threadpool endpoints run in a copy of the request's context, so they share this
+    # object (not the ContextVar binding) with the middleware
+    def __init__(self):
+        self.statements = 0
+        self.db_time = 0.0
+        self.shapes = Counter()
+        self.repeated = {}
+        self.endpoint_finished = None
+        self.serialization_time = None
+        # Encoding done by the endpoint itself (responses that render their own body)
+        self.render_time = 0.0
+
+    def record_statement(self, statement: str, elapsed: float):
+        self.statements += 1
+        self.db_time += elapsed
+
+        limit = settings.QUERY_REPEAT_LIMIT
+        if limit <= 0:
+            return
+        shape = statement_shape(statement)
+        self.shapes[shape] += 1
+        count = self.shapes[shape]
+        if count > limit:
+            self.repeated[shape] = count
+            if count == limit + 1:
+                if settings.QUERY_REPEAT_ACTION == "raise":
+                    raise RepeatedQueryError(f"Statement ran more than {limit} times in one request: {shape}")
+                logger.warning(json.dumps({"event": "repeated_query", "limit": limit, "statement": shape}))
+
+    def server_timing(self, total: float) -> str:
+        metrics = [f'db;dur={self.db_time * 1000:.2f};desc="{self.statements} statements"']
+        if self.serialization_time is not None:
+            metrics.append(f"serialize;dur={self.serialization_time * 1000:.2f}")
+        metrics.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(metrics)
+
+def current_metrics():
+    return _current.get()
+
+def record_render(seconds: float):
+    """Count time an endpoint spent encoding its own Response body as serialization"""
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.render_time += seconds
+
+def statement_shape(statement: str) -> str:
+    """Normalize a statement so executions that differ only in bound values compare equal"""
+    shape = _PLACEHOLDER.sub("?", statement)
+    shape = _PLACEHOLDER_LIST.sub("?", shape)
+    return _WHITESPACE.sub(" ", shape).strip()
+
+def install_engine_hooks(engine):
+    """Count statements and DB time of `engine` (a sync Engine) into the current request's metrics"""
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.record_statement(statement, elapsed)
+
+class TimedRoute(APIRoute):
+    """APIRoute that records how long validating/serializing the endpoint's result takes
+
+    Endpoints that return a ready Response report their own encoding via record_render().
+    """
+    def get_route_handler(self):
+        call = self.dependant.call
+
+        def finished():
+            metrics = _current.get()
+            if metrics is not None:
+                metrics.endpoint_finished = time.perf_counter()
+
+        # Keep the wrapper's sync/async nature: FastAPI uses it to pick the threadpool
+        if asyncio.iscoroutinefunction(call):
+            @wraps(call)
+            async def timed_call(*args, **kwargs):
+                try:
+                    return await call(*args, **kwargs)
+                finally:
+                    finished()
+        else:
+            @wraps(call)
+            def timed_call(*args, **kwargs):
+                try:
+                    return call(*args, **kwargs)
+                finally:
+                    finished()
+        self.dependant.call = timed_call
+
+        handler = super().get_route_handler()
+
+        async def timed_handler(request):
+            response = await handler(request)
+            metrics = _current.get()
+            if metrics is not None and metrics.endpoint_finished is not None:
+                metrics.serialization_time = time.perf_counter() - metrics.endpoint_finished + metrics.render_time
+            return response
+
+        return timed_handler
+
+class RequestMetricsMiddleware:
+    """Collects RequestMetrics per request and emits them as Server-Timing and a log line"""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        status = {"code": None}
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                MutableHeaders(scope=message).append("Server-Timing", metrics.server_timing(time.perf_counter() - start))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            # Logged after the body is sent so streamed responses include their queries
+            logger.info(json.dumps({
+                "event": "request",
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status["code"],
+                "duration_ms": round((time.perf_counter() - start) * 1000, 2),
+                "db_statements": metrics.statements,
+                "db_ms": round(metrics.db_time * 1000, 2),
+                "serialization_ms": round(metrics.serialization_time * 1000, 2) if metrics.serialization_time is not None else None,
+                "repeated_statements": metrics.repeated or None,
+            }))
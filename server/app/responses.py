@@ -0,0 +1,46 @@
+"""
+JSON responses for endpoints that already build their response schemas
+
+With response_model, FastAPI validates an endpoint's return value against the model
+again and turns it into plain Python with jsonable_encoder before JSONResponse dumps it:
+for the goal tree that is two extra walks over every topic. ValidatedJSONResponse skips
+both and writes the schema objects to JSON bytes in one pass with pydantic-core's
+serializer. Routes keep response_model, which still documents the body in OpenAPI.
+"""
+from functools import lru_cache
+from typing import Any, Optional
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+from app.config import settings
+from app.request_metrics import record_render
+import time
+
+@lru_cache(maxsize=None)
+def adapter_for(annotation) -> TypeAdapter:
+    return TypeAdapter(annotation)
+
+class ValidatedJSONResponse(Response):
+    """Response whose content is already an instance of `annotation` (e.g. List[GoalDetailResponse])"""
+    media_type = "application/json"
+
+    def __init__(self, content: Any, annotation, status_code: int = 200, headers: Optional[dict] = None, exclude_unset: bool = False):
+        self.adapter = adapter_for(annotation)
+        self.exclude_unset = exclude_unset
+        super().__init__(content, status_code=status_code, headers=headers)
+
+    def render(self, content: Any) -> bytes:
+        started = time.perf_counter()
+        body = self.adapter.dump_json(content, exclude_unset=self.exclude_unset)
+        record_render(time.perf_counter() - started)
+        return body
+
+def validated_json(content: Any, annotation, headers: Optional[dict] = None, exclude_unset: bool = False):
+    """Return `content` as a ValidatedJSONResponse, or as is for the response_model path
+    when FAST_JSON_RESPONSES is off. `headers` must carry anything set on the injected
+    Response (e.g. ETags), which FastAPI does not copy onto returned responses.
+
+    exclude_unset writes only the fields set on partial objects (sparse fieldsets); those
+    would fail response_model validation, so they always take the direct path."""
+    if not settings.FAST_JSON_RESPONSES and not exclude_unset:
+        return content
+    return ValidatedJSONResponse(content, annotation, headers=headers, exclude_unset=exclude_unset)
@@ -0,0 +1,112 @@
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app.schemas.goal import GoalCreate, GoalUpdate, GoalResponse, GoalSummaryResponse, GoalDetailResponse, GoalHistoryResponse
+from app.schemas.imports import ImportReport
+from app.controllers.async_goal_controller import AsyncGoalController
+from app.controllers.version_controller import AsyncVersionController
+from app.controllers.progress_controller import AsyncProgressController
+from app.controllers.import_controller import AsyncImportController
+from app.routes.goal_routes import NDJSON_MEDIA_TYPE, wants_ndjson
+from app.etags import tree_etag, query_tag, check_not_modified
+from app.request_metrics import TimedRoute
+from app.pagination import PageRequest, page_request
+from app.detail_shape import DetailShape, detail_shape
+from app.imports import import_format
+from app.responses import validated_json
+from typing import List, Optional
+from datetime import date
+
+router = APIRouter(route_class=TimedRoute)
+
+def goal_tree_etag(kind: str, daily: bool = False, negotiated: bool = False, query: tuple = ()):
+    """Dependency that answers 304 when the user's goal tree is unchanged (see goal_routes.goal_tree_etag)"""
+    async def dependency(user_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)) -> dict:
+        version = await AsyncVersionController.user_version(db, user_id)
+        if version is None:
+            return {}
+        representation = f"{kind}.ndjson" if negotiated and wants_ndjson(request) else kind
+        representation += query_tag(request, query)
+        return check_not_modified(
+            request, response, tree_etag(representation, user_id, version, daily), vary="Accept" if negotiated else None
+        )
+    return dependency
+
+@router.post("/", response_model=GoalResponse)
+async def create_goal(goal: GoalCreate, db: AsyncSession = Depends(get_async_db)):
+    """Create a new goal"""
+    return await AsyncGoalController.create_goal(db, goal)
+
+@router.get("/user/{user_id}", response_model=List[GoalResponse], dependencies=[Depends(goal_tree_etag("goals", query=("limit", "cursor")))])
+async def get_goals_by_user(user_id: int, page: PageRequest = Depends(page_request), db: AsyncSession = Depends(get_async_db)):
+    """Get all goals for a user, oldest first (?limit= pages them; see the X-Next-Cursor header)"""
+    return page.respond(await AsyncGoalController.get_goals_by_user(db, user_id, page.limit, page.cursor))
+
+@router.get("/user/{user_id}/details", response_model=List[GoalDetailResponse])
+async def get_goals_with_details(
+    user_id: int,
+    request: Request,
+    shape: DetailShape = Depends(detail_shape),
+    db: AsyncSession = Depends(get_async_db),
+    cache_headers: dict = Depends(goal_tree_etag("details", daily=True, negotiated=True, query=("depth", "fields")))
+):
+    """Get all goals with resources and topics for a user (nested structure with calculated fields)
+
+    `depth=goal|resources|full` and `fields=title,resources.title,topics.is_completed,...` limit
+    what is loaded and returned. Send `Accept: application/x-ndjson` to stream one goal per line
+    instead of a single JSON array. Responses carry an ETag; send it back in `If-None-Match` to
+    get 304 while nothing changed.
+    """
+    if wants_ndjson(request):
+        if shape.sparse:
+            goals = await AsyncGoalController.get_goals_with_details(db, user_id, shape)
+            return StreamingResponse(
+                (goal.model_dump_json(exclude_unset=True) + "\n" for goal in goals), media_type=NDJSON_MEDIA_TYPE, headers=cache_headers
+            )
+        async def lines():
+            async for goal in AsyncGoalController.stream_goals_with_details(db, user_id):
+                yield goal.model_dump_json() + "\n"
+        return StreamingResponse(lines(), media_type=NDJSON_MEDIA_TYPE, headers=cache_headers)
+    return validated_json(
+        await AsyncGoalController.get_goals_with_details(db, user_id, shape), List[GoalDetailResponse], cache_headers, exclude_unset=shape.sparse
+    )
+
+@router.get("/user/{user_id}/summary", response_model=List[GoalSummaryResponse])
+async def get_goals_summary(
+    user_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    cache_headers: dict = Depends(goal_tree_etag("summary", daily=True))
+):
+    """Get headline metrics for all goals of a user (no nested resources/topics)"""
+    return validated_json(await AsyncGoalController.get_goals_summary(db, user_id), List[GoalSummaryResponse], cache_headers)
+
+@router.get("/{goal_id}", response_model=GoalResponse)
+async def get_goal(goal_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Get goal by ID"""
+    return await AsyncGoalController.get_goal(db, goal_id)
+
+@router.put("/{goal_id}", response_model=GoalResponse)
+async def update_goal(goal_id: int, goal_update: GoalUpdate, db: AsyncSession = Depends(get_async_db)):
+    """Update goal"""
+    return await AsyncGoalController.update_goal(db, goal_id, goal_update)
+
+@router.delete("/{goal_id}")
+async def delete_goal(goal_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Delete goal"""
+    return await AsyncGoalController.delete_goal(db, goal_id)
+
+@router.get("/{goal_id}/history", response_model=GoalHistoryResponse)
+async def get_goal_history(
+    goal_id: int,
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get completed points per day for a goal (defaults to the last 90 days)"""
+    return await AsyncProgressController.get_goal_history(db, goal_id, from_date, to_date)
+
+@router.post("/{goal_id}/import", response_model=ImportReport)
+async def import_resources(goal_id: int, request: Request, format: str = Depends(import_format), db: AsyncSession = Depends(get_async_db)):
+    """Stream a CSV or NDJSON file of resources and topics into a goal"""
+    return await AsyncImportController.import_rows(db, goal_id, request.stream(), format)
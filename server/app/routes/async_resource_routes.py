@@ -0,0 +1,35 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app.schemas.resource import ResourceCreate, ResourceUpdate, ResourceResponse
+from app.controllers.async_resource_controller import AsyncResourceController
+from app.request_metrics import TimedRoute
+from app.pagination import PageRequest, page_request
+from typing import List
+
+router = APIRouter(route_class=TimedRoute)
+
+@router.post("/", response_model=ResourceResponse)
+async def create_resource(resource: ResourceCreate, db: AsyncSession = Depends(get_async_db)):
+    """Create a new resource"""
+    return await AsyncResourceController.create_resource(db, resource)
+
+@router.get("/goal/{goal_id}", response_model=List[ResourceResponse])
+async def get_resources_by_goal(goal_id: int, page: PageRequest = Depends(page_request), db: AsyncSession = Depends(get_async_db)):
+    """Get all resources for a goal, oldest first (?limit= pages them; see the X-Next-Cursor header)"""
+    return page.respond(await AsyncResourceController.get_resources_by_goal(db, goal_id, page.limit, page.cursor))
+
+@router.get("/{resource_id}", response_model=ResourceResponse)
+async def get_resource(resource_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Get resource by ID"""
+    return await AsyncResourceController.get_resource(db, resource_id)
+
+@router.put("/{resource_id}", response_model=ResourceResponse)
+async def update_resource(resource_id: int, resource_update: ResourceUpdate, db: AsyncSession = Depends(get_async_db)):
+    """Update resource"""
+    return await AsyncResourceController.update_resource(db, resource_id, resource_update)
+
+@router.delete("/{resource_id}")
+async def delete_resource(resource_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Delete resource"""
+    return await AsyncResourceController.delete_resource(db, resource_id)
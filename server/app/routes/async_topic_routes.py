@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app.schemas.topic import TopicCreate, TopicUpdate, TopicResponse, BulkTopicCreate, TopicStatusUpdate
+from app.controllers.async_topic_controller import AsyncTopicController
+from app.request_metrics import TimedRoute
+from app.pagination import PageRequest, page_request
+from typing import List
+
+router = APIRouter(route_class=TimedRoute)
+
+@router.post("/", response_model=TopicResponse)
+async def create_topic(topic: TopicCreate, db: AsyncSession = Depends(get_async_db)):
+    """Create a new topic"""
+    return await AsyncTopicController.create_topic(db, topic)
+
+@router.post("/bulk", response_model=List[TopicResponse])
+async def bulk_create_topics(bulk_data: BulkTopicCreate, db: AsyncSession = Depends(get_async_db)):
+    """Create multiple topics for a resource in one call"""
+    return await AsyncTopicController.bulk_create_topics(db, bulk_data)
+
+@router.get("/resource/{resource_id}", response_model=List[TopicResponse])
+async def get_topics_by_resource(resource_id: int, page: PageRequest = Depends(page_request), db: AsyncSession = Depends(get_async_db)):
+    """Get all topics for a resource, oldest first (?limit= pages them; see the X-Next-Cursor header)"""
+    return page.respond(await AsyncTopicController.get_topics_by_resource(db, resource_id, page.limit, page.cursor))
+
+@router.get("/{topic_id}", response_model=TopicResponse)
+async def get_topic(topic_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Get topic by ID"""
+    return await AsyncTopicController.get_topic(db, topic_id)
+
+@router.put("/{topic_id}", response_model=TopicResponse)
+async def update_topic(topic_id: int, topic_update: TopicUpdate, db: AsyncSession = Depends(get_async_db)):
+    """Update topic"""
+    return await AsyncTopicController.update_topic(db, topic_id, topic_update)
+
+@router.patch("/{topic_id}/status", response_model=TopicResponse)
+async def update_topic_status(topic_id: int, status_update: TopicStatusUpdate, db: AsyncSession = Depends(get_async_db)):
+    """Update topic's completion and skipped status"""
+    return await AsyncTopicController.update_topic_status(db, topic_id, status_update)
+
+@router.delete("/{topic_id}")
+async def delete_topic(topic_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Delete topic"""
+    return await AsyncTopicController.delete_topic(db, topic_id)
@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app.schemas.user import UserCreate, UserUpdate, UserResponse, UserLogin, ChangePassword
+from app.controllers.async_user_controller import AsyncUserController
+from app.controllers.export_controller import AsyncExportController
+from app.exports import export_response
+from app.request_metrics import TimedRoute
+
+router = APIRouter(route_class=TimedRoute)
+
+@router.post("/signup", response_model=UserResponse)
+async def signup(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
+    """Create a new user account"""
+    return await AsyncUserController.create_user(db, user)
+
+@router.post("/login", response_model=UserResponse)
+async def login(login_data: UserLogin, db: AsyncSession = Depends(get_async_db)):
+    """Login user"""
+    return await AsyncUserController.login(db, login_data)
+
+@router.get("/{user_id}", response_model=UserResponse)
+async def get_user(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Get user by ID"""
+    return await AsyncUserController.get_user(db, user_id)
+
+@router.get("/{user_id}/export")
+async def export_account(user_id: int, request: Request, format: str = Query("ndjson", pattern="^(ndjson|csv)$"), db: AsyncSession = Depends(get_async_db)):
+    """Stream all goals, resources and topics of a user as NDJSON or CSV (gzipped with Accept-Encoding: gzip)"""
+    return export_response(request, user_id, format, await AsyncExportController.export(db, user_id, format))
+
+@router.put("/{user_id}", response_model=UserResponse)
+async def update_user(user_id: int, user_update: UserUpdate, db: AsyncSession = Depends(get_async_db)):
+    """Update user profile (without password)"""
+    return await AsyncUserController.update_user(db, user_id, user_update)
+
+@router.put("/{user_id}/change-password", response_model=UserResponse)
+async def change_password(user_id: int, password_data: ChangePassword, db: AsyncSession = Depends(get_async_db)):
+    """Change user password"""
+    return await AsyncUserController.change_password(db, user_id, password_data)
+
+@router.delete("/{user_id}")
+async def delete_user(user_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Delete user account"""
+    return await AsyncUserController.delete_user(db, user_id)
@@ -1,26 +1,88 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.schemas.goal import GoalCreate, GoalUpdate, GoalResponse, GoalDetailResponse
+from app.schemas.goal import GoalCreate, GoalUpdate, GoalResponse, GoalSummaryResponse, GoalDetailResponse, GoalHistoryResponse
+from app.schemas.imports import ImportReport
 from app.controllers.goal_controller import GoalController
-from typing import List
+from app.controllers.version_controller import VersionController
+from app.controllers.progress_controller import ProgressController
+from app.controllers.import_controller import ImportController
+from app.etags import tree_etag, query_tag, check_not_modified
+from app.request_metrics import TimedRoute
+from app.pagination import PageRequest, page_request
+from app.detail_shape import DetailShape, detail_shape
+from app.imports import import_format, request_chunks
+from app.responses import validated_json
+from typing import List, Optional
+from datetime import date
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+def wants_ndjson(request: Request) -> bool:
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+def goal_tree_etag(kind: str, daily: bool = False, negotiated: bool = False, query: tuple = ()):
+    """Dependency that answers 304 when the user's goal tree is unchanged, before the endpoint runs"""
+    def dependency(user_id: int, request: Request, response: Response, db: Session = Depends(get_db)) -> dict:
+        # Read the version before the tree: a write landing in between then costs a
+        # resend on the next poll instead of pinning stale data to a newer tag
+        version = VersionController.user_version(db, user_id)
+        if version is None:
+            return {}
+        representation = f"{kind}.ndjson" if negotiated and wants_ndjson(request) else kind
+        representation += query_tag(request, query)
+        return check_not_modified(
+            request, response, tree_etag(representation, user_id, version, daily), vary="Accept" if negotiated else None
+        )
+    return dependency
 
 @router.post("/", response_model=GoalResponse)
 def create_goal(goal: GoalCreate, db: Session = Depends(get_db)):
     """Create a new goal"""
     return GoalController.create_goal(db, goal)
 
-@router.get("/user/{user_id}", response_model=List[GoalResponse])
-def get_goals_by_user(user_id: int, db: Session = Depends(get_db)):
-    """Get all goals for a user"""
-    return GoalController.get_goals_by_user(db, user_id)
+@router.get("/user/{user_id}", response_model=List[GoalResponse], dependencies=[Depends(goal_tree_etag("goals", query=("limit", "cursor")))])
+def get_goals_by_user(user_id: int, page: PageRequest = Depends(page_request), db: Session = Depends(get_db)):
+    """Get all goals for a user, oldest first (?limit= pages them; see the X-Next-Cursor header)"""
+    return page.respond(GoalController.get_goals_by_user(db, user_id, page.limit, page.cursor))
 
 @router.get("/user/{user_id}/details", response_model=List[GoalDetailResponse])
-def get_goals_with_details(user_id: int, db: Session = Depends(get_db)):
-    """Get all goals with resources and topics for a user (nested structure with calculated fields)"""
-    return GoalController.get_goals_with_details(db, user_id)
+def get_goals_with_details(
+    user_id: int,
+    request: Request,
+    shape: DetailShape = Depends(detail_shape),
+    db: Session = Depends(get_db),
+    cache_headers: dict = Depends(goal_tree_etag("details", daily=True, negotiated=True, query=("depth", "fields")))
+):
+    """Get all goals with resources and topics for a user (nested structure with calculated fields)
+
+    `depth=goal|resources|full` and `fields=title,resources.title,topics.is_completed,...` limit
+    what is loaded and returned. Send `Accept: application/x-ndjson` to stream one goal per line
+    instead of a single JSON array. Responses carry an ETag; send it back in `If-None-Match` to
+    get 304 while nothing changed.
+    """
+    if wants_ndjson(request):
+        goals = GoalController.get_goals_with_details(db, user_id, shape) if shape.sparse else GoalController.stream_goals_with_details(db, user_id)
+        return StreamingResponse(
+            (goal.model_dump_json(exclude_unset=shape.sparse) + "\n" for goal in goals),
+            media_type=NDJSON_MEDIA_TYPE,
+            headers=cache_headers
+        )
+    return validated_json(
+        GoalController.get_goals_with_details(db, user_id, shape), List[GoalDetailResponse], cache_headers, exclude_unset=shape.sparse
+    )
+
+@router.get("/user/{user_id}/summary", response_model=List[GoalSummaryResponse])
+def get_goals_summary(
+    user_id: int,
+    db: Session = Depends(get_db),
+    cache_headers: dict = Depends(goal_tree_etag("summary", daily=True))
+):
+    """Get headline metrics for all goals of a user (no nested resources/topics)"""
+    return validated_json(GoalController.get_goals_summary(db, user_id), List[GoalSummaryResponse], cache_headers)
 
 @router.get("/{goal_id}", response_model=GoalResponse)
 def get_goal(goal_id: int, db: Session = Depends(get_db)):
@@ -36,3 +98,18 @@ def update_goal(goal_id: int, goal_update: GoalUpdate, db: Session = Depends(get
 def delete_goal(goal_id: int, db: Session = Depends(get_db)):
     """Delete goal"""
     return GoalController.delete_goal(db, goal_id)
+
+@router.get("/{goal_id}/history", response_model=GoalHistoryResponse)
+def get_goal_history(
+    goal_id: int,
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
+    db: Session = Depends(get_db)
+):
+    """Get completed points per day for a goal (defaults to the last 90 days)"""
+    return ProgressController.get_goal_history(db, goal_id, from_date, to_date)
+
+@router.post("/{goal_id}/import", response_model=ImportReport)
+def import_resources(goal_id: int, request: Request, format: str = Depends(import_format), db: Session = Depends(get_db)):
+    """Stream a CSV or NDJSON file of resources and topics into a goal"""
+    return ImportController.import_rows(db, goal_id, request_chunks(request), format)
@@ -3,9 +3,11 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app.schemas.resource import ResourceCreate, ResourceUpdate, ResourceResponse
 from app.controllers.resource_controller import ResourceController
+from app.request_metrics import TimedRoute
+from app.pagination import PageRequest, page_request
 from typing import List
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.post("/", response_model=ResourceResponse)
 def create_resource(resource: ResourceCreate, db: Session = Depends(get_db)):
@@ -13,9 +15,9 @@ def create_resource(resource: ResourceCreate, db: Session = Depends(get_db)):
     return ResourceController.create_resource(db, resource)
 
 @router.get("/goal/{goal_id}", response_model=List[ResourceResponse])
-def get_resources_by_goal(goal_id: int, db: Session = Depends(get_db)):
-    """Get all resources for a goal"""
-    return ResourceController.get_resources_by_goal(db, goal_id)
+def get_resources_by_goal(goal_id: int, page: PageRequest = Depends(page_request), db: Session = Depends(get_db)):
+    """Get all resources for a goal, oldest first (?limit= pages them; see the X-Next-Cursor header)"""
+    return page.respond(ResourceController.get_resources_by_goal(db, goal_id, page.limit, page.cursor))
 
 @router.get("/{resource_id}", response_model=ResourceResponse)
 def get_resource(resource_id: int, db: Session = Depends(get_db)):
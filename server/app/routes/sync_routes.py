@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from app.database import get_db
+from app.schemas.sync import SyncResponse
+from app.controllers.sync_controller import SyncController
+from app.request_metrics import TimedRoute
+from app.responses import validated_json
+from typing import Optional
+
+router = APIRouter(route_class=TimedRoute)
+
+@router.get("/{user_id}", response_model=SyncResponse)
+def sync_changes(user_id: int, since: Optional[str] = None, db: Session = Depends(get_db)):
+    """Get the user's goals, resources and topics changed or deleted since a cursor (everything without one)"""
+    return validated_json(SyncController.get_changes(db, user_id, since), SyncResponse)
@@ -1,11 +1,13 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.schemas.topic import TopicCreate, TopicUpdate, TopicResponse, BulkTopicCreate, TopicStatusUpdate
+from app.schemas.topic import TopicCreate, TopicUpdate, TopicResponse, BulkTopicCreate, TopicStatusUpdate, TopicStatusBatchItem
 from app.controllers.topic_controller import TopicController
+from app.request_metrics import TimedRoute
+from app.pagination import PageRequest, page_request
 from typing import List
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.post("/", response_model=TopicResponse)
 def create_topic(topic: TopicCreate, db: Session = Depends(get_db)):
@@ -18,9 +20,9 @@ def bulk_create_topics(bulk_data: BulkTopicCreate, db: Session = Depends(get_db)
     return TopicController.bulk_create_topics(db, bulk_data)
 
 @router.get("/resource/{resource_id}", response_model=List[TopicResponse])
-def get_topics_by_resource(resource_id: int, db: Session = Depends(get_db)):
-    """Get all topics for a resource"""
-    return TopicController.get_topics_by_resource(db, resource_id)
+def get_topics_by_resource(resource_id: int, page: PageRequest = Depends(page_request), db: Session = Depends(get_db)):
+    """Get all topics for a resource, oldest first (?limit= pages them; see the X-Next-Cursor header)"""
+    return page.respond(TopicController.get_topics_by_resource(db, resource_id, page.limit, page.cursor))
 
 @router.get("/{topic_id}", response_model=TopicResponse)
 def get_topic(topic_id: int, db: Session = Depends(get_db)):
@@ -32,6 +34,11 @@ def update_topic(topic_id: int, topic_update: TopicUpdate, db: Session = Depends
     """Update topic"""
     return TopicController.update_topic(db, topic_id, topic_update)
 
+@router.patch("/status", response_model=List[TopicResponse])
+def batch_update_topic_status(updates: List[TopicStatusBatchItem], db: Session = Depends(get_db)):
+    """Update completion/skipped status of many topics in a single transaction"""
+    return TopicController.batch_update_topic_status(db, updates)
+
 @router.patch("/{topic_id}/status", response_model=TopicResponse)
 def update_topic_status(topic_id: int, status_update: TopicStatusUpdate, db: Session = Depends(get_db)):
     """Update topic's completion and skipped status"""
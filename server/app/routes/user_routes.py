@@ -1,11 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.schemas.user import UserCreate, UserUpdate, UserResponse, UserLogin, ChangePassword
 from app.controllers.user_controller import UserController
+from app.controllers.export_controller import ExportController
+from app.request_metrics import TimedRoute
+from app.events import event_stream
+from app.exports import export_response
 from typing import List
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.post("/signup", response_model=UserResponse)
 def signup(user: UserCreate, db: Session = Depends(get_db)):
@@ -22,6 +27,23 @@ def get_user(user_id: int, db: Session = Depends(get_db)):
     """Get user by ID"""
     return UserController.get_user(db, user_id)
 
+@router.get("/{user_id}/events")
+async def user_events(user_id: int):
+    """Stream change events of the user's goals, resources and topics (Server-Sent Events)
+
+    Each event names the ids written and carries the updated goal/resource point rollups.
+    """
+    return StreamingResponse(
+        event_stream(user_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/{user_id}/export")
+def export_account(user_id: int, request: Request, format: str = Query("ndjson", pattern="^(ndjson|csv)$"), db: Session = Depends(get_db)):
+    """Stream all goals, resources and topics of a user as NDJSON or CSV (gzipped with Accept-Encoding: gzip)"""
+    return export_response(request, user_id, format, ExportController.export(db, user_id, format))
+
 @router.put("/{user_id}", response_model=UserResponse)
 def update_user(user_id: int, user_update: UserUpdate, db: Session = Depends(get_db)):
     """Update user profile (without password)"""
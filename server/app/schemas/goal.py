@@ -63,7 +63,7 @@ class ResourceDetail(BaseModel):
     class Config:
         from_attributes = True
 
-class GoalDetailResponse(GoalBase):
+class GoalSummaryResponse(GoalBase):
     goal_id: int
     user_id: int
     goals_total_points: float
@@ -78,8 +78,23 @@ class GoalDetailResponse(GoalBase):
     todays_completed_points: float
     todays_completed_value: float
     todays_completion_percentage: Optional[float]
-    resources: List[ResourceDetail]
     created_at: datetime
 
     class Config:
         from_attributes = True
+
+class GoalDetailResponse(GoalSummaryResponse):
+    resources: List[ResourceDetail]
+
+class DailyProgressPoint(BaseModel):
+    day: date
+    completed_points: float
+    completed_topics: int
+    # Completed points of the goal up to and including this day
+    cumulative_points: float
+
+class GoalHistoryResponse(BaseModel):
+    goal_id: int
+    from_date: date
+    to_date: date
+    days: List[DailyProgressPoint]
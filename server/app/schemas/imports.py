@@ -0,0 +1,35 @@
+from pydantic import BaseModel
+from typing import Optional, List
+from datetime import datetime
+
+class ImportRow(BaseModel):
+    # Title of the resource; rows naming the same resource (new or already in the goal) share it
+    resource: str
+    # Resource fields, taken from the first row of a new resource
+    resource_type: Optional[str] = None
+    value_per_unit: Optional[int] = 0
+    total_time_per_unit: Optional[str] = None
+    resource_link: Optional[str] = None
+    note: Optional[str] = None
+    # Topic title; a row without one only creates the resource
+    topic: Optional[str] = None
+    point_multiplier: Optional[float] = 1.0
+    is_completed: Optional[bool] = False
+    is_skipped: Optional[bool] = False
+    complete_date: Optional[datetime] = None
+
+RESOURCE_FIELDS = ("resource_type", "value_per_unit", "total_time_per_unit", "resource_link", "note")
+TOPIC_FIELDS = ("point_multiplier", "is_completed", "is_skipped", "complete_date")
+
+class ImportRowError(BaseModel):
+    # 1-based line of the file (the CSV header is line 1)
+    line: int
+    error: str
+
+class ImportReport(BaseModel):
+    rows: int = 0
+    resources_created: int = 0
+    topics_created: int = 0
+    rejected: int = 0
+    # The first IMPORT_MAX_ERRORS rejected rows; `rejected` counts them all
+    errors: List[ImportRowError] = []
@@ -0,0 +1,43 @@
+from pydantic import BaseModel, field_validator
+from typing import Optional, List
+from datetime import datetime
+from app.schemas.goal import GoalResponse
+from app.schemas.resource import ResourceResponse
+from app.schemas.topic import TopicResponse
+
+class SyncGoal(GoalResponse):
+    goals_total_points: float
+    completed_points_goal: float
+    updated_at: Optional[datetime]
+
+class SyncResource(ResourceResponse):
+    total_topic_points: float
+    completed_points_resources: float
+    updated_at: Optional[datetime]
+
+    @field_validator("total_time_per_unit", mode="before")
+    @classmethod
+    def interval_as_string(cls, value):
+        return str(value) if value else None
+
+class SyncTopic(TopicResponse):
+    updated_at: Optional[datetime]
+
+class SyncDeletion(BaseModel):
+    # "goal", "resource" or "topic"; the children of a deleted goal/resource are gone too
+    entity_type: str
+    entity_id: int
+    deleted_at: datetime
+
+    class Config:
+        from_attributes = True
+
+class SyncResponse(BaseModel):
+    # Pass as ?since= on the next sync
+    cursor: str
+    # True when no cursor was given: the lists hold the whole tree and nothing is deleted
+    full: bool
+    goals: List[SyncGoal]
+    resources: List[SyncResource]
+    topics: List[SyncTopic]
+    deleted: List[SyncDeletion]
@@ -23,6 +23,9 @@ class TopicStatusUpdate(BaseModel):
     is_completed: Optional[bool] = None
     is_skipped: Optional[bool] = None
 
+class TopicStatusBatchItem(TopicStatusUpdate):
+    topic_id: int
+
 class TopicResponse(TopicBase):
     topic_id: int
     resource_id: int
@@ -0,0 +1 @@
+"""Benchmarks for the Goal Tracker API (run from the server directory, e.g. python -m benchmarks.bulk_insert)"""
@@ -0,0 +1,98 @@
+"""
+Round trips and latency of TopicController.bulk_create_topics as the batch grows
+
+Compares the INSERT ... RETURNING path with the previous add()/commit()/refresh()
+loop, counting every statement sent to the database.
+
+Usage:
+    python -m benchmarks.bulk_insert [--database-url URL] [--sizes 10,100,1000,5000] [--output results.json]
+"""
+import os
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import argparse
+import json
+import tempfile
+import time
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session
+from app.database import Base
+from app.models import User, Goal, Resource, ResourceTopic
+from app.schemas.topic import BulkTopicCreate, TopicBase
+from app.controllers.topic_controller import TopicController
+
+def legacy_bulk_create(db: Session, bulk_data: BulkTopicCreate):
+    """The pre-RETURNING implementation: one INSERT batch, then one SELECT per topic"""
+    db_topics = [ResourceTopic(resource_id=bulk_data.resource_id, **topic.model_dump()) for topic in bulk_data.topics]
+    db.add_all(db_topics)
+    db.commit()
+    for topic in db_topics:
+        db.refresh(topic)
+    return db_topics
+
+def run(database_url: str, sizes):
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine)
+
+    statements = {"count": 0}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements["count"] += 1
+
+    with Session(engine) as db:
+        user = User(name="Bench", email=f"bench-{time.time_ns()}@example.com", password="x")
+        db.add(user)
+        db.flush()
+        goal = Goal(user_id=user.user_id, title="Bench goal")
+        db.add(goal)
+        db.flush()
+        resource = Resource(goal_id=goal.goal_id, title="Bench resource", value_per_unit=1)
+        db.add(resource)
+        db.commit()
+        resource_id = resource.resource_id
+
+    results = []
+    for size in sizes:
+        bulk_data = BulkTopicCreate(
+            resource_id=resource_id,
+            topics=[TopicBase(title=f"Topic {i}", point_multiplier=1.0) for i in range(size)]
+        )
+        for name, create in (("returning", TopicController.bulk_create_topics), ("legacy", legacy_bulk_create)):
+            with Session(engine) as db:
+                statements["count"] = 0
+                start = time.perf_counter()
+                created = create(db, bulk_data)
+                elapsed = time.perf_counter() - start
+                # Serializing the legacy objects would reload them again; count only the call itself
+                assert len(created) == size
+            results.append({
+                "implementation": name,
+                "batch_size": size,
+                "statements": statements["count"],
+                "elapsed_ms": round(elapsed * 1000, 2),
+            })
+
+    engine.dispose()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database-url", default=None, help="Defaults to a temporary SQLite file")
+    parser.add_argument("--sizes", default="10,100,1000,5000", help="Comma-separated batch sizes")
+    parser.add_argument("--output", default=None, help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    with tempfile.TemporaryDirectory() as tmp:
+        results = run(args.database_url or f"sqlite:///{os.path.join(tmp, 'bench.db')}", sizes)
+
+    print(f"{'implementation':<15}{'batch':>8}{'statements':>12}{'ms':>10}")
+    for row in results:
+        print(f"{row['implementation']:<15}{row['batch_size']:>8}{row['statements']:>12}{row['elapsed_ms']:>10}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
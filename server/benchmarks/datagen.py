@@ -0,0 +1,128 @@
+"""
+Seeded synthetic data: users -> goals -> resources -> topics
+
+The same seed and sizes always produce the same rows (apart from database-assigned ids
+and created_at), with the goal/resource point rollups filled in consistently so the
+data is indistinguishable from rows written through the API.
+
+Usage:
+    python -m benchmarks.datagen --database-url URL [--users 1] [--goals 5] [--resources 4] [--topics 25] [--seed 0]
+"""
+import os
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import argparse
+import json
+import random
+from datetime import date, datetime, timedelta, timezone
+from typing import List
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from app.database import Base
+from app.models import User, Goal, Resource, ResourceTopic
+from app.controllers.rollup_controller import RollupController
+from app.controllers.progress_controller import ProgressController
+
+RESOURCE_TYPES = ["book", "course", "video", "article", "practice"]
+PASSWORD = "benchmark"
+
+def generate(
+    db: Session,
+    users: int = 1,
+    goals_per_user: int = 5,
+    resources_per_goal: int = 4,
+    topics_per_resource: int = 25,
+    completed_ratio: float = 0.5,
+    seed: int = 0,
+) -> List[int]:
+    """Insert the synthetic users and their trees (with rollups and daily progress buckets),
+    commit, and return the new user ids.
+
+    Completed topics get a complete_date within the last 30 days, about a tenth of them today.
+    """
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    created = []
+
+    for u in range(users):
+        user = User(
+            name=f"Benchmark User {u}",
+            email=f"user-{seed}-{u}@bench.example.com",
+            password=PASSWORD,
+            occupation=rng.choice(["student", "engineer", "designer", None]),
+        )
+        for g in range(goals_per_user):
+            goal = Goal(
+                title=f"Goal {g}",
+                description=f"Synthetic goal {g} of user {u}",
+                reward_type=rng.choice(["points", "money", None]),
+                target_value=float(rng.randint(10, 1000)),
+                initial_value=0.0,
+                domain_name=rng.choice(["programming", "language", "music", "fitness"]),
+                initial_date=date.today() - timedelta(days=rng.randint(0, 90)),
+                target_date=date.today() + timedelta(days=rng.randint(1, 365)),
+            )
+            for r in range(resources_per_goal):
+                resource = Resource(
+                    title=f"Resource {r}",
+                    resource_type=rng.choice(RESOURCE_TYPES),
+                    value_per_unit=rng.randint(1, 10),
+                    total_time_per_unit=timedelta(minutes=rng.choice([15, 30, 45, 60])),
+                )
+                for t in range(topics_per_resource):
+                    is_completed = rng.random() < completed_ratio
+                    complete_date = None
+                    if is_completed:
+                        days_ago = 0 if rng.random() < 0.1 else rng.randint(1, 30)
+                        complete_date = now - timedelta(days=days_ago, minutes=rng.randint(0, 600))
+                    topic = ResourceTopic(
+                        title=f"Topic {t}",
+                        point_multiplier=rng.choice([0.5, 1.0, 1.5, 2.0]),
+                        is_completed=is_completed,
+                        is_skipped=False,
+                        complete_date=complete_date,
+                    )
+                    resource.topics.append(topic)
+
+                    total, completed = RollupController.topic_points(
+                        resource.value_per_unit, topic.point_multiplier, topic.is_completed
+                    )
+                    resource.total_topic_points = (resource.total_topic_points or 0) + total
+                    resource.completed_points_resources = (resource.completed_points_resources or 0) + completed
+                goal.goals_total_points = (goal.goals_total_points or 0) + (resource.total_topic_points or 0)
+                goal.completed_points_goal = (goal.completed_points_goal or 0) + (resource.completed_points_resources or 0)
+                goal.resources.append(resource)
+            user.goals.append(goal)
+
+        db.add(user)
+        # One flush per user keeps the unit of work (and memory) bounded for large runs
+        db.flush()
+        created.append(user.user_id)
+
+    db.commit()
+    for user_id in created:
+        ProgressController.rebuild(db, user_id=user_id)
+    return created
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--users", type=int, default=1)
+    parser.add_argument("--goals", type=int, default=5, help="Goals per user")
+    parser.add_argument("--resources", type=int, default=4, help="Resources per goal")
+    parser.add_argument("--topics", type=int, default=25, help="Topics per resource")
+    parser.add_argument("--completed-ratio", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        user_ids = generate(
+            db, args.users, args.goals, args.resources, args.topics, args.completed_ratio, args.seed
+        )
+    engine.dispose()
+    print(json.dumps({"user_ids": user_ids}))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+"""
+Endpoint benchmark: latency percentiles, throughput, query count and memory per endpoint
+
+Seeds a database with benchmarks.datagen, then drives every route of the routers in
+app/routes through the ASGI app (FastAPI TestClient, no network) and reports, per
+endpoint: p50/p95/p99 latency, throughput, SQL statements per request, peak RSS of the
+process and peak Python allocations of a single request.
+
+Each (database, mode) target runs in its own subprocess, because the app binds its
+engine to DATABASE_URL at import. By default the targets are a temporary SQLite file
+plus BENCH_POSTGRES_URL when set (e.g. a throwaway local/docker Postgres); pass
+--database-url (repeatable) to choose them. The async routers are benchmarked with
+--modes sync,async.
+
+Usage:
+    python -m benchmarks.harness [--database-url URL ...] [--modes sync,async] [--requests 50]
+                                 [--goals 5] [--resources 4] [--topics 25] [--seed 0] [--reset] [--output results.json]
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Open-ended streams have no latency to measure (and TestClient waits for the end of a body)
+STREAMING_ROUTES = {("GET", "/api/users/{user_id}/events")}
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+def endpoints(client, ids):
+    """(name, method, route path, prepare) for every benchmarked endpoint.
+
+    prepare(i) runs untimed before the i-th request and returns (url, body, headers), where
+    the body is JSON unless it is already str/bytes (sent as is, e.g. an import file);
+    create/delete endpoints work on a scratch user so the seeded tree keeps its size.
+    """
+    user_id, goal_id, resource_id, topic_ids = ids["user_id"], ids["goal_id"], ids["resource_id"], ids["topic_ids"]
+    scratch = ids["scratch"]
+    email = ids["email"]
+    password = ids["password"]
+
+    def new_user(i):
+        return client.post("/api/users/signup", json={
+            "name": "Scratch", "email": f"delete-{i}-{time.time_ns()}@bench.example.com", "password": "x"
+        }).json()["user_id"]
+
+    def new_goal(i):
+        return client.post("/api/goals/", json={"title": f"Delete {i}", "user_id": scratch["user_id"], "target_value": 10}).json()["goal_id"]
+
+    def new_resource(i):
+        return client.post("/api/resources/", json={"title": f"Delete {i}", "goal_id": scratch["goal_id"], "value_per_unit": 2}).json()["resource_id"]
+
+    def new_topic(i):
+        return client.post("/api/topics/", json={"title": f"Delete {i}", "resource_id": scratch["resource_id"]}).json()["topic_id"]
+
+    def sync_cursor(i):
+        return client.get(f"/api/sync/{user_id}").json()["cursor"]
+
+    def import_body(i, format):
+        rows = [{"resource": f"Import {i}.{n // 25}", "value_per_unit": 2, "topic": f"Topic {n}"} for n in range(50)]
+        if format == "csv":
+            return "resource,value_per_unit,topic\n" + "".join(f"{row['resource']},2,{row['topic']}\n" for row in rows)
+        return "".join(json.dumps(row) + "\n" for row in rows)
+
+    batch = topic_ids[:50]
+    return [
+        ("users.signup", "POST", "/api/users/signup", lambda i: (
+            "/api/users/signup", {"name": "New", "email": f"signup-{i}-{time.time_ns()}@bench.example.com", "password": "x"}, None)),
+        ("users.login", "POST", "/api/users/login", lambda i: (
+            "/api/users/login", {"email": email, "password": password}, None)),
+        ("users.get", "GET", "/api/users/{user_id}", lambda i: (f"/api/users/{user_id}", None, None)),
+        ("users.update", "PUT", "/api/users/{user_id}", lambda i: (f"/api/users/{user_id}", {"occupation": f"job {i}"}, None)),
+        ("users.change_password", "PUT", "/api/users/{user_id}/change-password", lambda i: (
+            f"/api/users/{user_id}/change-password", {"old_password": password, "new_password": password}, None)),
+        ("users.delete", "DELETE", "/api/users/{user_id}", lambda i: (f"/api/users/{new_user(i)}", None, None)),
+        ("users.export", "GET", "/api/users/{user_id}/export", lambda i: (f"/api/users/{user_id}/export", None, None)),
+        ("users.export_csv_gzip", "GET", "/api/users/{user_id}/export", lambda i: (
+            f"/api/users/{user_id}/export?format=csv", None, {"Accept-Encoding": "gzip"})),
+
+        ("goals.create", "POST", "/api/goals/", lambda i: (
+            "/api/goals/", {"title": f"Goal {i}", "user_id": scratch["user_id"], "target_value": 10}, None)),
+        ("goals.list", "GET", "/api/goals/user/{user_id}", lambda i: (f"/api/goals/user/{user_id}", None, None)),
+        ("goals.details", "GET", "/api/goals/user/{user_id}/details", lambda i: (f"/api/goals/user/{user_id}/details", None, None)),
+        ("goals.details_ndjson", "GET", "/api/goals/user/{user_id}/details", lambda i: (
+            f"/api/goals/user/{user_id}/details", None, {"Accept": "application/x-ndjson"})),
+        ("goals.details_goal_depth", "GET", "/api/goals/user/{user_id}/details", lambda i: (
+            f"/api/goals/user/{user_id}/details?depth=goal", None, None)),
+        ("goals.summary", "GET", "/api/goals/user/{user_id}/summary", lambda i: (f"/api/goals/user/{user_id}/summary", None, None)),
+        ("goals.get", "GET", "/api/goals/{goal_id}", lambda i: (f"/api/goals/{goal_id}", None, None)),
+        ("goals.history", "GET", "/api/goals/{goal_id}/history", lambda i: (f"/api/goals/{goal_id}/history", None, None)),
+        ("goals.update", "PUT", "/api/goals/{goal_id}", lambda i: (f"/api/goals/{goal_id}", {"description": f"rev {i}"}, None)),
+        ("goals.delete", "DELETE", "/api/goals/{goal_id}", lambda i: (f"/api/goals/{new_goal(i)}", None, None)),
+        ("goals.import_csv", "POST", "/api/goals/{goal_id}/import", lambda i: (
+            f"/api/goals/{scratch['goal_id']}/import", import_body(i, "csv"), {"Content-Type": "text/csv"})),
+        ("goals.import_ndjson", "POST", "/api/goals/{goal_id}/import", lambda i: (
+            f"/api/goals/{scratch['goal_id']}/import", import_body(i, "ndjson"), {"Content-Type": "application/x-ndjson"})),
+
+        ("resources.create", "POST", "/api/resources/", lambda i: (
+            "/api/resources/", {"title": f"Resource {i}", "goal_id": scratch["goal_id"], "value_per_unit": 3}, None)),
+        ("resources.by_goal", "GET", "/api/resources/goal/{goal_id}", lambda i: (f"/api/resources/goal/{goal_id}", None, None)),
+        ("resources.get", "GET", "/api/resources/{resource_id}", lambda i: (f"/api/resources/{resource_id}", None, None)),
+        ("resources.update", "PUT", "/api/resources/{resource_id}", lambda i: (
+            f"/api/resources/{resource_id}", {"note": f"rev {i}"}, None)),
+        ("resources.delete", "DELETE", "/api/resources/{resource_id}", lambda i: (f"/api/resources/{new_resource(i)}", None, None)),
+
+        ("topics.create", "POST", "/api/topics/", lambda i: (
+            "/api/topics/", {"title": f"Topic {i}", "resource_id": scratch["resource_id"]}, None)),
+        ("topics.bulk", "POST", "/api/topics/bulk", lambda i: ("/api/topics/bulk", {
+            "resource_id": scratch["resource_id"], "topics": [{"title": f"Bulk {i}.{n}"} for n in range(100)]
+        }, None)),
+        ("topics.by_resource", "GET", "/api/topics/resource/{resource_id}", lambda i: (
+            f"/api/topics/resource/{resource_id}", None, None)),
+        ("topics.by_resource_page", "GET", "/api/topics/resource/{resource_id}", lambda i: (
+            f"/api/topics/resource/{resource_id}?limit=10", None, None)),
+        ("topics.get", "GET", "/api/topics/{topic_id}", lambda i: (f"/api/topics/{topic_ids[0]}", None, None)),
+        ("topics.update", "PUT", "/api/topics/{topic_id}", lambda i: (f"/api/topics/{topic_ids[0]}", {"title": f"rev {i}"}, None)),
+        ("topics.status_batch", "PATCH", "/api/topics/status", lambda i: ("/api/topics/status", [
+            {"topic_id": topic_id, "is_completed": (i + n) % 2 == 0} for n, topic_id in enumerate(batch)
+        ], None)),
+        ("topics.status", "PATCH", "/api/topics/{topic_id}/status", lambda i: (
+            f"/api/topics/{topic_ids[1]}/status", {"is_completed": i % 2 == 0}, None)),
+        ("topics.delete", "DELETE", "/api/topics/{topic_id}", lambda i: (f"/api/topics/{new_topic(i)}", None, None)),
+
+        ("sync.full", "GET", "/api/sync/{user_id}", lambda i: (f"/api/sync/{user_id}", None, None)),
+        ("sync.changes", "GET", "/api/sync/{user_id}", lambda i: (f"/api/sync/{user_id}?since={sync_cursor(i)}", None, None)),
+    ]
+
+def send(client, method, url, body, headers):
+    if isinstance(body, (str, bytes)):
+        return client.request(method, url, content=body, headers=headers)
+    return client.request(method, url, json=body, headers=headers)
+
+def measure(client, app, ids, args, statements, database):
+    """Time every endpoint; returns {"results": [...], "uncovered_routes": [...]}"""
+    cases = endpoints(client, ids)
+
+    served = {
+        (method, route.path) for route in app.routes if route.path.startswith("/api/")
+        for method in route.methods
+    } - STREAMING_ROUTES
+    uncovered = sorted(served - {(method, path) for _, method, path, _ in cases})
+
+    results = []
+    for name, method, path, prepare in cases:
+        for i in range(args.warmup):
+            url, body, headers = prepare(-i - 1)
+            send(client, method, url, body, headers)
+
+        latencies = []
+        statuses = {}
+        queries = 0
+        for i in range(args.requests):
+            url, body, headers = prepare(i)
+            statements["count"] = 0
+            start = time.perf_counter()
+            response = send(client, method, url, body, headers)
+            latencies.append(time.perf_counter() - start)
+            queries += statements["count"]
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+        # One traced request per endpoint: tracemalloc slows everything down, so keep it out of the timings
+        url, body, headers = prepare(args.requests)
+        tracemalloc.start()
+        send(client, method, url, body, headers)
+        _, peak_alloc = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results.append({
+            "database": database,
+            "mode": args.mode,
+            "endpoint": name,
+            "method": method,
+            "path": path,
+            "requests": args.requests,
+            "status_codes": {str(code): count for code, count in sorted(statuses.items())},
+            "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+            "throughput_rps": round(len(latencies) / sum(latencies), 1),
+            "queries_per_request": round(queries / args.requests, 2),
+            "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            "peak_alloc_kb": round(peak_alloc / 1024, 1),
+        })
+
+    return {"results": results, "uncovered_routes": [f"{method} {path}" for method, path in uncovered]}
+
+def run_target(args):
+    """Benchmark one database/mode in this process and return its result rows"""
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ["ASYNC_DB"] = "true" if args.mode == "async" else "false"
+    os.environ["SERVERLESS"] = "false"
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event, func, select
+    from sqlalchemy.orm import Session
+    from app.database import Base, get_engine
+    from app.main import app
+    from app.models import User, Goal, Resource, ResourceTopic
+    from benchmarks.datagen import generate, PASSWORD
+
+    engine = get_engine()
+    if args.reset:
+        Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        if db.scalar(select(func.count()).select_from(User)):
+            raise SystemExit(f"{engine.url.render_as_string(hide_password=True)} is not empty; use a fresh database or --reset")
+        user_id = generate(db, 1, args.goals, args.resources, args.topics, seed=args.seed)[0]
+        scratch_id = generate(db, 1, 1, 1, 1, seed=args.seed + 1)[0]
+        goal_id, resource_id = db.execute(
+            select(Goal.goal_id, Resource.resource_id).join(Resource).where(Goal.user_id == user_id).order_by(Resource.resource_id).limit(1)
+        ).one()
+        topic_ids = db.scalars(
+            select(ResourceTopic.topic_id).join(Resource).join(Goal).where(Goal.user_id == user_id).order_by(ResourceTopic.topic_id)
+        ).all()
+        scratch_goal, scratch_resource = db.execute(
+            select(Goal.goal_id, Resource.resource_id).join(Resource).where(Goal.user_id == scratch_id)
+        ).one()
+        email = db.get(User, user_id).email
+
+    ids = {
+        "user_id": user_id, "goal_id": goal_id, "resource_id": resource_id, "topic_ids": topic_ids,
+        "email": email, "password": PASSWORD,
+        "scratch": {"user_id": scratch_id, "goal_id": scratch_goal, "resource_id": scratch_resource},
+    }
+
+    statements = {"count": 0}
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements["count"] += 1
+
+    # Async routes still fall back to sync ones they don't implement, so count both engines
+    engines = [engine]
+    if args.mode == "async":
+        from app.database import get_async_engine
+        engines.append(get_async_engine().sync_engine)
+    for counted in engines:
+        event.listen(counted, "before_cursor_execute", count)
+
+    # The context keeps one event loop for the whole run, so the async engine can be disposed on it
+    with TestClient(app) as client:
+        report = measure(client, app, ids, args, statements, engine.dialect.name)
+        if args.mode == "async":
+            client.portal.call(get_async_engine().dispose)
+
+    engine.dispose()
+    return report
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=SERVER_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--database-url", action="append", default=None,
+                        help="Database to benchmark (repeatable); defaults to a temporary SQLite file plus BENCH_POSTGRES_URL")
+    parser.add_argument("--modes", default="sync", help="Comma-separated: sync, async")
+    parser.add_argument("--requests", type=int, default=50, help="Timed requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=3, help="Untimed requests per endpoint")
+    parser.add_argument("--goals", type=int, default=5)
+    parser.add_argument("--resources", type=int, default=4, help="Resources per goal")
+    parser.add_argument("--topics", type=int, default=25, help="Topics per resource")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Write the results as JSON to this file")
+    parser.add_argument("--reset", action="store_true",
+                        help="Drop and recreate all tables of the given databases first (needed to reuse one, e.g. Postgres)")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--mode", default="sync", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        args.database_url = args.database_url[0]
+        json.dump(run_target(args), sys.stdout)
+        return
+
+    report = {
+        "commit": git_commit(),
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "parameters": {
+            "requests": args.requests, "warmup": args.warmup, "goals": args.goals,
+            "resources": args.resources, "topics": args.topics, "seed": args.seed,
+        },
+        "results": [],
+        "uncovered_routes": {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        modes = args.modes.split(",")
+        if args.database_url:
+            targets = [(url, mode) for url in args.database_url for mode in modes]
+        else:
+            # A fresh SQLite file per mode so every target starts from the same data
+            targets = [(f"sqlite:///{os.path.join(tmp, f'bench-{mode}.db')}", mode) for mode in modes]
+            if os.environ.get("BENCH_POSTGRES_URL"):
+                targets += [(os.environ["BENCH_POSTGRES_URL"], mode) for mode in modes]
+
+        for url, mode in targets:
+            command = [
+                sys.executable, "-m", "benchmarks.harness", "--worker", "--mode", mode, "--database-url", url,
+                "--requests", str(args.requests), "--warmup", str(args.warmup), "--goals", str(args.goals),
+                "--resources", str(args.resources), "--topics", str(args.topics), "--seed", str(args.seed),
+            ]
+            if args.reset and not url.startswith(f"sqlite:///{tmp}"):
+                command.append("--reset")
+            completed = subprocess.run(command, cwd=SERVER_DIR, capture_output=True, text=True)
+            if completed.returncode != 0:
+                sys.stderr.write(completed.stderr)
+                raise SystemExit(f"benchmark target {mode} failed")
+            target = json.loads(completed.stdout)
+            report["results"].extend(target["results"])
+            if target["uncovered_routes"]:
+                report["uncovered_routes"][f"{target['results'][0]['database']}/{mode}"] = target["uncovered_routes"]
+
+    print(f"{'database':<12}{'mode':<7}{'endpoint':<24}{'p50':>9}{'p95':>9}{'p99':>9}{'rps':>9}{'queries':>9}{'rss_kb':>10}")
+    for row in report["results"]:
+        print(
+            f"{row['database']:<12}{row['mode']:<7}{row['endpoint']:<24}{row['p50_ms']:>9}{row['p95_ms']:>9}"
+            f"{row['p99_ms']:>9}{row['throughput_rps']:>9}{row['queries_per_request']:>9}{row['peak_rss_kb']:>10}"
+        )
+    for target, routes in report["uncovered_routes"].items():
+        print(f"{target}: not benchmarked: {', '.join(routes)}", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Serialization benchmark: share of the goal tree endpoints' latency spent encoding the response
+
+Seeds one account (5,000 topics by default: 5 goals x 10 resources x 100 topics) in a
+temporary SQLite file and requests /details and /summary with FAST_JSON_RESPONSES off
+(response_model re-validation + jsonable_encoder) and on (app.responses.ValidatedJSONResponse).
+Per endpoint and encoder it reports the median db, serialize and total times from the
+Server-Timing header, the serialize share of the total and the client-side p50.
+
+Usage:
+    python -m benchmarks.serialization [--goals 5] [--resources 10] [--topics 100] [--requests 30] [--output results.json]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import tempfile
+import time
+
+ENCODERS = [("response_model", False), ("validated", True)]
+ENDPOINTS = ["details", "summary"]
+
+def server_timing(header: str) -> dict:
+    """{"db": ms, "serialize": ms, "total": ms} from a Server-Timing header"""
+    return {name: float(duration) for name, duration in re.findall(r"(\w+);dur=([\d.]+)", header)}
+
+def run(args, database_url: str) -> list:
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["ASYNC_DB"] = "false"
+    os.environ["SERVERLESS"] = "false"
+
+    from fastapi.testclient import TestClient
+    from sqlalchemy.orm import Session
+    from app.config import settings
+    from app.database import Base, get_engine
+    from app.main import app
+    from benchmarks.datagen import generate
+
+    engine = get_engine()
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        user_id = generate(db, 1, args.goals, args.resources, args.topics, seed=args.seed)[0]
+
+    results = []
+    bodies = {}
+    with TestClient(app) as client:
+        for endpoint in ENDPOINTS:
+            url = f"/api/goals/user/{user_id}/{endpoint}"
+            for encoder, fast in ENCODERS:
+                settings.FAST_JSON_RESPONSES = fast
+                for _ in range(args.warmup):
+                    client.get(url)
+
+                timings, latencies = [], []
+                for _ in range(args.requests):
+                    start = time.perf_counter()
+                    response = client.get(url)
+                    latencies.append((time.perf_counter() - start) * 1000)
+                    timings.append(server_timing(response.headers["Server-Timing"]))
+                bodies[(endpoint, encoder)] = response.json()
+
+                median = {key: statistics.median(timing[key] for timing in timings) for key in ("db", "serialize", "total")}
+                results.append({
+                    "endpoint": endpoint,
+                    "encoder": encoder,
+                    "requests": args.requests,
+                    "response_kb": round(len(response.content) / 1024, 1),
+                    "db_ms": round(median["db"], 3),
+                    "serialize_ms": round(median["serialize"], 3),
+                    "total_ms": round(median["total"], 3),
+                    "serialize_share": round(median["serialize"] / median["total"], 3),
+                    "client_p50_ms": round(statistics.median(latencies), 3),
+                })
+            if bodies[(endpoint, "response_model")] != bodies[(endpoint, "validated")]:
+                raise SystemExit(f"{endpoint}: the encoders returned different bodies")
+
+    settings.FAST_JSON_RESPONSES = True
+    engine.dispose()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--goals", type=int, default=5)
+    parser.add_argument("--resources", type=int, default=10, help="Resources per goal")
+    parser.add_argument("--topics", type=int, default=100, help="Topics per resource")
+    parser.add_argument("--requests", type=int, default=30, help="Timed requests per endpoint and encoder")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = run(args, f"sqlite:///{os.path.join(tmp, 'serialization.db')}")
+
+    print(f"topics: {args.goals * args.resources * args.topics}")
+    print(f"{'endpoint':<10}{'encoder':<16}{'kb':>9}{'db':>9}{'serialize':>11}{'total':>9}{'share':>8}{'client':>9}")
+    for row in results:
+        print(
+            f"{row['endpoint']:<10}{row['encoder']:<16}{row['response_kb']:>9}{row['db_ms']:>9}"
+            f"{row['serialize_ms']:>11}{row['total_ms']:>9}{row['serialize_share']:>8.1%}{row['client_p50_ms']:>9}"
+        )
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump({"parameters": vars(args), "results": results}, output, indent=2)
+
+if __name__ == "__main__":
+    main()
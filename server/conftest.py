@@ -0,0 +1,38 @@
+"""
+Shared fixtures: the sync app served by TestClient against a seeded SQLite file
+"""
+import os
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, enable_foreign_keys, get_db
+from app.main import app
+from app.request_metrics import install_engine_hooks
+from benchmarks.datagen import generate
+
+@pytest.fixture
+def session_local(tmp_path):
+    """Session factory of a fresh SQLite file seeded with user 1: 3 goals x 1 resource x 3 topics"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    install_engine_hooks(engine)
+    enable_foreign_keys(engine)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(engine, autoflush=False)
+    with factory() as db:
+        generate(db, users=1, goals_per_user=3, resources_per_goal=1, topics_per_resource=3, seed=0)
+    yield factory
+    engine.dispose()
+
+@pytest.fixture
+def client(session_local):
+    def override_db():
+        with session_local() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_db
+    yield TestClient(app)
+    app.dependency_overrides.pop(get_db, None)
@@ -1 +1,9 @@
+import os
+
+# Start the cold-start clock before anything else is imported
+from app import cold_start
+
+# Lazy routers, deferred engine and NullPool unless explicitly disabled
+os.environ.setdefault("SERVERLESS", "true")
+
 from app.main import app
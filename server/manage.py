@@ -0,0 +1,102 @@
+"""
+Maintenance commands for the Goal Tracker API
+
+Usage:
+    python manage.py migrate [--revision REV]
+    python manage.py recompute-rollups [--user-id ID]
+    python manage.py rebuild-progress [--user-id ID]
+    python manage.py prune-tombstones
+    python manage.py import-topics --goal-id ID FILE [--format csv|ndjson]
+"""
+import argparse
+import json
+import os
+
+def migrate(args):
+    """Apply database migrations up to the given revision (default: head)"""
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini"))
+    command.upgrade(config, args.revision)
+
+def recompute_rollups(args):
+    """Rebuild goal/resource point rollups from the topics table"""
+    from app.database import SessionLocal
+    from app.controllers.rollup_controller import RollupController
+
+    db = SessionLocal()
+    try:
+        report = RollupController.recompute(db, user_id=args.user_id)
+    finally:
+        db.close()
+    print(json.dumps(report, indent=2))
+
+def rebuild_progress(args):
+    """Rebuild the daily progress buckets from the topics table"""
+    from app.database import SessionLocal
+    from app.controllers.progress_controller import ProgressController
+
+    db = SessionLocal()
+    try:
+        report = ProgressController.rebuild(db, user_id=args.user_id)
+    finally:
+        db.close()
+    print(json.dumps(report, indent=2))
+
+def prune_tombstones(args):
+    """Delete sync tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS"""
+    from app.database import SessionLocal
+    from app.controllers.sync_controller import SyncController
+
+    db = SessionLocal()
+    try:
+        deleted = SyncController.prune_tombstones(db)
+    finally:
+        db.close()
+    print(json.dumps({"tombstones_deleted": deleted}, indent=2))
+
+def import_topics(args):
+    """Import a CSV or NDJSON file of resources and topics into a goal (see app/imports.py)"""
+    from app.database import SessionLocal
+    from app.controllers.import_controller import ImportController
+
+    format = args.format or ("csv" if args.file.endswith(".csv") else "ndjson")
+    db = SessionLocal()
+    try:
+        with open(args.file, "rb") as source:
+            report = ImportController.import_rows(db, args.goal_id, iter(lambda: source.read(1 << 16), b""), format)
+    finally:
+        db.close()
+    print(report.model_dump_json(indent=2))
+
+def main():
+    parser = argparse.ArgumentParser(description="Goal Tracker maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrations = subparsers.add_parser("migrate", help=migrate.__doc__)
+    migrations.add_argument("--revision", default="head", help="Target revision (default: head)")
+    migrations.set_defaults(func=migrate)
+
+    rollups = subparsers.add_parser("recompute-rollups", help=recompute_rollups.__doc__)
+    rollups.add_argument("--user-id", type=int, default=None, help="Only repair the goals of this user")
+    rollups.set_defaults(func=recompute_rollups)
+
+    progress = subparsers.add_parser("rebuild-progress", help=rebuild_progress.__doc__)
+    progress.add_argument("--user-id", type=int, default=None, help="Only rebuild the buckets of this user")
+    progress.set_defaults(func=rebuild_progress)
+
+    tombstones = subparsers.add_parser("prune-tombstones", help=prune_tombstones.__doc__)
+    tombstones.set_defaults(func=prune_tombstones)
+
+    imports = subparsers.add_parser("import-topics", help=import_topics.__doc__)
+    imports.add_argument("--goal-id", type=int, required=True, help="Goal to import into")
+    imports.add_argument("--format", choices=("csv", "ndjson"), default=None, help="Default: csv for *.csv files, else ndjson")
+    imports.add_argument("file", help="File of rows, one per line (a CSV header first)")
+    imports.set_defaults(func=import_topics)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Initial schema (users, goals, resources, resource_topics)
+
+Databases created by the old create_all() at import already have these tables,
+so each one is only created when missing.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "users" not in existing:
+        op.create_table(
+            "users",
+            sa.Column("user_id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String(100), nullable=False),
+            sa.Column("email", sa.String(150), nullable=False),
+            sa.Column("phone", sa.String(20)),
+            sa.Column("occupation", sa.String(100)),
+            sa.Column("password", sa.String(255), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_users_user_id", "users", ["user_id"])
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    if "goals" not in existing:
+        op.create_table(
+            "goals",
+            sa.Column("goal_id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False),
+            sa.Column("title", sa.String(255), nullable=False),
+            sa.Column("description", sa.Text()),
+            sa.Column("reward_type", sa.String(100)),
+            sa.Column("target_value", sa.Float()),
+            sa.Column("initial_value", sa.Float()),
+            sa.Column("domain_name", sa.String(100)),
+            sa.Column("initial_date", sa.Date()),
+            sa.Column("target_date", sa.Date()),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_goals_goal_id", "goals", ["goal_id"])
+
+    if "resources" not in existing:
+        op.create_table(
+            "resources",
+            sa.Column("resource_id", sa.Integer(), primary_key=True),
+            sa.Column("resource_type", sa.String(50)),
+            sa.Column("title", sa.String(255), nullable=False),
+            sa.Column("value_per_unit", sa.Integer()),
+            sa.Column("total_time_per_unit", sa.Interval()),
+            sa.Column("resource_link", sa.String(500)),
+            sa.Column("note", sa.Text()),
+            sa.Column("goal_id", sa.Integer(), sa.ForeignKey("goals.goal_id", ondelete="CASCADE")),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_resources_resource_id", "resources", ["resource_id"])
+
+    if "resource_topics" not in existing:
+        op.create_table(
+            "resource_topics",
+            sa.Column("topic_id", sa.Integer(), primary_key=True),
+            sa.Column("resource_id", sa.Integer(), sa.ForeignKey("resources.resource_id", ondelete="CASCADE"), nullable=False),
+            sa.Column("title", sa.String(255), nullable=False),
+            sa.Column("point_multiplier", sa.Float()),
+            sa.Column("is_completed", sa.Boolean()),
+            sa.Column("is_skipped", sa.Boolean()),
+            sa.Column("complete_date", sa.DateTime(timezone=True)),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_resource_topics_topic_id", "resource_topics", ["topic_id"])
+
+def downgrade():
+    op.drop_table("resource_topics")
+    op.drop_table("resources")
+    op.drop_table("goals")
+    op.drop_table("users")
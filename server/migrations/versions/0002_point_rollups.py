@@ -0,0 +1,56 @@
+"""Point rollup columns on goals and resources, backfilled from resource_topics
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+ROLLUP_COLUMNS = {
+    "resources": ["total_topic_points", "completed_points_resources"],
+    "goals": ["goals_total_points", "completed_points_goal"],
+}
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table, columns in ROLLUP_COLUMNS.items():
+        existing = {column["name"] for column in inspector.get_columns(table)}
+        with op.batch_alter_table(table) as batch_op:
+            for column in columns:
+                if column not in existing:
+                    batch_op.add_column(sa.Column(column, sa.Float(), nullable=False, server_default="0"))
+
+    op.execute("""
+        UPDATE resources SET
+            total_topic_points = COALESCE((
+                SELECT SUM(COALESCE(resources.value_per_unit, 0) * COALESCE(t.point_multiplier, 0))
+                FROM resource_topics t
+                WHERE t.resource_id = resources.resource_id
+            ), 0),
+            completed_points_resources = COALESCE((
+                SELECT SUM(COALESCE(resources.value_per_unit, 0) * COALESCE(t.point_multiplier, 0))
+                FROM resource_topics t
+                WHERE t.resource_id = resources.resource_id AND t.is_completed
+            ), 0)
+    """)
+    op.execute("""
+        UPDATE goals SET
+            goals_total_points = COALESCE((
+                SELECT SUM(r.total_topic_points) FROM resources r WHERE r.goal_id = goals.goal_id
+            ), 0),
+            completed_points_goal = COALESCE((
+                SELECT SUM(r.completed_points_resources) FROM resources r WHERE r.goal_id = goals.goal_id
+            ), 0)
+    """)
+
+def downgrade():
+    for table, columns in ROLLUP_COLUMNS.items():
+        with op.batch_alter_table(table) as batch_op:
+            for column in columns:
+                batch_op.drop_column(column)
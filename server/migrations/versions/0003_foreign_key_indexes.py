@@ -0,0 +1,28 @@
+"""Indexes for the foreign keys every "by user/goal/resource" query filters on
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_goals_user_id", "goals", ["user_id"]),
+    ("ix_resources_goal_id", "resources", ["goal_id"]),
+    # resource_id leads both composites, so they also serve plain "by resource" lookups
+    ("ix_resource_topics_resource_id_is_completed", "resource_topics", ["resource_id", "is_completed"]),
+    ("ix_resource_topics_resource_id_complete_date", "resource_topics", ["resource_id", "complete_date"]),
+]
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
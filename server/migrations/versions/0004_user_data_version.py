@@ -0,0 +1,23 @@
+"""Version token of each user's goal tree, used for ETags on the goal endpoints
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    existing = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("users")}
+    if "data_version" not in existing:
+        with op.batch_alter_table("users") as batch_op:
+            batch_op.add_column(sa.Column("data_version", sa.Integer(), nullable=False, server_default="0"))
+
+def downgrade():
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.drop_column("data_version")
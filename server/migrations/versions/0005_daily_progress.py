@@ -0,0 +1,45 @@
+"""Per-goal daily progress buckets, backfilled from completed topics
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.days import progress_day_sql
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    bind = op.get_bind()
+    if "daily_progress" not in sa.inspect(bind).get_table_names():
+        op.create_table(
+            "daily_progress",
+            sa.Column("goal_id", sa.Integer(), sa.ForeignKey("goals.goal_id", ondelete="CASCADE"), primary_key=True),
+            sa.Column("day", sa.Date(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False),
+            sa.Column("completed_points", sa.Float(), nullable=False, server_default="0"),
+            sa.Column("completed_topics", sa.Integer(), nullable=False, server_default="0"),
+        )
+        op.create_index("ix_daily_progress_user_id_day", "daily_progress", ["user_id", "day"])
+
+    # The same day as ProgressController puts live writes on
+    day = progress_day_sql(bind.dialect.name, "t.complete_date")
+    op.execute(f"""
+        INSERT INTO daily_progress (goal_id, day, user_id, completed_points, completed_topics)
+        SELECT g.goal_id, {day}, g.user_id,
+               SUM(COALESCE(r.value_per_unit, 0) * COALESCE(t.point_multiplier, 0)), COUNT(*)
+        FROM resource_topics t
+        JOIN resources r ON r.resource_id = t.resource_id
+        JOIN goals g ON g.goal_id = r.goal_id
+        WHERE t.is_completed AND t.complete_date IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM daily_progress)
+        GROUP BY g.goal_id, {day}, g.user_id
+    """)
+
+def downgrade():
+    op.drop_index("ix_daily_progress_user_id_day", table_name="daily_progress")
+    op.drop_table("daily_progress")
@@ -0,0 +1,54 @@
+"""updated_at columns and a tombstones table for delta sync
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+# table -> index on (parent column, updated_at)
+SYNCED = {
+    "users": None,
+    "goals": ("ix_goals_user_id_updated_at", "user_id"),
+    "resources": ("ix_resources_goal_id_updated_at", "goal_id"),
+    "resource_topics": ("ix_resource_topics_resource_id_updated_at", "resource_id"),
+}
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table, index in SYNCED.items():
+        if "updated_at" not in {column["name"] for column in inspector.get_columns(table)}:
+            # SQLite cannot add a column with a non-constant default, so add it bare,
+            # backfill from created_at and set the default in a (table-rebuilding) batch
+            op.add_column(table, sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True))
+            op.execute(f"UPDATE {table} SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP)")
+            with op.batch_alter_table(table) as batch_op:
+                batch_op.alter_column("updated_at", existing_type=sa.DateTime(timezone=True), server_default=sa.func.now())
+        if index and index[0] not in {existing["name"] for existing in inspector.get_indexes(table)}:
+            op.create_index(index[0], table, [index[1], "updated_at"])
+
+    if "tombstones" not in inspector.get_table_names():
+        op.create_table(
+            "tombstones",
+            sa.Column("tombstone_id", sa.Integer(), primary_key=True),
+            sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.user_id", ondelete="CASCADE"), nullable=False),
+            sa.Column("entity_type", sa.String(20), nullable=False),
+            sa.Column("entity_id", sa.Integer(), nullable=False),
+            sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        )
+        op.create_index("ix_tombstones_user_id_deleted_at", "tombstones", ["user_id", "deleted_at"])
+
+def downgrade():
+    op.drop_index("ix_tombstones_user_id_deleted_at", table_name="tombstones")
+    op.drop_table("tombstones")
+    for table, index in SYNCED.items():
+        if index:
+            op.drop_index(index[0], table_name=table)
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_column("updated_at")
@@ -0,0 +1,26 @@
+"""Indexes matching the (created_at, id) order of the paginated list endpoints
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ("ix_goals_user_id_created_at", "goals", ["user_id", "created_at", "goal_id"]),
+    ("ix_resources_goal_id_created_at", "resources", ["goal_id", "created_at", "resource_id"]),
+    ("ix_resource_topics_resource_id_created_at", "resource_topics", ["resource_id", "created_at", "topic_id"]),
+]
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+def downgrade():
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -1,10 +1,86 @@
+"""
+Development server with auto-reload; `python run.py --production` serves with:
+
+- WEB_WORKERS processes (default: one per CPU core), each building its own engines
+  and pools after the fork (app.database.reset_engines)
+- uvloop and httptools when installed, see WEB_LOOP / WEB_HTTP
+- gunicorn (requirements.txt) as the supervisor, recycling workers after WEB_MAX_REQUESTS
+  requests and replacing any that die; plain uvicorn workers only with WEB_MAX_REQUESTS=0
+- GET /health/ready answered by each worker for the load balancer
+"""
+import argparse
+import importlib.util
+import os
 import uvicorn
 from app.config import settings
 
-if __name__ == "__main__":
+def worker_count() -> int:
+    return settings.WEB_WORKERS or os.cpu_count() or 1
+
+def gunicorn_options(worker_class) -> dict:
+    return {
+        "bind": f"{settings.HOST}:{settings.PORT}",
+        "workers": worker_count(),
+        "worker_class": worker_class,
+        "max_requests": settings.WEB_MAX_REQUESTS,
+        "max_requests_jitter": settings.WEB_MAX_REQUESTS_JITTER,
+        "graceful_timeout": settings.WEB_GRACEFUL_TIMEOUT,
+        # Import the app once in the supervisor, so forked workers start fast and share
+        # its memory pages; engines are created per worker after the fork
+        "preload_app": True,
+    }
+
+def serve_gunicorn():
+    from gunicorn.app.base import BaseApplication
+    from uvicorn.workers import UvicornWorker
+
+    class Worker(UvicornWorker):
+        CONFIG_KWARGS = {"loop": settings.WEB_LOOP, "http": settings.WEB_HTTP}
+
+    class Application(BaseApplication):
+        def load_config(self):
+            for key, value in gunicorn_options(Worker).items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            from app.main import app
+            return app
+
+    Application().run()
+
+def serve_uvicorn():
+    if settings.WEB_MAX_REQUESTS:
+        # uvicorn's supervisor does not replace a worker that exits, so the memory bound
+        # WEB_MAX_REQUESTS promises would silently not hold
+        raise SystemExit(
+            "WEB_MAX_REQUESTS needs gunicorn to recycle workers: pip install gunicorn, "
+            "or set WEB_MAX_REQUESTS=0 to run uvicorn's workers without recycling"
+        )
     uvicorn.run(
         "app.main:app",
         host=settings.HOST,
         port=settings.PORT,
-        reload=True
+        workers=worker_count(),
+        loop=settings.WEB_LOOP,
+        http=settings.WEB_HTTP,
+        timeout_graceful_shutdown=settings.WEB_GRACEFUL_TIMEOUT,
+        # RequestMetricsMiddleware already logs one line per request
+        access_log=False,
     )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the Goal Tracker API")
+    parser.add_argument("--production", action="store_true", help="Multi-worker server without auto-reload")
+    args = parser.parse_args()
+
+    if not args.production:
+        uvicorn.run(
+            "app.main:app",
+            host=settings.HOST,
+            port=settings.PORT,
+            reload=True
+        )
+    elif importlib.util.find_spec("gunicorn"):
+        serve_gunicorn()
+    else:
+        serve_uvicorn()
@@ -0,0 +1,177 @@
+"""
+Tests for the async request path (AsyncSession controllers and routers) against aiosqlite
+Run with: python -m pytest test_async_controllers.py
+"""
+import os
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import asyncio
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+pytest.importorskip("aiosqlite")
+
+from app.database import Base, enable_foreign_keys, get_async_db
+from app.models import User, Goal, Resource, ResourceTopic
+from app.schemas.user import UserCreate
+from app.schemas.goal import GoalCreate
+from app.schemas.resource import ResourceCreate, ResourceUpdate
+from app.schemas.topic import TopicCreate, BulkTopicCreate, TopicBase, TopicStatusUpdate
+from app.controllers.async_user_controller import AsyncUserController
+from app.controllers.async_goal_controller import AsyncGoalController
+from app.controllers.async_resource_controller import AsyncResourceController
+from app.controllers.async_topic_controller import AsyncTopicController
+from app.controllers.progress_controller import AsyncProgressController
+from app.routes import async_user_routes, async_goal_routes, async_resource_routes, async_topic_routes, async_sync_routes
+
+@pytest.fixture
+def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'async.db'}")
+    enable_foreign_keys(engine.sync_engine)
+
+    async def create_tables():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create_tables())
+    yield async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+    asyncio.run(engine.dispose())
+
+async def _seed(db: AsyncSession):
+    user = await AsyncUserController.create_user(db, UserCreate(name="Ada", email="ada@example.com", password="secret"))
+    goal = await AsyncGoalController.create_goal(db, GoalCreate(
+        title="Learn SQL", user_id=user.user_id, target_value=100, initial_value=0, target_date="2999-01-01"
+    ))
+    resource = await AsyncResourceController.create_resource(db, ResourceCreate(
+        title="Book", goal_id=goal.goal_id, value_per_unit=2, total_time_per_unit="30 minutes"
+    ))
+    topics = await AsyncTopicController.bulk_create_topics(db, BulkTopicCreate(
+        resource_id=resource.resource_id,
+        topics=[TopicBase(title="Ch 1", point_multiplier=1.5), TopicBase(title="Ch 2", point_multiplier=2)]
+    ))
+    return user, goal, resource, topics
+
+def test_rollups_follow_async_topic_writes(session_factory):
+    async def scenario():
+        async with session_factory() as db:
+            user, goal, resource, topics = await _seed(db)
+            await AsyncTopicController.update_topic_status(db, topics[0].topic_id, TopicStatusUpdate(is_completed=True))
+            await AsyncTopicController.create_topic(db, TopicCreate(title="Ch 3", resource_id=resource.resource_id))
+            await AsyncResourceController.update_resource(db, resource.resource_id, ResourceUpdate(value_per_unit=4))
+            await AsyncTopicController.delete_topic(db, topics[1].topic_id)
+
+        async with session_factory() as db:
+            goal = await db.get(Goal, goal.goal_id)
+            resource = await db.get(Resource, resource.resource_id)
+            details = await AsyncGoalController.get_goals_with_details(db, user.user_id)
+            summary = await AsyncGoalController.get_goals_summary(db, user.user_id)
+            history = await AsyncProgressController.get_goal_history(db, goal.goal_id)
+            return goal, resource, details, summary, history
+
+    goal, resource, details, summary, history = asyncio.run(scenario())
+
+    # Remaining topics: Ch 1 (1.5, completed) and Ch 3 (1.0) at 4 points per unit
+    assert resource.total_topic_points == pytest.approx(10.0)
+    assert resource.completed_points_resources == pytest.approx(6.0)
+    assert goal.goals_total_points == pytest.approx(10.0)
+    assert goal.completed_points_goal == pytest.approx(6.0)
+
+    assert details[0].goals_total_points == pytest.approx(goal.goals_total_points)
+    assert details[0].completed_points_goal == pytest.approx(goal.completed_points_goal)
+    assert summary[0].todays_completed_points == pytest.approx(6.0)
+    assert summary[0].model_dump() == details[0].model_dump(exclude={"resources"})
+    assert (history.days[-1].completed_points, history.days[-1].completed_topics) == (pytest.approx(6.0), 1)
+
+def test_stream_matches_details(session_factory):
+    async def scenario():
+        async with session_factory() as db:
+            user, *_ = await _seed(db)
+            await AsyncGoalController.create_goal(db, GoalCreate(title="Empty", user_id=user.user_id))
+            details = await AsyncGoalController.get_goals_with_details(db, user.user_id)
+            streamed = [goal async for goal in AsyncGoalController.stream_goals_with_details(db, user.user_id, batch_size=1)]
+            return details, streamed
+
+    details, streamed = asyncio.run(scenario())
+    by_id = lambda goals: {goal.goal_id: goal.model_dump() for goal in goals}
+    assert len(streamed) == 2
+    assert by_id(streamed) == by_id(details)
+
+def test_delete_user_cascades(session_factory):
+    async def scenario():
+        async with session_factory() as db:
+            user, goal, resource, topics = await _seed(db)
+            await AsyncUserController.delete_user(db, user.user_id)
+        async with session_factory() as db:
+            return [await db.get(model, key) for model, key in (
+                (User, user.user_id), (Goal, goal.goal_id), (Resource, resource.resource_id), (ResourceTopic, topics[0].topic_id)
+            )]
+
+    assert asyncio.run(scenario()) == [None, None, None, None]
+
+def test_async_routes(session_factory):
+    app = FastAPI()
+    app.include_router(async_user_routes.router, prefix="/api/users")
+    app.include_router(async_goal_routes.router, prefix="/api/goals")
+    app.include_router(async_resource_routes.router, prefix="/api/resources")
+    app.include_router(async_topic_routes.router, prefix="/api/topics")
+    app.include_router(async_sync_routes.router, prefix="/api/sync")
+
+    async def override_db():
+        async with session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override_db
+    client = TestClient(app)
+
+    user = client.post("/api/users/signup", json={"name": "Ada", "email": "ada@example.com", "password": "secret"}).json()
+    assert client.post("/api/users/signup", json={"name": "Ada", "email": "ada@example.com", "password": "x"}).status_code == 400
+    goal = client.post("/api/goals/", json={"title": "Learn SQL", "user_id": user["user_id"], "target_value": 10}).json()
+    resource = client.post("/api/resources/", json={"title": "Book", "goal_id": goal["goal_id"], "value_per_unit": 3}).json()
+    topic = client.post("/api/topics/", json={"title": "Ch 1", "resource_id": resource["resource_id"]}).json()
+
+    response = client.patch(f"/api/topics/{topic['topic_id']}/status", json={"is_completed": True})
+    assert response.status_code == 200
+    assert response.json()["complete_date"] is not None
+
+    response = client.get(f"/api/goals/user/{user['user_id']}/details")
+    details = response.json()
+    assert details[0]["completed_points_goal"] == 3.0
+    etag = response.headers["ETag"]
+    assert client.get(f"/api/goals/user/{user['user_id']}/details", headers={"If-None-Match": etag}).status_code == 304
+    assert details[0]["resources"][0]["topics"][0]["topic_point_value"] == 3.0
+
+    shaped = client.get(f"/api/goals/user/{user['user_id']}/details", params={"fields": "title,todays_completed_points,topics.topic_point_value"})
+    assert shaped.json() == [{
+        "goal_id": goal["goal_id"], "title": "Learn SQL", "todays_completed_points": 3.0,
+        "resources": [dict(details[0]["resources"][0], topics=[{"topic_id": topic["topic_id"], "topic_point_value": 3.0}])],
+    }]
+    assert client.get(f"/api/goals/user/{user['user_id']}/details", params={"depth": "resources"}).json()[0]["resources"][0]["completed_points_resources"] == 3.0
+
+    streamed = client.get(f"/api/goals/user/{user['user_id']}/details", headers={"Accept": "application/x-ndjson"})
+    assert streamed.headers["content-type"].startswith("application/x-ndjson")
+    assert len(streamed.text.splitlines()) == 1
+    assert streamed.headers["ETag"] != etag
+
+    client.post("/api/topics/", json={"title": "Ch 2", "resource_id": resource["resource_id"]})
+    first = client.get(f"/api/topics/resource/{resource['resource_id']}", params={"limit": 1})
+    rest = client.get(f"/api/topics/resource/{resource['resource_id']}", params={"limit": 1, "cursor": first.headers["X-Next-Cursor"]})
+    assert [topic["title"] for topic in first.json() + rest.json()] == ["Ch 1", "Ch 2"]
+    assert "X-Next-Cursor" not in rest.headers
+
+    imported = client.post(f"/api/goals/{goal['goal_id']}/import", content="resource,topic,is_completed\nBook,Ch 3,true\nVideos,Intro,maybe\n",
+                           headers={"Content-Type": "text/csv"}).json()
+    assert (imported["topics_created"], imported["resources_created"], imported["rejected"]) == (1, 0, 1)
+    assert len(client.get(f"/api/topics/resource/{resource['resource_id']}").json()) == 3
+
+    exported = client.get(f"/api/users/{user['user_id']}/export", params={"format": "csv"})
+    assert exported.text.splitlines()[0].startswith("goal.goal_id,")
+    assert len(exported.text.splitlines()) == 1 + 3
+
+    assert client.get("/api/topics/999").status_code == 404
+    cursor = client.get(f"/api/sync/{user['user_id']}").json()["cursor"]
+    assert client.delete(f"/api/goals/{goal['goal_id']}").status_code == 200
+    assert client.get(f"/api/topics/{topic['topic_id']}").status_code == 404
+    deleted = client.get(f"/api/sync/{user['user_id']}", params={"since": cursor}).json()["deleted"]
+    assert [(row["entity_type"], row["entity_id"]) for row in deleted] == [("goal", goal["goal_id"])]
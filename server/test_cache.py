@@ -0,0 +1,129 @@
+"""
+Tests for the entity read cache backends and their invalidation on writes
+Run with: python -m pytest test_cache.py
+"""
+import os
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import time
+import pytest
+from app import cache
+from app.cache import MemoryCache, RedisCache
+
+class LocalRedis:
+    """In-process stand-in for the few Redis commands RedisCache uses"""
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        value, expires = self.data.get(key, (None, None))
+        if expires is not None and expires <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def set(self, key, value, nx=False, px=None):
+        if nx and self.get(key) is not None:
+            return None
+        self.data[key] = (value.encode() if isinstance(value, str) else value, time.monotonic() + px / 1000 if px else None)
+        return True
+
+    def pipeline(self, transaction=True):
+        redis, calls = self, []
+
+        class Pipeline:
+            def set(self, *args, **kwargs):
+                calls.append((args, kwargs))
+
+            def execute(self):
+                return [redis.set(*args, **kwargs) for args, kwargs in calls]
+
+        return Pipeline()
+
+@pytest.fixture(params=["memory", "redis"])
+def backend(request):
+    if request.param == "memory":
+        instance = MemoryCache(max_entries=100, ttl=60, hold=0.05)
+    else:
+        instance = RedisCache(LocalRedis(), ttl=60, hold=0.05)
+    cache.set_cache(instance)
+    yield instance
+    cache.set_cache(None)
+
+def test_lru_and_ttl_bounds():
+    lru = MemoryCache(max_entries=2, ttl=0.05, hold=1)
+    lru.add("a", 1)
+    lru.add("b", 2)
+    assert lru.get("a") == 1
+    lru.add("c", 3)
+    assert lru.get("b") is None
+    assert lru.get("a") == 1 and lru.get("c") == 3
+    time.sleep(0.06)
+    assert lru.get("a") is None
+    stats = lru.status()
+    assert (stats["hits"], stats["misses"], stats["evictions"], stats["expirations"]) == (3, 2, 1, 1)
+
+def test_invalidation_holds_off_stale_refills(backend):
+    backend.add("goal:1", {"title": "old"})
+    backend.invalidate(["goal:1"])
+    assert backend.get("goal:1") is None
+    # A read that started before the write must not put the old row back
+    backend.add("goal:1", {"title": "old"})
+    assert backend.get("goal:1") is None
+    time.sleep(0.06)
+    backend.add("goal:1", {"title": "new"})
+    assert backend.get("goal:1") == {"title": "new"}
+
+def test_reads_hit_cache_until_written(client, backend):
+    first = client.get("/api/goals/1")
+    assert first.status_code == 200
+    cached = client.get("/api/goals/1")
+    assert cached.json() == first.json()
+    assert 'desc="0 statements"' in cached.headers["Server-Timing"]
+
+    assert client.put("/api/goals/1", json={"title": "Renamed"}).status_code == 200
+    assert client.get("/api/goals/1").json()["title"] == "Renamed"
+    assert client.get("/health/cache").json()["hits"] >= 1
+
+def test_cascading_deletes_invalidate_children(client, backend):
+    resource = client.get("/api/resources/goal/1").json()[0]
+    topic_id = client.get(f"/api/topics/resource/{resource['resource_id']}").json()[0]["topic_id"]
+    paths = [
+        "/api/users/1", "/api/goals/1", f"/api/resources/{resource['resource_id']}", f"/api/topics/{topic_id}"
+    ]
+    assert all(client.get(path).status_code == 200 for path in paths)
+
+    assert client.delete("/api/users/1").status_code == 200
+    assert [client.get(path).status_code for path in paths] == [404, 404, 404, 404]
+
+def test_topic_writes_invalidate_topic(client, backend):
+    resource = client.get("/api/resources/goal/1").json()[0]
+    topic_id = client.get(f"/api/topics/resource/{resource['resource_id']}").json()[0]["topic_id"]
+    client.patch(f"/api/topics/{topic_id}/status", json={"is_completed": False})
+    assert client.get(f"/api/topics/{topic_id}").json()["is_completed"] is False
+
+    client.patch("/api/topics/status", json=[{"topic_id": topic_id, "is_completed": True}])
+    assert client.get(f"/api/topics/{topic_id}").json()["is_completed"] is True
+
+    client.put(f"/api/topics/{topic_id}", json={"title": "Renamed"})
+    assert client.get(f"/api/topics/{topic_id}").json()["title"] == "Renamed"
+
+    client.delete(f"/api/topics/{topic_id}")
+    assert client.get(f"/api/topics/{topic_id}").status_code == 404
+
+def test_resource_delete_drops_its_topics_without_reading_them(client, backend):
+    resource_id = client.get("/api/resources/goal/1").json()[0]["resource_id"]
+    topic_id = client.get(f"/api/topics/resource/{resource_id}").json()[0]["topic_id"]
+    assert client.get(f"/api/topics/{topic_id}").status_code == 200
+    assert client.get("/api/goals/1").status_code == 200
+
+    response = client.delete(f"/api/resources/{resource_id}")
+    assert response.status_code == 200
+    assert client.get(f"/api/topics/{topic_id}").status_code == 404
+    # The rest of the user's entries are stale too: the first read drops the old entry,
+    # and once its hold has passed the reloaded goal is cached again
+    time.sleep(0.06)
+    assert 'desc="0 statements"' not in client.get("/api/goals/1").headers["Server-Timing"]
+    time.sleep(0.06)
+    assert client.get("/api/goals/1").status_code == 200
+    assert 'desc="0 statements"' in client.get("/api/goals/1").headers["Server-Timing"]
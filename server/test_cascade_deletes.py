@@ -0,0 +1,44 @@
+"""
+Tests for deletes cascading in the database (passive_deletes + ON DELETE CASCADE)
+Run with: python -m pytest test_cascade_deletes.py
+"""
+import os
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import func, select
+from app.models import DailyProgress, Goal, Resource, ResourceTopic
+
+def _statements(response) -> int:
+    return int(response.headers["Server-Timing"].split('desc="')[1].split()[0])
+
+def _counts(session_local):
+    with session_local() as db:
+        return [db.scalar(select(func.count()).select_from(model)) for model in (Goal, Resource, ResourceTopic, DailyProgress)]
+
+def _grow(client, topics: int):
+    """Add `topics` completed topics to the first resource of user 1"""
+    resource_id = client.get("/api/resources/goal/1").json()[0]["resource_id"]
+    for start in range(0, topics, 100):
+        client.post("/api/topics/bulk", json={
+            "resource_id": resource_id, "topics": [{"title": f"Bulk {n}", "is_completed": True} for n in range(start, start + 100)]
+        })
+
+def test_delete_user_does_not_load_the_tree(client, session_local):
+    _grow(client, 500)
+    assert _counts(session_local)[2] == 509
+
+    response = client.delete("/api/users/1")
+    assert response.status_code == 200
+    # SELECT user, DELETE user: the same for 9 topics or 509, and no read of the subtree for the cache
+    assert _statements(response) == 2
+    assert _counts(session_local) == [0, 0, 0, 0]
+
+def test_delete_goal_cascades_in_the_database(client, session_local):
+    _grow(client, 200)
+    goals, resources, topics, _ = _counts(session_local)
+
+    response = client.delete("/api/goals/1")
+    assert response.status_code == 200
+    assert _statements(response) == 4
+    assert _counts(session_local)[:3] == [goals - 1, resources - 1, topics - 203]
+    assert client.get("/api/goals/user/1/details").status_code == 200
@@ -0,0 +1,74 @@
+"""
+Tests for depth= and fields= on the goal details endpoint
+Run with: python -m pytest test_detail_shape.py
+"""
+import os
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import json
+import pytest
+
+def _statements(response) -> int:
+    return int(response.headers["Server-Timing"].split('desc="')[1].split()[0])
+
+def _by_id(goals):
+    """Topics in id order (the full tree leaves their order unspecified)"""
+    for goal in goals:
+        for resource in goal.get("resources", ()):
+            if "topics" in resource:
+                resource["topics"].sort(key=lambda topic: topic["topic_id"])
+    return goals
+
+def _trim(goal, goal_fields=None, resource_fields=None, topic_fields=None, depth="full"):
+    """The full response cut down to a shape, to compare the sparse responses against"""
+    pick = lambda item, fields, key: {k: v for k, v in item.items() if fields is None or k in fields | {key}}
+    trimmed = pick({k: v for k, v in goal.items() if k != "resources"}, goal_fields, "goal_id")
+    if depth != "goal":
+        trimmed["resources"] = []
+        for resource in goal["resources"]:
+            entry = pick({k: v for k, v in resource.items() if k != "topics"}, resource_fields, "resource_id")
+            if depth == "full":
+                entry["topics"] = [pick(topic, topic_fields, "topic_id") for topic in resource["topics"]]
+            trimmed["resources"].append(entry)
+    return trimmed
+
+@pytest.mark.parametrize("query, shape, statements", [
+    ("depth=goal", {"depth": "goal"}, 2),
+    ("depth=goal&fields=title,target_date", {"depth": "goal", "goal_fields": {"title", "target_date"}}, 2),
+    ("depth=resources&fields=title,current_goal_value,resources.title,resources.completed_points_resources", {
+        "depth": "resources", "goal_fields": {"title", "current_goal_value"}, "resource_fields": {"title", "completed_points_resources"},
+    }, 3),
+    ("fields=title,topics.title,topics.topic_point_value", {"goal_fields": {"title"}, "topic_fields": {"title", "topic_point_value"}}, 4),
+])
+def test_sparse_details_match_the_full_tree(client, query, shape, statements):
+    # A completion today, so today's points are not all zero
+    topic_id = client.get("/api/topics/resource/1").json()[0]["topic_id"]
+    client.patch(f"/api/topics/{topic_id}/status", json={"is_completed": False})
+    client.patch(f"/api/topics/{topic_id}/status", json={"is_completed": True})
+
+    full = client.get("/api/goals/user/1/details").json()
+    response = client.get(f"/api/goals/user/1/details?{query}")
+    assert response.status_code == 200
+    assert _by_id(response.json()) == _by_id([_trim(goal, **shape) for goal in full])
+    # Version lookup + goals, plus one SELECT per level loaded
+    assert _statements(response) == statements
+
+    lines = client.get(f"/api/goals/user/1/details?{query}", headers={"Accept": "application/x-ndjson"}).text.splitlines()
+    assert [json.loads(line) for line in lines] == response.json()
+
+def test_goal_depth_skips_todays_aggregate(client):
+    response = client.get("/api/goals/user/1/details?depth=goal&fields=title")
+    assert response.json()[0].keys() == {"goal_id", "title"}
+    assert _statements(response) == 2
+
+def test_invalid_shapes(client):
+    assert client.get("/api/goals/user/1/details?depth=everything").status_code == 400
+    assert client.get("/api/goals/user/1/details?fields=nope").status_code == 400
+    assert client.get("/api/goals/user/1/details?fields=resources").status_code == 400
+    assert client.get("/api/goals/user/1/details?depth=resources&fields=topics.title").status_code == 400
+
+def test_shapes_have_their_own_etags(client):
+    full = client.get("/api/goals/user/1/details").headers["ETag"]
+    goal_only = client.get("/api/goals/user/1/details?depth=goal").headers["ETag"]
+    assert full != goal_only
+    assert client.get("/api/goals/user/1/details?depth=goal", headers={"If-None-Match": goal_only}).status_code == 304
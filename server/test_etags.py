@@ -0,0 +1,81 @@
+"""
+Tests for ETag / If-None-Match handling of the goal tree endpoints
+Run with: python -m pytest test_etags.py
+"""
+import os
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import pytest
+from app.etags import etag_matches
+
+TREE_ENDPOINTS = ["/api/goals/user/1", "/api/goals/user/1/details", "/api/goals/user/1/summary"]
+
+def test_etag_matches():
+    assert etag_matches('W/"details-1-3"', 'W/"details-1-3"')
+    assert etag_matches('"a", "details-1-3"', 'W/"details-1-3"')
+    assert etag_matches("*", 'W/"details-1-3"')
+    assert not etag_matches('W/"details-1-2"', 'W/"details-1-3"')
+    assert not etag_matches(None, 'W/"details-1-3"')
+
+@pytest.mark.parametrize("path", TREE_ENDPOINTS)
+def test_not_modified_until_tree_changes(client, path):
+    first = client.get(path)
+    etag = first.headers["ETag"]
+    assert first.status_code == 200
+
+    cached = client.get(path, headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["ETag"] == etag
+    # Only the version lookup ran
+    assert 'desc="1 statements"' in cached.headers["Server-Timing"]
+
+    goal = client.get("/api/goals/user/1").json()[0]
+    resource = client.get(f"/api/resources/goal/{goal['goal_id']}").json()[0]
+    topic_id = client.get(f"/api/topics/resource/{resource['resource_id']}").json()[0]["topic_id"]
+    assert client.put(f"/api/topics/{topic_id}", json={"title": "Renamed"}).status_code == 200
+
+    changed = client.get(path, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+def test_every_tree_write_changes_the_etag(client):
+    def etag():
+        return client.get("/api/goals/user/1/details").headers["ETag"]
+
+    seen = {etag()}
+    goal_id = client.post("/api/goals/", json={"title": "New", "user_id": 1, "target_value": 10}).json()["goal_id"]
+    seen.add(etag())
+    client.put(f"/api/goals/{goal_id}", json={"description": "x"})
+    seen.add(etag())
+    resource_id = client.post("/api/resources/", json={"title": "Book", "goal_id": goal_id, "value_per_unit": 2}).json()["resource_id"]
+    seen.add(etag())
+    client.put(f"/api/resources/{resource_id}", json={"value_per_unit": 3})
+    seen.add(etag())
+    topics = client.post("/api/topics/bulk", json={"resource_id": resource_id, "topics": [{"title": "A"}, {"title": "B"}]}).json()
+    seen.add(etag())
+    client.patch(f"/api/topics/{topics[0]['topic_id']}/status", json={"is_completed": True})
+    seen.add(etag())
+    client.patch("/api/topics/status", json=[{"topic_id": topics[1]["topic_id"], "is_completed": True}])
+    seen.add(etag())
+    client.delete(f"/api/topics/{topics[0]['topic_id']}")
+    seen.add(etag())
+    client.delete(f"/api/resources/{resource_id}")
+    seen.add(etag())
+    client.delete(f"/api/goals/{goal_id}")
+    seen.add(etag())
+    assert len(seen) == 11
+
+def test_ndjson_has_its_own_etag(client):
+    json_etag = client.get("/api/goals/user/1/details").headers["ETag"]
+    streamed = client.get("/api/goals/user/1/details", headers={"Accept": "application/x-ndjson"})
+    assert streamed.headers["ETag"] != json_etag
+    assert streamed.headers["Vary"] == "Accept"
+    assert client.get(
+        "/api/goals/user/1/details", headers={"Accept": "application/x-ndjson", "If-None-Match": streamed.headers["ETag"]}
+    ).status_code == 304
+
+def test_unknown_user_has_no_etag(client):
+    response = client.get("/api/goals/user/999/details")
+    assert response.status_code == 200
+    assert "ETag" not in response.headers
@@ -0,0 +1,143 @@
+"""
+Tests for the change feed: brokers, the SSE body and the events published by writes
+Run with: python -m pytest test_events.py
+"""
+import os
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import asyncio
+import json
+import queue
+import pytest
+from app import events
+from app.events import LocalBroker, RedisBroker, event_stream
+
+@pytest.fixture
+def broker():
+    broker = LocalBroker(max_queued=3)
+    events.set_broker(broker)
+    yield broker
+    events.set_broker(None)
+
+class LocalPubSub:
+    """In-process stand-in for the Redis pub/sub commands RedisBroker uses"""
+    def __init__(self):
+        self.messages = queue.Queue()
+
+    def publish(self, channel, data):
+        self.messages.put({"type": "pmessage", "channel": channel.encode(), "data": data.encode()})
+
+    def pubsub(self, ignore_subscribe_messages=False):
+        client = self
+
+        class PubSub:
+            def psubscribe(self, pattern):
+                self.pattern = pattern
+
+            def listen(self):
+                while True:
+                    yield client.messages.get()
+
+        return PubSub()
+
+def test_publish_from_another_thread(broker):
+    async def scenario():
+        subscription = broker.subscribe(1)
+        other = broker.subscribe(2)
+        assert broker.status()["subscribers"] == 2
+        await asyncio.to_thread(broker.publish, 1, {"type": "topic.updated", "ids": [5]})
+        received = await asyncio.wait_for(subscription.get(), 1)
+        assert other.queue.empty()
+        subscription.close()
+        other.close()
+        return received
+
+    assert asyncio.run(scenario()) == {"type": "topic.updated", "ids": [5]}
+    assert not broker.active
+
+def test_slow_subscriber_gets_resync(broker):
+    async def scenario():
+        subscription = broker.subscribe(1)
+        for i in range(5):
+            broker.publish(1, {"type": "topic.updated", "ids": [i]})
+        await asyncio.sleep(0)
+        first = await subscription.get()
+        broker.publish(1, {"type": "goal.updated", "ids": [9]})
+        await asyncio.sleep(0)
+        second = await subscription.get()
+        subscription.close()
+        return first, second
+
+    assert asyncio.run(scenario()) == ({"type": "resync"}, {"type": "goal.updated", "ids": [9]})
+
+def test_event_stream_body(broker):
+    async def scenario():
+        stream = event_stream(1, keepalive=0.05)
+        chunks = [await stream.__anext__(), await stream.__anext__()]
+        broker.publish(1, {"type": "goal.updated", "ids": [3], "goals": [], "resources": []})
+        chunks.append(await stream.__anext__())
+        await stream.aclose()
+        return chunks
+
+    retry, keepalive, event = asyncio.run(scenario())
+    assert retry == "retry: 3000\n\n"
+    assert keepalive == ": keepalive\n\n"
+    assert event == 'event: goal.updated\ndata: {"type":"goal.updated","ids":[3],"goals":[],"resources":[]}\n\n'
+    assert broker.status()["subscribers"] == 0
+
+def test_redis_broker_fans_out_to_local_streams():
+    broker = RedisBroker(LocalPubSub())
+
+    async def scenario():
+        subscription = broker.subscribe(7)
+        await asyncio.to_thread(broker.publish, 7, {"type": "topic.deleted", "ids": [1]})
+        received = await asyncio.wait_for(subscription.get(), 1)
+        subscription.close()
+        return received
+
+    assert asyncio.run(scenario()) == {"type": "topic.deleted", "ids": [1]}
+
+def test_writes_publish_rollups(client, broker):
+    goal = client.get("/api/goals/user/1").json()[0]
+    resource = client.get(f"/api/resources/goal/{goal['goal_id']}").json()[0]
+    topic = client.get(f"/api/topics/resource/{resource['resource_id']}").json()[0]
+
+    async def scenario():
+        subscription = broker.subscribe(1)
+        await asyncio.to_thread(
+            client.patch, f"/api/topics/{topic['topic_id']}/status", json={"is_completed": not topic["is_completed"]}
+        )
+        await asyncio.to_thread(client.put, f"/api/goals/{goal['goal_id']}", json={"description": "x"})
+        received = [await asyncio.wait_for(subscription.get(), 1) for _ in range(2)]
+        subscription.close()
+        return received
+
+    topic_event, goal_event = asyncio.run(scenario())
+    details = next(g for g in client.get("/api/goals/user/1/details").json() if g["goal_id"] == goal["goal_id"])
+
+    assert topic_event["type"] == "topic.updated"
+    assert topic_event["ids"] == [topic["topic_id"]]
+    assert topic_event["resources"][0]["resource_id"] == resource["resource_id"]
+    assert topic_event["resources"][0]["completed_points_resources"] == pytest.approx(details["resources"][0]["completed_points_resources"])
+    assert topic_event["goals"] == [{
+        "goal_id": goal["goal_id"],
+        "goals_total_points": pytest.approx(details["goals_total_points"]),
+        "completed_points_goal": pytest.approx(details["completed_points_goal"]),
+    }]
+    assert goal_event["type"] == "goal.updated" and goal_event["resources"] == []
+    # Events must survive the trip through Redis unchanged
+    assert json.loads(json.dumps(topic_event)) == topic_event
+
+def test_no_queries_without_subscribers(client, broker):
+    topic_id = client.get("/api/topics/resource/1").json()[0]["topic_id"]
+    before = client.put(f"/api/topics/{topic_id}", json={"title": "A"}).headers["Server-Timing"]
+
+    async def scenario():
+        subscription = broker.subscribe(1)
+        timing = (await asyncio.to_thread(client.put, f"/api/topics/{topic_id}", json={"title": "B"})).headers["Server-Timing"]
+        subscription.close()
+        return timing
+
+    during = asyncio.run(scenario())
+    statements = lambda timing: int(timing.split('desc="')[1].split()[0])
+    assert statements(during) == statements(before) + 2
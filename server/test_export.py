@@ -0,0 +1,60 @@
+"""
+Tests for the streaming account export (GET /api/users/{user_id}/export)
+Run with: python -m pytest test_export.py
+"""
+import os
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import csv
+import gzip
+import io
+import json
+from app.config import settings
+
+def test_ndjson_export(client, monkeypatch):
+    # Batches that split a resource's topics: its record must still be written once
+    monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 2)
+    client.post("/api/resources/", json={"title": "Empty", "goal_id": 1})
+    response = client.get("/api/users/1/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.headers["content-disposition"] == 'attachment; filename="goal-tracker-user-1.ndjson"'
+
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [record["type"] for record in records[:5]] == ["goal", "resource", "topic", "topic", "topic"]
+    assert {kind: sum(record["type"] == kind for record in records) for kind in ("goal", "resource", "topic")} == {
+        "goal": 3, "resource": 4, "topic": 9
+    }
+    goal_ids = [record["goal_id"] for record in records if record["type"] == "goal"]
+    assert goal_ids == sorted(goal_ids)
+    topic = next(record for record in records if record["type"] == "topic")
+    api_topic = client.get(f"/api/topics/{topic['topic_id']}").json()
+    assert {key: topic[key] for key in api_topic} == api_topic
+    assert "hashed_password" not in records[0]
+
+def test_csv_export(client):
+    response = client.get("/api/users/1/export", params={"format": "csv"})
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 9
+    assert {"goal.title", "resource.title", "topic.title", "topic.is_completed"} <= set(rows[0])
+    assert {row["topic.is_completed"] for row in rows} <= {"true", "false"}
+    # Empty cells for a resource without topics
+    client.post("/api/resources/", json={"title": "Empty", "goal_id": 1})
+    rows = list(csv.DictReader(io.StringIO(client.get("/api/users/1/export", params={"format": "csv"}).text)))
+    assert [(row["resource.title"], row["topic.topic_id"]) for row in rows if row["resource.title"] == "Empty"] == [("Empty", "")]
+
+def test_gzip_export(client):
+    plain = client.get("/api/users/1/export", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    compressed = client.get("/api/users/1/export", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.headers["vary"] == "Accept-Encoding"
+    # httpx decodes the body; check the raw stream too
+    assert compressed.text == plain.text
+    with client.stream("GET", "/api/users/1/export", headers={"Accept-Encoding": "gzip"}) as response:
+        assert gzip.decompress(b"".join(response.iter_raw())).decode() == plain.text
+
+def test_export_errors(client):
+    assert client.get("/api/users/999/export").status_code == 404
+    assert client.get("/api/users/1/export", params={"format": "xml"}).status_code == 422
@@ -0,0 +1,52 @@
+"""
+Property test: the NumPy goal metrics engine matches the per-topic loop exactly
+Run with: python -m pytest test_goal_metrics.py
+"""
+import os
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from datetime import date, datetime
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("hypothesis")
+from hypothesis import given, settings as hypothesis_settings, strategies as st
+
+from app.config import settings
+from app.goal_metrics import loop_metrics, vectorized_metrics, compute_metrics
+from app.models import Resource, ResourceTopic
+
+TODAY = date(2024, 5, 17)
+
+complete_dates = st.one_of(
+    st.none(),
+    st.sampled_from([
+        datetime(2024, 5, 17, 0, 0), datetime(2024, 5, 17, 23, 59, 59), datetime(2024, 5, 16, 23, 59, 59),
+        datetime(2024, 5, 18), datetime(2023, 5, 17, 12),
+    ]),
+    st.datetimes(min_value=datetime(2020, 1, 1), max_value=datetime(2030, 1, 1)),
+)
+
+topics = st.builds(
+    ResourceTopic,
+    point_multiplier=st.floats(min_value=-1e6, max_value=1e6, allow_nan=False) | st.sampled_from([0.5, 1.0, 1.5, 2.0]),
+    is_completed=st.booleans(),
+    complete_date=complete_dates,
+)
+
+trees = st.lists(
+    st.tuples(st.builds(Resource, value_per_unit=st.integers(min_value=-1000, max_value=10**6)), st.lists(topics, max_size=30)),
+    max_size=8,
+)
+
+@hypothesis_settings(max_examples=300, deadline=None)
+@given(trees)
+def test_vectorized_matches_loop(resources):
+    assert vectorized_metrics(resources, TODAY) == loop_metrics(resources, TODAY)
+
+def test_threshold_picks_engine(monkeypatch):
+    topic = ResourceTopic(point_multiplier=0.1, is_completed=True, complete_date=datetime(2024, 5, 17, 9))
+    resources = [(Resource(value_per_unit=3), [topic] * 5)]
+    monkeypatch.setattr(settings, "VECTORIZED_METRICS_MIN_TOPICS", 5)
+    assert compute_metrics(resources, TODAY) == loop_metrics(resources, TODAY)
+    assert compute_metrics(resources, TODAY).todays_completed_points == pytest.approx(1.5)
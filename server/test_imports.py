@@ -0,0 +1,89 @@
+"""
+Tests for the streaming CSV / NDJSON import (POST /api/goals/{goal_id}/import)
+Run with: python -m pytest test_imports.py
+"""
+import os
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import json
+from sqlalchemy import text
+from app.config import settings
+from app.controllers.import_controller import ImportController
+
+CSV = """resource,value_per_unit,total_time_per_unit,topic,point_multiplier,is_completed
+Book,5,30 minutes,Chapter 1,1,true
+Book,,,Chapter 2,2,
+Book,,,Chapter 3,oops,
+Videos,2,,,,
+Videos,,,Lecture 1,,false
+"""
+
+def test_csv_import(client):
+    response = client.post("/api/goals/1/import", content=CSV, headers={"Content-Type": "text/csv"})
+    assert response.status_code == 200
+    report = response.json()
+    assert report | {"errors": None} == {"rows": 5, "resources_created": 2, "topics_created": 3, "rejected": 1, "errors": None}
+    assert [error["line"] for error in report["errors"]] == [4]
+    assert "point_multiplier" in report["errors"][0]["error"]
+
+    resources = {resource["title"]: resource for resource in client.get("/api/resources/goal/1").json()}
+    assert resources["Book"]["value_per_unit"] == 5 and resources["Book"]["total_time_per_unit"] == "0:30:00"
+    topics = client.get(f"/api/topics/resource/{resources['Book']['resource_id']}").json()
+    assert [(topic["title"], topic["point_multiplier"], topic["is_completed"]) for topic in topics] == [
+        ("Chapter 1", 1.0, True), ("Chapter 2", 2.0, False)
+    ]
+    details = {goal["goal_id"]: goal for goal in client.get("/api/goals/user/1/details").json()}[1]
+    book = next(resource for resource in details["resources"] if resource["title"] == "Book")
+    assert (book["total_topic_points"], book["completed_points_resources"]) == (15.0, 5.0)
+
+def test_ndjson_import_in_batches(client, monkeypatch):
+    monkeypatch.setattr(settings, "BULK_INSERT_CHUNK_SIZE", 7)
+    lines = [json.dumps({"resource": f"Part {n // 10}", "topic": f"Topic {n}"}) for n in range(30)]
+    lines[12] = "{not json"
+    lines[20] = json.dumps(["Part 2", "Topic 20"])
+
+    def body():
+        # Chunks that split lines
+        text = "\n".join(lines).encode()
+        for start in range(0, len(text), 100):
+            yield text[start:start + 100]
+
+    response = client.post("/api/goals/1/import?format=ndjson", content=body())
+    assert response.json() == {
+        "rows": 30, "resources_created": 3, "topics_created": 28, "rejected": 2,
+        "errors": [{"line": 13, "error": "Invalid JSON"}, {"line": 21, "error": "Expected a JSON object"}],
+    }
+    # Topics of an existing resource are added to it
+    client.post("/api/goals/1/import", content=json.dumps({"resource": "Part 0", "topic": "Extra"}),
+                headers={"Content-Type": "application/x-ndjson"})
+    part = next(resource for resource in client.get("/api/resources/goal/1").json() if resource["title"] == "Part 0")
+    assert len(client.get(f"/api/topics/resource/{part['resource_id']}").json()) == 11
+
+def test_rejected_imports(client):
+    assert client.post("/api/goals/1/import", content="resource,pages\nBook,3\n", headers={"Content-Type": "text/csv"}).status_code == 400
+    assert client.post("/api/goals/1/import", content="{}", headers={"Content-Type": "application/json"}).status_code == 415
+    assert client.post("/api/goals/999/import?format=csv", content="resource\nBook\n").status_code == 404
+
+def test_failed_batch_rolls_back_alone(client, session_local, monkeypatch):
+    monkeypatch.setattr(settings, "BULK_INSERT_CHUNK_SIZE", 3)
+    with session_local() as db:
+        db.execute(text(
+            "CREATE TRIGGER no_broken_topics BEFORE INSERT ON resource_topics WHEN NEW.title = 'Broken' "
+            "BEGIN SELECT RAISE(ABORT, 'broken topic'); END"
+        ))
+        db.commit()
+    titles = ["Topic 1", "Topic 2", "Topic 3", "Topic 4", "Broken", "Topic 6", "Topic 7"]
+    # One line per chunk, so each batch holds exactly three rows
+    lines = [json.dumps({"resource": f"Part {n // 3}", "topic": title}).encode() + b"\n" for n, title in enumerate(titles)]
+
+    # TestClient sends the body in one piece; the controller takes the chunks as given
+    with session_local() as db:
+        report = ImportController.import_rows(db, 1, lines, "ndjson").model_dump()
+    assert report | {"errors": None} == {"rows": 7, "resources_created": 2, "topics_created": 4, "rejected": 3, "errors": None}
+    assert [error["line"] for error in report["errors"]] == [4, 5, 6]
+    assert "broken topic" in report["errors"][0]["error"]
+    # The second batch's resource (Part 1) was rolled back with its topics; the third was imported
+    titles = {resource["title"] for resource in client.get("/api/resources/goal/1").json()}
+    assert {"Part 0", "Part 2"} <= titles and "Part 1" not in titles
+    details = {goal["goal_id"]: goal for goal in client.get("/api/goals/user/1/details").json()}[1]
+    assert sum(len(resource["topics"]) for resource in details["resources"] if resource["title"].startswith("Part")) == 4
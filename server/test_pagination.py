@@ -0,0 +1,65 @@
+"""
+Tests for keyset pagination of the list endpoints
+Run with: python -m pytest test_pagination.py
+"""
+import os
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import update
+from app.config import settings
+from app.models import ResourceTopic
+from app.pagination import encode_cursor, decode_cursor
+from datetime import datetime
+
+def _walk(client, url, limit):
+    pages, cursor = [], None
+    while True:
+        params = {"limit": limit} | ({"cursor": cursor} if cursor else {})
+        response = client.get(url, params=params)
+        assert response.status_code == 200
+        pages.append(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            assert "Link" not in response.headers
+            return pages
+        assert response.headers["Link"].endswith('; rel="next"') and f"cursor={cursor}" in response.headers["Link"]
+
+def test_pages_cover_the_list_once(client, session_local):
+    # Bulk inserts share one CURRENT_TIMESTAMP second, so the id tie-break orders most rows;
+    # move every third row to a later second so pages also cross seconds
+    topics = client.post("/api/topics/bulk", json={"resource_id": 1, "topics": [{"title": f"T{i}"} for i in range(8)]}).json()
+    with session_local() as db:
+        later = [topic["topic_id"] for topic in topics[::3]]
+        db.execute(update(ResourceTopic).where(ResourceTopic.topic_id.in_(later)).values(created_at=datetime(2099, 1, 1)))
+        db.commit()
+    everything = client.get("/api/topics/resource/1").json()
+    assert "X-Next-Cursor" not in client.get("/api/topics/resource/1").headers
+    assert [topic["topic_id"] for topic in everything][-3:] == later
+
+    for limit in (1, 4):
+        pages = _walk(client, "/api/topics/resource/1", limit)
+        assert [len(page) for page in pages] == [limit] * (11 // limit) + ([11 % limit] if 11 % limit else [])
+        assert [topic for page in pages for topic in page] == everything
+
+    goal_id = client.get("/api/goals/user/1").json()[0]["goal_id"]
+    assert [len(page) for page in _walk(client, "/api/goals/user/1", 2)] == [2, 1]
+    assert [len(page) for page in _walk(client, f"/api/resources/goal/{goal_id}", 1)] == [1]
+
+def test_default_page_size_and_limits(client, monkeypatch):
+    monkeypatch.setattr(settings, "LIST_PAGE_SIZE", 2)
+    response = client.get("/api/topics/resource/1")
+    assert len(response.json()) == 2 and "X-Next-Cursor" in response.headers
+
+    assert client.get("/api/topics/resource/1", params={"limit": 0}).status_code == 422
+    assert client.get("/api/topics/resource/1", params={"limit": settings.LIST_MAX_LIMIT + 1}).status_code == 422
+    assert client.get("/api/topics/resource/1", params={"cursor": "not-a-cursor"}).status_code == 400
+
+def test_pages_have_their_own_etags(client):
+    first = client.get("/api/goals/user/1", params={"limit": 2})
+    second = client.get("/api/goals/user/1", params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]})
+    assert len({first.headers["ETag"], second.headers["ETag"], client.get("/api/goals/user/1").headers["ETag"]}) == 3
+    assert client.get("/api/goals/user/1", params={"limit": 2}, headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+def test_cursor_round_trip():
+    moment = datetime(2026, 1, 2, 3, 4, 5, 600)
+    assert decode_cursor(encode_cursor(moment, 42)) == (moment, 42)
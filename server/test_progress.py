@@ -0,0 +1,133 @@
+"""
+Tests for the daily progress buckets and the goal history endpoint
+Run with: python -m pytest test_progress.py
+"""
+import os
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import time
+from datetime import date, datetime, timedelta, timezone
+import pytest
+from sqlalchemy import text
+from app.config import settings
+from app.days import progress_day_sql, progress_today
+from app.models import DailyProgress
+from app.controllers.progress_controller import ProgressController
+
+def _buckets(session_local):
+    with session_local() as db:
+        return {
+            (row.goal_id, row.day): (round(row.completed_points, 6), row.completed_topics)
+            for row in db.query(DailyProgress).all()
+            if row.completed_topics or abs(row.completed_points) > 1e-9
+        }
+
+def _rebuilt(session_local):
+    with session_local() as db:
+        ProgressController.rebuild(db)
+    return _buckets(session_local)
+
+def test_buckets_follow_every_topic_write(client, session_local):
+    seeded = _buckets(session_local)
+    assert seeded and seeded == _rebuilt(session_local)
+
+    goal_id = client.post("/api/goals/", json={"title": "New", "user_id": 1, "target_value": 10}).json()["goal_id"]
+    resource_id = client.post("/api/resources/", json={"title": "Book", "goal_id": goal_id, "value_per_unit": 2}).json()["resource_id"]
+    topics = client.post("/api/topics/bulk", json={"resource_id": resource_id, "topics": [
+        {"title": "A", "point_multiplier": 1.5},
+        {"title": "B"},
+        {"title": "C", "is_completed": True, "complete_date": "2024-01-02T10:00:00"},
+    ]}).json()
+    client.post("/api/topics/", json={"title": "D", "resource_id": resource_id, "is_completed": True, "complete_date": "2024-01-03T10:00:00"})
+    client.patch(f"/api/topics/{topics[0]['topic_id']}/status", json={"is_completed": True})
+    client.patch("/api/topics/status", json=[
+        {"topic_id": topics[1]["topic_id"], "is_completed": True},
+        {"topic_id": topics[2]["topic_id"], "is_completed": False},
+    ])
+    client.put(f"/api/topics/{topics[0]['topic_id']}", json={"point_multiplier": 3})
+    client.put(f"/api/resources/{resource_id}", json={"value_per_unit": 5})
+
+    today = (goal_id, progress_today())
+    assert _buckets(session_local)[today] == (5 * 3 + 5 * 1, 2)
+    assert _buckets(session_local) == _rebuilt(session_local)
+
+    client.delete(f"/api/topics/{topics[1]['topic_id']}")
+    assert _buckets(session_local)[today] == (15, 1)
+    client.delete(f"/api/resources/{resource_id}")
+    assert today not in _buckets(session_local)
+    assert _buckets(session_local) == _rebuilt(session_local)
+
+def test_history_series(client):
+    goal_id = client.post("/api/goals/", json={"title": "New", "user_id": 1, "target_value": 10}).json()["goal_id"]
+    resource_id = client.post("/api/resources/", json={"title": "Book", "goal_id": goal_id, "value_per_unit": 2}).json()["resource_id"]
+    client.post("/api/topics/bulk", json={"resource_id": resource_id, "topics": [
+        {"title": "A", "is_completed": True, "complete_date": "2024-01-01T09:00:00"},
+        {"title": "B", "is_completed": True, "complete_date": "2024-01-03T09:00:00"},
+        {"title": "C", "is_completed": True, "complete_date": "2024-01-03T18:00:00", "point_multiplier": 2},
+    ]})
+
+    history = client.get(f"/api/goals/{goal_id}/history", params={"from": "2024-01-02", "to": "2024-01-04"}).json()
+    assert history["from_date"] == "2024-01-02" and history["to_date"] == "2024-01-04"
+    assert [(d["day"], d["completed_points"], d["completed_topics"], d["cumulative_points"]) for d in history["days"]] == [
+        ("2024-01-02", 0, 0, 2),
+        ("2024-01-03", 6, 2, 8),
+        ("2024-01-04", 0, 0, 8),
+    ]
+
+    default = client.get(f"/api/goals/{goal_id}/history").json()
+    assert len(default["days"]) == ProgressController.HISTORY_DEFAULT_DAYS
+    assert default["to_date"] == progress_today().isoformat()
+    assert default["days"][0]["day"] == (progress_today() - timedelta(days=89)).isoformat()
+
+def test_history_errors(client):
+    assert client.get("/api/goals/999/history").status_code == 404
+    assert client.get("/api/goals/1/history", params={"from": "2024-02-01", "to": "2024-01-01"}).status_code == 400
+
+def test_writes_rebuild_and_backfill_agree_on_the_day(client, session_local, monkeypatch):
+    monkeypatch.setattr(settings, "PROGRESS_TIMEZONE", "America/New_York")
+    goal_id = client.post("/api/goals/", json={"title": "New", "user_id": 1, "target_value": 10}).json()["goal_id"]
+    resource_id = client.post("/api/resources/", json={"title": "Book", "goal_id": goal_id, "value_per_unit": 2}).json()["resource_id"]
+    client.post("/api/topics/bulk", json={"resource_id": resource_id, "topics": [
+        # 21:30 on Feb 29 in New York
+        {"title": "A", "is_completed": True, "complete_date": "2024-03-01T02:30:00+00:00"},
+        # Naive: already New York time
+        {"title": "B", "is_completed": True, "complete_date": "2024-03-01T23:30:00"},
+    ]})
+
+    days = {day: value for (goal, day), value in _buckets(session_local).items() if goal == goal_id}
+    assert days == {date(2024, 2, 29): (2, 1), date(2024, 3, 1): (2, 1)}
+    assert _buckets(session_local) == _rebuilt(session_local)
+    with session_local() as db:
+        backfilled = db.scalars(text(
+            f"SELECT {progress_day_sql('sqlite', 'complete_date')} FROM resource_topics WHERE resource_id = :resource_id"
+        ), {"resource_id": resource_id}).all()
+    assert sorted(backfilled) == ["2024-02-29", "2024-03-01"]
+
+@pytest.fixture
+def server_zone(monkeypatch):
+    """Run with a process time zone whose date differs from UTC's right now"""
+    zone = "Etc/GMT+12" if datetime.now(timezone.utc).hour < 12 else "Etc/GMT-14"
+    monkeypatch.setenv("TZ", zone)
+    time.tzset()
+    yield zone
+    monkeypatch.undo()
+    time.tzset()
+
+@pytest.mark.parametrize("vectorized_from", [0, 1])
+def test_today_is_the_progress_day_not_the_servers(client, monkeypatch, server_zone, vectorized_from):
+    monkeypatch.setattr(settings, "VECTORIZED_METRICS_MIN_TOPICS", vectorized_from)
+    assert date.today() != progress_today()
+    goal_id = client.post("/api/goals/", json={"title": "New", "user_id": 1, "target_value": 10}).json()["goal_id"]
+    resource_id = client.post("/api/resources/", json={"title": "Book", "goal_id": goal_id, "value_per_unit": 5}).json()["resource_id"]
+    topic_id = client.post("/api/topics/", json={"title": "A", "resource_id": resource_id}).json()["topic_id"]
+    client.patch(f"/api/topics/{topic_id}/status", json={"is_completed": True})
+
+    def todays_points(path):
+        return {goal["goal_id"]: goal for goal in client.get(path).json()}[goal_id]["todays_completed_points"]
+
+    assert todays_points("/api/goals/user/1/details") == 5.0
+    assert todays_points("/api/goals/user/1/details?depth=goal") == 5.0
+    assert todays_points("/api/goals/user/1/summary") == 5.0
+    history = client.get(f"/api/goals/{goal_id}/history").json()
+    assert history["to_date"] == progress_today().isoformat() and history["days"][-1]["completed_points"] == 5.0
+    assert progress_today().isoformat() in client.get("/api/goals/user/1/summary").headers["ETag"]
@@ -0,0 +1,148 @@
+"""
+Tests for read-replica routing, with two SQLite files standing in for the primary and its replica
+Run with: python -m pytest test_replicas.py
+"""
+import os
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import asyncio
+import shutil
+import sqlite3
+import time
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app import cache, database
+from app.config import settings
+from app.database import Base, SessionLocal
+from app.main import app
+from app.models import Goal
+from benchmarks.datagen import generate
+
+def _title(path, goal_id: int = 1) -> str:
+    with sqlite3.connect(path) as conn:
+        return conn.execute("SELECT title FROM goals WHERE goal_id = ?", (goal_id,)).fetchone()[0]
+
+def _catch_up(primary, replica):
+    """Replay the primary's user versions onto the replica (its other rows stay as they were)"""
+    with sqlite3.connect(primary) as source:
+        versions = source.execute("SELECT data_version, user_id FROM users").fetchall()
+    with sqlite3.connect(replica) as conn:
+        conn.executemany("UPDATE users SET data_version = ? WHERE user_id = ?", versions)
+
+@pytest.fixture
+def databases(tmp_path, monkeypatch):
+    """(primary, replica) paths: the replica is a copy of the seeded primary, with goal 1 renamed
+    so reads show which database served them"""
+    primary, replica = tmp_path / "primary.db", tmp_path / "replica.db"
+    engine = create_engine(f"sqlite:///{primary}")
+    Base.metadata.create_all(engine)
+    with sessionmaker(engine)() as db:
+        generate(db, users=1, goals_per_user=3, resources_per_goal=1, topics_per_resource=3, seed=0)
+    engine.dispose()
+    shutil.copy(primary, replica)
+    with sqlite3.connect(replica) as conn:
+        conn.execute("UPDATE goals SET title = 'From the replica' WHERE goal_id = 1")
+
+    monkeypatch.setattr(settings, "DATABASE_URL", f"sqlite:///{primary}")
+    monkeypatch.setattr(settings, "REPLICA_DATABASE_URL", f"sqlite:///{replica}")
+    for name in ("_engine", "_replica_engine", "async_engine", "async_replica_engine"):
+        monkeypatch.setattr(database, name, None)
+    # Recent writers live in the cache layer; start every test without any
+    cache.set_cache(None)
+    yield primary, replica
+    cache.set_cache(None)
+    for engine in (database._engine, database._replica_engine):
+        if engine is not None:
+            engine.dispose()
+
+def _count_statements(engine) -> list:
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+def test_reads_go_to_the_replica(databases):
+    primary, replica = databases
+    client = TestClient(app)
+    assert client.get("/api/goals/1").json()["title"] == "From the replica"
+    assert {goal["title"] for goal in client.get("/api/goals/user/1/details").json()} >= {"From the replica"}
+
+    response = client.put("/api/goals/1", json={"title": "Renamed"})
+    assert response.json()["title"] == "Renamed"
+    assert (_title(primary), _title(replica)) == ("Renamed", "From the replica")
+    assert not response.cookies
+
+    # Until the replica has the user's new data_version, reads about that user's data go to
+    # the primary: for any client, including a cross-origin one sending no cookies
+    cross_origin = TestClient(app, headers={"Origin": "https://goal-tracker.example.com"})
+    for path in ("/api/goals/1", "/api/resources/1", "/api/users/1"):
+        assert cross_origin.get(path).status_code == 200
+    assert cross_origin.get("/api/goals/1").json()["title"] == "Renamed"
+    assert "Renamed" in {goal["title"] for goal in cross_origin.get("/api/goals/user/1").json()}
+    topic_id = client.get("/api/topics/resource/1").json()[0]["topic_id"]
+    client.put(f"/api/topics/{topic_id}", json={"title": "New topic title"})
+    assert client.get(f"/api/topics/{topic_id}").json()["title"] == "New topic title"
+
+    _catch_up(primary, replica)
+    assert client.get("/api/goals/1").json()["title"] == "From the replica"
+
+    # Profile updates count as writes too
+    client.put("/api/users/1", json={"occupation": "Writer"})
+    assert client.get("/api/users/1").json()["occupation"] == "Writer"
+
+    # Entities the replica does not have yet are read from the primary
+    goal_id = client.post("/api/goals/", json={"title": "New", "user_id": 1, "target_value": 10}).json()["goal_id"]
+    _catch_up(primary, replica)
+    assert client.get(f"/api/goals/{goal_id}").status_code == 200
+
+def test_reads_outside_the_window_skip_the_primary(databases, monkeypatch):
+    primary, replica = databases
+    monkeypatch.setattr(settings, "REPLICA_READ_YOUR_WRITES", 0.5)
+    client = TestClient(app)
+    on_primary = _count_statements(database.get_engine())
+    topic_id = client.get("/api/topics/resource/1").json()[0]["topic_id"]
+    for path in ("/api/goals/1", "/api/goals/user/1/details", "/api/users/1", f"/api/topics/{topic_id}"):
+        assert client.get(path).status_code == 200
+    assert client.get("/api/goals/1").json()["title"] == "From the replica"
+    assert on_primary == []
+
+    client.put("/api/goals/1", json={"title": "Renamed"})
+    assert client.get("/api/goals/1").json()["title"] == "Renamed"
+    assert on_primary
+
+    # Once the window has passed, reads go to the replica even though it never caught up
+    time.sleep(0.6)
+    on_primary.clear()
+    assert client.get("/api/goals/1").json()["title"] == "From the replica"
+    assert client.get("/api/goals/user/1/details").status_code == 200
+    assert on_primary == []
+
+def test_replica_sessions_write_to_the_primary(databases):
+    primary, replica = databases
+    with SessionLocal(replica=True) as db:
+        goal = db.get(Goal, 1)
+        assert goal.title == "From the replica"
+        goal.description = "Written"
+        db.commit()
+    with sqlite3.connect(primary) as conn:
+        assert conn.execute("SELECT description FROM goals WHERE goal_id = 1").fetchone()[0] == "Written"
+
+def test_async_reads_go_to_the_replica(databases):
+    pytest.importorskip("aiosqlite")
+    from app.routes import async_goal_routes
+    primary, replica = databases
+    async_app = FastAPI()
+    async_app.include_router(async_goal_routes.router, prefix="/api/goals")
+    with TestClient(async_app) as client:
+        assert client.get("/api/goals/1").json()["title"] == "From the replica"
+        assert "From the replica" in {goal["title"] for goal in client.get("/api/goals/user/1").json()}
+        client.put("/api/goals/1", json={"title": "Renamed"})
+        assert (_title(primary), _title(replica)) == ("Renamed", "From the replica")
+        assert client.get("/api/goals/1").json()["title"] == "Renamed"
+        _catch_up(primary, replica)
+        assert client.get("/api/goals/1").json()["title"] == "From the replica"
+        for engine in (database.async_engine, database.async_replica_engine):
+            client.portal.call(engine.dispose)
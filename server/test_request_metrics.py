@@ -0,0 +1,59 @@
+"""
+Tests for per-request query metrics (Server-Timing) and the N+1 guard
+Run with: python -m pytest test_request_metrics.py
+"""
+import os
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import pytest
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import get_db
+from app.main import app
+from app.models import Goal
+from app.request_metrics import RequestMetrics, RepeatedQueryError, TimedRoute, statement_shape
+
+def test_statement_shape_ignores_bound_values():
+    assert statement_shape("SELECT * FROM goals WHERE goal_id = ?") == statement_shape("SELECT *\n FROM goals WHERE goal_id = %(goal_id_1)s")
+    assert statement_shape("SELECT * FROM t WHERE id IN (?, ?, ?)") == statement_shape("SELECT * FROM t WHERE id IN ($1)")
+
+def test_server_timing_header(client):
+    response = client.get("/api/goals/user/1/details")
+    assert response.status_code == 200
+    timing = response.headers["Server-Timing"]
+    assert 'db;dur=' in timing and 'desc="2 statements"' in timing
+    assert "serialize;dur=" in timing and "total;dur=" in timing
+
+def test_details_pass_repeat_guard(client, monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_REPEAT_LIMIT", 2)
+    monkeypatch.setattr(settings, "QUERY_REPEAT_ACTION", "raise")
+    assert client.get("/api/goals/user/1/details").status_code == 200
+    assert client.get("/api/goals/user/1/summary").status_code == 200
+
+def test_repeat_guard_catches_lazy_loading(client, monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_REPEAT_LIMIT", 2)
+    monkeypatch.setattr(settings, "QUERY_REPEAT_ACTION", "raise")
+
+    router = APIRouter(route_class=TimedRoute)
+
+    @router.get("/n-plus-one")
+    def n_plus_one(db: Session = Depends(get_db)):
+        return [len(goal.resources) for goal in db.query(Goal).all()]
+
+    app.include_router(router, prefix="/test")
+    try:
+        with pytest.raises(RepeatedQueryError):
+            client.get("/test/n-plus-one")
+    finally:
+        app.router.routes = [route for route in app.router.routes if route.path != "/test/n-plus-one"]
+
+def test_warn_mode_records_repeats(monkeypatch):
+    monkeypatch.setattr(settings, "QUERY_REPEAT_LIMIT", 1)
+    monkeypatch.setattr(settings, "QUERY_REPEAT_ACTION", "warn")
+    metrics = RequestMetrics()
+    for goal_id in range(3):
+        metrics.record_statement("SELECT * FROM resources WHERE goal_id = ?", 0.001)
+    assert metrics.statements == 3
+    assert metrics.repeated == {"SELECT * FROM resources WHERE goal_id = ?": 3}
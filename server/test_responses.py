@@ -0,0 +1,23 @@
+"""
+Tests for the single-pass JSON responses of the goal tree endpoints
+Run with: python -m pytest test_responses.py
+"""
+import os
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import pytest
+from app.config import settings
+
+@pytest.mark.parametrize("path", ["/api/goals/user/1/details", "/api/goals/user/1/summary"])
+def test_same_body_as_response_model_path(client, monkeypatch, path):
+    fast = client.get(path)
+    monkeypatch.setattr(settings, "FAST_JSON_RESPONSES", False)
+    slow = client.get(path)
+
+    assert fast.status_code == slow.status_code == 200
+    assert fast.headers["content-type"] == slow.headers["content-type"] == "application/json"
+    assert fast.json() == slow.json()
+    # The ETag set by the dependency survives a returned Response
+    assert fast.headers["ETag"] == slow.headers["ETag"]
+    assert fast.headers["Cache-Control"] == slow.headers["Cache-Control"]
+    assert "serialize;dur=" in fast.headers["Server-Timing"]
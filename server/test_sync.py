@@ -0,0 +1,79 @@
+"""
+Tests for delta sync: updated_at cursors, tombstones and GET /api/sync/{user_id}
+Run with: python -m pytest test_sync.py
+"""
+import os
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import pytest
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import update
+from app.config import settings
+from app.models import Goal, Resource, ResourceTopic, Tombstone
+from app.controllers.sync_controller import SyncController
+
+@pytest.fixture
+def cursor(session_local, monkeypatch):
+    """A cursor taken half an hour after every seeded row was last written"""
+    monkeypatch.setattr(settings, "SYNC_CURSOR_OVERLAP", 0)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    with session_local() as db:
+        for model in (Goal, Resource, ResourceTopic):
+            db.execute(update(model).values(updated_at=now - timedelta(hours=1)))
+        db.commit()
+    return SyncController.format_cursor(now - timedelta(minutes=30))
+
+def test_full_sync_returns_the_tree(client):
+    body = client.get("/api/sync/1").json()
+
+    assert body["full"] is True and body["deleted"] == []
+    assert body["cursor"].endswith("Z")
+    assert len(body["goals"]) == 3 and len(body["resources"]) == 3 and len(body["topics"]) == 9
+    assert all(goal["updated_at"] for goal in body["goals"])
+
+def test_delta_sync_returns_only_changes(client, cursor):
+    assert client.get(f"/api/sync/1?since={cursor}").json() | {"cursor": None} == {
+        "cursor": None, "full": False, "goals": [], "resources": [], "topics": [], "deleted": []
+    }
+
+    goals = client.get("/api/goals/user/1").json()
+    resources = [client.get(f"/api/resources/goal/{goal['goal_id']}").json()[0] for goal in goals]
+    topics = client.get(f"/api/topics/resource/{resources[0]['resource_id']}").json()
+
+    # A title edit changes no rollup, so only the topic comes back
+    client.put(f"/api/topics/{topics[0]['topic_id']}", json={"title": "Renamed"})
+    body = client.get(f"/api/sync/1?since={cursor}").json()
+    assert [topic["title"] for topic in body["topics"]] == ["Renamed"]
+    assert body["goals"] == [] and body["resources"] == []
+
+    # Completing a topic changes the resource and goal rollups
+    client.patch(f"/api/topics/{topics[1]['topic_id']}/status", json={"is_completed": not topics[1]["is_completed"]})
+    client.delete(f"/api/topics/{topics[2]['topic_id']}")
+    client.delete(f"/api/resources/{resources[1]['resource_id']}")
+    client.delete(f"/api/goals/{goals[2]['goal_id']}")
+    body = client.get(f"/api/sync/1?since={cursor}").json()
+
+    assert {topic["topic_id"] for topic in body["topics"]} == {topics[0]["topic_id"], topics[1]["topic_id"]}
+    assert [resource["resource_id"] for resource in body["resources"]] == [resources[0]["resource_id"]]
+    assert {goal["goal_id"] for goal in body["goals"]} == {goals[0]["goal_id"], goals[1]["goal_id"]}
+    assert [(deleted["entity_type"], deleted["entity_id"]) for deleted in body["deleted"]] == [
+        ("topic", topics[2]["topic_id"]),
+        ("resource", resources[1]["resource_id"]),
+        ("goal", goals[2]["goal_id"]),
+    ]
+
+    # Nothing changed after the returned cursor
+    later = client.get(f"/api/sync/1?since={body['cursor']}").json()
+    assert later["topics"] == [] and later["deleted"] == []
+
+def test_invalid_and_expired_cursors(client, session_local):
+    assert client.get("/api/sync/1?since=yesterday").status_code == 400
+    expired = SyncController.format_cursor(datetime.now(timezone.utc) - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS + 1))
+    assert client.get(f"/api/sync/1?since={expired}").status_code == 410
+    assert client.get("/api/sync/999").status_code == 404
+
+    client.delete("/api/topics/1")
+    with session_local() as db:
+        db.execute(update(Tombstone).values(deleted_at=datetime.now(timezone.utc) - timedelta(days=365)))
+        db.commit()
+        assert SyncController.prune_tombstones(db) == 1
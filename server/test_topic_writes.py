@@ -0,0 +1,61 @@
+"""
+Tests for topic writes keeping the point rollups and daily progress consistent
+Run with: python -m pytest test_topic_writes.py
+"""
+import os
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy.dialects import postgresql
+from app.models import DailyProgress, Goal, Resource
+from app.controllers.topic_controller import TopicController
+
+def _state(session_local):
+    """Goal and resource rollups plus the daily progress buckets"""
+    with session_local() as db:
+        return (
+            {row.goal_id: (row.goals_total_points, row.completed_points_goal) for row in db.query(Goal).all()},
+            {row.resource_id: (row.total_topic_points, row.completed_points_resources) for row in db.query(Resource).all()},
+            {(row.goal_id, row.day): (round(row.completed_points, 6), row.completed_topics) for row in db.query(DailyProgress).all()},
+        )
+
+def test_single_topic_writes_lock_the_row():
+    compiled = str(TopicController.locked_statement(1).compile(dialect=postgresql.dialect()))
+    assert compiled.endswith("FOR UPDATE")
+
+def test_replayed_topic_writes_move_points_once(client, session_local):
+    first, second = [topic["topic_id"] for topic in client.get("/api/topics/resource/1").json()[:2]]
+    for path, body in (
+        (f"/api/topics/{first}/status", {"is_completed": False}),
+        (f"/api/topics/{first}/status", {"is_completed": True}),
+        (f"/api/topics/{second}", {"is_completed": False, "point_multiplier": 2}),
+        (f"/api/topics/{second}", {"is_completed": True}),
+    ):
+        method = client.patch if path.endswith("/status") else client.put
+        assert method(path, json=body).status_code == 200
+        state = _state(session_local)
+        assert method(path, json=body).status_code == 200
+        assert _state(session_local) == state
+
+    assert client.delete(f"/api/topics/{first}").status_code == 200
+    state = _state(session_local)
+    assert client.delete(f"/api/topics/{first}").status_code == 404
+    assert _state(session_local) == state
+
+def test_batches_lock_their_rows_in_id_order():
+    compiled = str(TopicController.batch_state_statement([2, 1]).compile(dialect=postgresql.dialect()))
+    assert compiled.endswith("ORDER BY resource_topics.topic_id FOR UPDATE OF resource_topics")
+
+def test_replayed_batch_leaves_rollups_unchanged(client, session_local):
+    topic_ids = [topic["topic_id"] for topic in client.get("/api/topics/resource/1").json()]
+    other_id = client.get("/api/topics/resource/2").json()[0]["topic_id"]
+    batch = [
+        {"topic_id": topic_ids[0], "is_completed": False},
+        {"topic_id": topic_ids[1], "is_completed": False, "is_skipped": True},
+        {"topic_id": other_id, "is_completed": False},
+    ]
+    for _ in range(2):
+        assert client.patch("/api/topics/status", json=batch).status_code == 200
+        state = _state(session_local)
+        assert client.patch("/api/topics/status", json=batch).status_code == 200
+        assert _state(session_local) == state
+        batch = [{**item, "is_completed": True} for item in batch]
@@ -0,0 +1,58 @@
+"""
+Tests for the production server pieces: per-worker readiness and engines rebuilt after fork
+Run with: python -m pytest test_workers.py
+"""
+import os
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import pytest
+from fastapi.testclient import TestClient
+
+import run
+from app import cache, database
+from app.config import settings
+from app.main import app
+
+@pytest.fixture
+def fresh_engines(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "DATABASE_URL", f"sqlite:///{tmp_path / 'app.db'}")
+    for name in ("_engine", "_replica_engine", "async_engine", "async_replica_engine"):
+        monkeypatch.setattr(database, name, None)
+    yield tmp_path
+    for engine in (database._engine, database._replica_engine):
+        if engine is not None:
+            engine.dispose()
+
+def test_readiness(fresh_engines, monkeypatch):
+    response = TestClient(app).get("/health/ready")
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["ready"], body["pid"], body["databases"]) == (True, os.getpid(), {"primary": "ok"})
+
+    monkeypatch.setattr(settings, "REPLICA_DATABASE_URL", f"sqlite:///{fresh_engines / 'missing' / 'replica.db'}")
+    response = TestClient(app).get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["databases"]["replica"].startswith("OperationalError")
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_forked_worker_builds_its_own_engine(fresh_engines):
+    parent_engine = database.get_engine()
+    parent_cache = cache.get_cache()
+    pid = os.fork()
+    if pid == 0:
+        inherited = database._engine is not None or cache._cache is not None
+        os._exit(1 if inherited or database.get_engine() is parent_engine else 0)
+    assert os.waitpid(pid, 0)[1] == 0
+    assert database._engine is parent_engine and cache.get_cache() is parent_cache
+
+def test_gunicorn_options(monkeypatch):
+    monkeypatch.setattr(settings, "WEB_WORKERS", 0)
+    assert run.worker_count() == (os.cpu_count() or 1)
+    monkeypatch.setattr(settings, "WEB_WORKERS", 3)
+    options = run.gunicorn_options("uvicorn.workers.UvicornWorker")
+    assert (options["workers"], options["max_requests"], options["preload_app"]) == (3, settings.WEB_MAX_REQUESTS, True)
+
+def test_recycling_without_gunicorn_fails_loudly(monkeypatch):
+    monkeypatch.setattr(settings, "WEB_MAX_REQUESTS", 100)
+    with pytest.raises(SystemExit, match="gunicorn"):
+        run.serve_uvicorn()